@@ -1,4 +1,4 @@
-from convert_acc.__init__ import main
+from convert_acc.gui import main
 
 if __name__ == '__main__':
 	main()
\ No newline at end of file
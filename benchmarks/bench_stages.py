@@ -0,0 +1,235 @@
+"""
+Benchmarks of the processing stages of convert_acc.
+
+Miniseed files (one per channel and hour) and TSPAIR text files (of one
+channel) are generated by convert_acc.synthetic for each data size, holding
+noise and one seismic pulse per hour, then every stage is
+timed several times and its peak memory measured in one extra run with
+tracemalloc (not used while timing):
+
+    ingest_tspair     readTspair of hourly text files of one channel
+    ingest_miniseed   readMiniseedCounts of hourly miniseed files of all channels
+    conversion        Conversion.fromCounts of all channels
+    conversion_matrix convertCountArray of counts of all channels stacked into one (channels, samples) matrix
+                      (numeric work of conversion only, to compare one call per stage with one call per channel)
+    getStats          peak stats of result columns of all channels
+    results_plots     results figures (one per result column) of all channels, drawn with Agg
+    comparison_plots  comparison figures of displacement, drawn with Agg
+    tableToPdf        StatsTable.tableToPdf
+    resultsPdf        writing rendered images of results figures as pages of one pdf (ReportWriter)
+
+Throughput is given in samples per second (samples of all channels handled by
+the stage - input samples up to conversion, samples kept after conversion from
+getStats on). File name does not start with 'test_', so pytest does not collect it.
+
+usage: python benchmarks/bench_stages.py [--hours 1 2 6] [--channels 24] [--repeat 3] [--json FILE]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import platform
+import statistics
+import tracemalloc
+
+# benchmarks are run from a checkout (package need not be installed)
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import numpy as np
+
+import convert_acc
+from convert_acc import synthetic
+from convert_acc.render import FigureHolder
+from convert_acc.render import TITLE_SUFFIXES
+from convert_acc.render import COMPARISON_FIGURES
+from convert_acc.render import getComparisonChannels
+from convert_acc.render import getMaxValues
+from convert_acc.render import rasterizeFigure
+from convert_acc.report import StatsTable
+from convert_acc.report import ReportWriter
+
+
+EVENT_TIMESTAMP = '2019-09-26T135930'
+FIRST_HOUR = np.datetime64('2019-09-26T10:00:00', 'us')
+FS = 100.
+SAMPLES_PER_HOUR = int(3600 * FS)
+
+
+def writeDataFiles(dataDir, hours, channels):
+    """
+    write miniseed file of each channel and hour and text file of each hour of first channel
+    return: tuple holding list of lists of miniseed paths (one list per channel) and list of text file paths
+    """
+    codes = convert_acc.SENSOR_CODES_WITH_CHANNELS[:channels]
+    pulses = [synthetic.Pulse(FIRST_HOUR + np.timedelta64(hour * 60 + 30, 'm'), 0.01, 2., 10.) for hour in range(hours)]
+    channelFiles = synthetic.writeChannels(dataDir, FIRST_HOUR, hours * 3600, FS, pulses=pulses, channels=codes)
+    txtFiles = synthetic.writeChannels(dataDir, FIRST_HOUR, hours * 3600, FS, pulses=pulses, channels=codes[:1],
+                                       formats=('tspair',))[0]
+    return channelFiles, txtFiles
+
+
+def timeStage(function, repeat):
+    """
+    return dict holding best and median seconds of given number of calls of function and peak memory (MiB) allocated
+    during one more call (measured separately, as tracemalloc slows down allocations)
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'bestSeconds': min(seconds), 'medianSeconds': statistics.median(seconds),
+            'peakMemoryMiB': peak / 1024. ** 2}
+
+
+def benchmarkSize(hours, channels, repeat, approach, workDir):
+    """
+    benchmark all stages for data of given number of hours and channels
+    return: list of dicts holding result of each stage
+    """
+    dataDir = os.path.join(workDir, '{0}h'.format(hours))
+    os.makedirs(dataDir)
+    channelFiles, txtFiles = writeDataFiles(dataDir, hours, channels)
+    codes = convert_acc.SENSOR_CODES_WITH_CHANNELS[:channels]
+    channelSamples = hours * SAMPLES_PER_HOUR
+
+    channelData = [convert_acc.readMiniseedCounts(files) for files in channelFiles]
+
+    def convertAll():
+        return [convert_acc.Conversion.fromCounts(counts, startTime, convert_acc.getSensorCode(code), code,
+                                                  EVENT_TIMESTAMP, fs, approach)
+                for code, (counts, startTime, fs) in zip(codes, channelData)]
+
+    sensitivities = [convert_acc.getSensitivity(code) for code in codes]
+
+    def convertMatrix():
+        conversion = convert_acc.Conversion(None, convert_acc.getSensorCode(codes[0]), codes[0], EVENT_TIMESTAMP,
+                                            channelData[0][2], approach)
+        return conversion.getArrays(np.vstack([counts for counts, _, _ in channelData]), sensitivities)
+
+    conversions = convertAll()
+    channelResults = [c.getResult() for c in conversions]
+    maxValues = getMaxValues(channelResults)
+    # number of samples kept after conversion (time approach drops filter warm-up at head of each record)
+    resultSamples = sum(r.getLength() for r in channelResults)
+
+    def computeAllStats():
+        for c in conversions:
+            for column in convert_acc.Conversion.resultColumns:
+                c.computeStats(column)
+
+    def drawResultsPlots():
+        for column, titleSuffix in zip(convert_acc.Conversion.resultColumns, TITLE_SUFFIXES):
+            holder = FigureHolder(titleSuffix, 14, 20)
+            for r in channelResults:
+                r.plotResultsGraph(holder, column, titleSuffix, maxValues[column] * 1.5)
+            holder.figure.tight_layout()
+            holder.figure.canvas.draw()
+
+    def drawComparisonPlots():
+        yLimit = maxValues['highpassed_displacement_cm'] * 1.25
+        for _, title, corner, direction in COMPARISON_FIGURES:
+            holder = FigureHolder(title, 4, 7)
+            for r in getComparisonChannels(channelResults, corner, direction):
+                r.plotComparisonGraph(holder, yLimit)
+            holder.figure.tight_layout()
+            holder.figure.canvas.draw()
+
+    statsTable = StatsTable(convert_acc.getReadableTimestamp(EVENT_TIMESTAMP))
+    statsColumnNames = statsTable.columnHeaders[-4:]
+    for r in channelResults:
+        for statsColumnName, column in zip(statsColumnNames, convert_acc.Conversion.resultColumns):
+            statsTable.updateStatsDf(r.sensorCodeWithChannel, statsColumnName, r.getStats(column)[2])
+
+    pageImages = []
+    for column, titleSuffix in zip(convert_acc.Conversion.resultColumns, TITLE_SUFFIXES):
+        holder = FigureHolder(titleSuffix, 14, 20)
+        for r in channelResults:
+            r.plotResultsGraph(holder, column, titleSuffix, maxValues[column] * 1.5)
+        pageImages.append(rasterizeFigure(holder.figure))
+
+    def writeResultsPdf():
+        with ReportWriter(os.path.join(dataDir, 'results.pdf')) as report:
+            for image in pageImages:
+                report.addImage(image)
+
+    stages = [
+        ('ingest_tspair', lambda: [convert_acc.readTspair(f) for f in txtFiles], channelSamples),
+        ('ingest_miniseed', lambda: [convert_acc.readMiniseedCounts(files) for files in channelFiles],
+         channelSamples * channels),
+        ('conversion', convertAll, channelSamples * channels),
+        ('conversion_matrix', convertMatrix, channelSamples * channels),
+        ('getStats', computeAllStats, resultSamples),
+        ('results_plots', drawResultsPlots, resultSamples),
+        ('comparison_plots', drawComparisonPlots, resultSamples),
+        ('tableToPdf', lambda: statsTable.tableToPdf(dataDir), None),
+        ('resultsPdf', writeResultsPdf, None),
+    ]
+    results = []
+    for name, function, samples in stages:
+        result = {'stage': name, 'hours': hours, 'channels': channels, 'approach': approach, 'samples': samples}
+        result.update(timeStage(function, repeat))
+        result['samplesPerSecond'] = samples / result['bestSeconds'] if samples else None
+        results.append(result)
+        printResult(result)
+    shutil.rmtree(dataDir)
+    return results
+
+
+def printResult(result):
+    """print result of a stage as one row of table"""
+    throughput = '{0:14,.0f}'.format(result['samplesPerSecond']) if result['samplesPerSecond'] else '{0:>14}'.format('-')
+    print('{0:>5} {1:<18} {2:10.4f} {3:10.4f} {4} {5:10.1f}'.format(
+        '{0}h'.format(result['hours']), result['stage'], result['bestSeconds'], result['medianSeconds'], throughput,
+        result['peakMemoryMiB']))
+
+
+def getParser():
+    """return argparse parser of command line arguments"""
+    parser = argparse.ArgumentParser(prog='python benchmarks/bench_stages.py',
+                                     description='Time processing stages of convert_acc at several data sizes.')
+    parser.add_argument('--hours', type=int, nargs='+', default=[1, 2, 6],
+                        help='data sizes in hours per channel (default: 1 2 6)')
+    parser.add_argument('--channels', type=int, default=24, help='number of channels (default: 24)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs of each stage (default: 3)')
+    parser.add_argument('--approach', choices=convert_acc.Conversion.approaches, default='time',
+                        help='conversion approach (default: time)')
+    parser.add_argument('--json', default=None, help='also write results to json file')
+    return parser
+
+
+def main(argv=None):
+    """
+    Main function of benchmarks.
+    argv: list of strings holding command line arguments (None to use sys.argv)
+    """
+    args = getParser().parse_args(argv)
+    print('{0:>5} {1:<18} {2:>10} {3:>10} {4:>14} {5:>10}'.format(
+        'size', 'stage', 'best (s)', 'median (s)', 'samples/s', 'peak MiB'))
+    workDir = tempfile.mkdtemp(prefix='bench_convert_acc_')
+    try:
+        results = []
+        for hours in args.hours:
+            results.extend(benchmarkSize(hours, args.channels, args.repeat, args.approach, workDir))
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
+    if args.json:
+        environment = {'python': platform.python_version(), 'numpy': np.__version__,
+                       'platform': platform.platform(), 'cpuCount': os.cpu_count()}
+        with open(args.json, 'w') as f:
+            json.dump({'environment': environment, 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
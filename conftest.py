@@ -157,3 +157,43 @@ def cObject():
 	c = convert_acc.Conversion(df, 'B4F', 'B4Fx', '2019-09-26T135930')
 	return c
 
+
+
+@pytest.fixture
+def txtFiles(tmp_path):
+	"""return list holding a list with one text file (copy of test data) for each of channels B4Fz, N39x and B4Fx"""
+	import shutil
+	txtFiles = []
+	for code in ['B4Fz', 'N39x', 'B4Fx']:
+		txtFile = str(tmp_path / '20190926100000.ALZ.001.{0}.txt'.format(code))
+		shutil.copy('test_data/20190926100000.ALZ.001.B4Fx.txt', txtFile)
+		txtFiles.append([txtFile])
+	return txtFiles
+
+
+@pytest.fixture(scope='module')
+def mseedStream():
+	"""return obspy Stream holding test data of B4Fx (read from text file) as int32 counts, ready to be written as miniseed"""
+	from obspy import read
+	stream = read(r'test_data/20190926100000.ALZ.001.B4Fx.txt', format='TSPAIR')
+	stream[0].data = stream[0].data.astype('int32')
+	return stream
+
+
+@pytest.fixture
+def mseedFile(tmp_path, mseedStream):
+	"""return path of miniseed file (STEIM2) holding test data of B4Fx"""
+	mseedFile = str(tmp_path / '20190926100000.ALZ.001.B4Fx.m')
+	mseedStream.write(mseedFile, format='MSEED', encoding='STEIM2')
+	return mseedFile
+
+
+@pytest.fixture
+def eventMiniseedDir(tmp_path, mseedStream):
+	"""return path of directory named by event timestamp holding one miniseed file (from test data) per channel"""
+	eventDir = tmp_path / 'events' / '2019-09-26T135930'
+	eventDir.mkdir(parents=True)
+	for i, code in enumerate(convert_acc.SENSOR_CODES_WITH_CHANNELS):
+		mseedFile = str(eventDir / '20190926100000.ALZ.{0:03d}.{1}.m'.format(i % 3 + 1, code))
+		mseedStream.write(mseedFile, format='MSEED', encoding='STEIM2')
+	return eventDir
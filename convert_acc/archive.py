@@ -0,0 +1,188 @@
+"""
+Memory-mapped archive of channel data.
+
+Each channel has one fixed-layout int32 .npy file per (UTC) day, in which
+sample i is the count recorded at day start + i / fs, and a .json header
+holding the day start time, sampling rate and the ranges of samples written.
+Windows are returned as slices of the memory map, so only the pages of a
+window are read from disk. Samples never written are zero.
+"""
+import os
+import json
+import logging
+
+import numpy as np
+
+
+# microseconds since epoch of numpy datetime64 values are used as absolute times
+EPOCH = np.datetime64(0, 'us')
+
+
+def mergeSegments(segments):
+    """
+    return sorted list of non-overlapping [start, stop) ranges covering given ranges
+    segments: list of [start, stop) ranges of ints
+    """
+    merged = []
+    for start, stop in sorted(segments):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], stop)
+        else:
+            merged.append([start, stop])
+    return merged
+
+
+class ArchiveStore:
+    """Per-channel, per-day memory-mapped archive of counts (see module docstring)."""
+    def __init__(self, archiveDir):
+        """
+        archiveDir: string holding path of archive directory (created if necessary)
+        """
+        self.archiveDir = archiveDir
+        os.makedirs(self.archiveDir, exist_ok=True)
+
+    def getChannelDir(self, sensorCodeWithChannel):
+        """return string holding path of directory holding files of given channel"""
+        return os.path.join(self.archiveDir, sensorCodeWithChannel)
+
+    def getDayPaths(self, sensorCodeWithChannel, day):
+        """
+        return tuple of strings holding paths of .npy and .json files of given channel and day
+        day: int holding number of days since epoch
+        """
+        dayText = str(np.datetime64(day, 'D')).replace('-', '')
+        base = os.path.join(self.getChannelDir(sensorCodeWithChannel), dayText)
+        return base + '.npy', base + '.json'
+
+    def readJson(self, path):
+        """return dict read from json file or None if file does not exist"""
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except OSError:
+            return None
+
+    def writeJson(self, path, data):
+        """write dict to json file (replacing file only once fully written)"""
+        # temporary file of each process (other processes may write same file)
+        tmpPath = '{0}.{1}.tmp'.format(path, os.getpid())
+        with open(tmpPath, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmpPath, path)
+
+    def getChannelHeader(self, sensorCodeWithChannel):
+        """return dict holding sampling rate and archived source files of channel"""
+        path = os.path.join(self.getChannelDir(sensorCodeWithChannel), 'channel.json')
+        return self.readJson(path) or {'fs': None, 'sources': {}}
+
+    def isArchived(self, sensorCodeWithChannel, sourcePath):
+        """return True if unchanged source file has already been added to archive"""
+        stat = os.stat(sourcePath)
+        sources = self.getChannelHeader(sensorCodeWithChannel)['sources']
+        return sources.get(os.path.basename(sourcePath)) == [stat.st_size, stat.st_mtime]
+
+    def setArchived(self, sensorCodeWithChannel, sourcePath):
+        """record source file as added to archive"""
+        stat = os.stat(sourcePath)
+        header = self.getChannelHeader(sensorCodeWithChannel)
+        header['sources'][os.path.basename(sourcePath)] = [stat.st_size, stat.st_mtime]
+        self.writeJson(os.path.join(self.getChannelDir(sensorCodeWithChannel), 'channel.json'), header)
+
+    def getSampleNumber(self, timestamp, fs):
+        """return int holding number of nearest sample since epoch of given numpy datetime64"""
+        return int(round((timestamp - EPOCH).astype('int64') * fs / 1e6))
+
+    def getSampleTime(self, sampleNumber, fs):
+        """return numpy datetime64 of given sample number since epoch"""
+        return EPOCH + np.timedelta64(int(round(sampleNumber * 1e6 / fs)), 'us')
+
+    def getSamplesPerDay(self, fs):
+        """return int holding length of day files for given sampling rate"""
+        return int(round(86400 * fs))
+
+    def addCounts(self, sensorCodeWithChannel, counts, startTime, fs):
+        """
+        write counts into day files of channel (creating day files if necessary)
+        counts: numpy array holding counts
+        startTime: numpy datetime64 holding time of first sample
+        fs: sampling rate (must be same for all data of channel)
+        """
+        os.makedirs(self.getChannelDir(sensorCodeWithChannel), exist_ok=True)
+        header = self.getChannelHeader(sensorCodeWithChannel)
+        if header['fs'] is None:
+            header['fs'] = float(fs)
+            self.writeJson(os.path.join(self.getChannelDir(sensorCodeWithChannel), 'channel.json'), header)
+        elif header['fs'] != fs:
+            raise ValueError('{0}: sampling rate {1} differs from archived rate {2}'.format(
+                sensorCodeWithChannel, fs, header['fs']))
+
+        samplesPerDay = self.getSamplesPerDay(fs)
+        firstSample = self.getSampleNumber(startTime, fs)
+        position = 0
+        while position < len(counts):
+            day, index = divmod(firstSample + position, samplesPerDay)
+            length = min(samplesPerDay - index, len(counts) - position)
+            npyPath, jsonPath = self.getDayPaths(sensorCodeWithChannel, day)
+            dayHeader = self.readJson(jsonPath)
+            if dayHeader is None:
+                dayArray = np.lib.format.open_memmap(npyPath, mode='w+', dtype=np.int32, shape=(samplesPerDay,))
+                dayHeader = {'startTime': str(np.datetime64(day, 'D').astype('datetime64[us]')),
+                             'fs': float(fs), 'segments': []}
+            else:
+                dayArray = np.load(npyPath, mmap_mode='r+')
+            dayArray[index:index + length] = counts[position:position + length]
+            dayArray.flush()
+            del dayArray
+            dayHeader['segments'] = mergeSegments(dayHeader['segments'] + [[index, index + length]])
+            self.writeJson(jsonPath, dayHeader)
+            position += length
+
+    def getWindow(self, sensorCodeWithChannel, startTime, endTime):
+        """
+        return archived samples between given times (inclusive, same as obspy Stream.trim)
+        (slice of memory map if window lies within a single day, otherwise a copy)
+        startTime: numpy datetime64 holding start of window
+        endTime: numpy datetime64 holding end of window
+        return: None if no samples within window are archived, otherwise tuple holding:
+            1. numpy int32 array holding counts (clipped to archived samples, gaps are zeros)
+            2. numpy datetime64 holding time of first sample
+            3. float holding sampling rate
+        """
+        fs = self.getChannelHeader(sensorCodeWithChannel)['fs']
+        if fs is None:
+            return None
+        samplesPerDay = self.getSamplesPerDay(fs)
+        windowStart = self.getSampleNumber(startTime, fs)
+        windowStop = self.getSampleNumber(endTime, fs) + 1
+        firstDay = windowStart // samplesPerDay
+        lastDay = (windowStop - 1) // samplesPerDay
+
+        # archived ranges within window as sample numbers since epoch
+        covered = []
+        for day in range(firstDay, lastDay + 1):
+            dayHeader = self.readJson(self.getDayPaths(sensorCodeWithChannel, day)[1])
+            if dayHeader is None:
+                continue
+            for start, stop in dayHeader['segments']:
+                start = max(start + day * samplesPerDay, windowStart)
+                stop = min(stop + day * samplesPerDay, windowStop)
+                if start < stop:
+                    covered.append([start, stop])
+        covered = mergeSegments(covered)
+        if not covered:
+            return None
+        if len(covered) > 1:
+            logging.warning('gaps in archived {0} data filled with zeros'.format(sensorCodeWithChannel))
+        start, stop = covered[0][0], covered[-1][1]
+
+        parts = []
+        for day in range(start // samplesPerDay, (stop - 1) // samplesPerDay + 1):
+            npyPath = self.getDayPaths(sensorCodeWithChannel, day)[0]
+            dayStart = day * samplesPerDay
+            first, last = max(start, dayStart) - dayStart, min(stop, dayStart + samplesPerDay) - dayStart
+            if os.path.exists(npyPath):
+                parts.append(np.load(npyPath, mmap_mode='r')[first:last])
+            else:
+                parts.append(np.zeros(last - first, dtype=np.int32))
+        counts = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        return counts, self.getSampleTime(start, fs), fs
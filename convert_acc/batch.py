@@ -0,0 +1,282 @@
+"""
+Headless batch conversion of many events in one invocation.
+
+Events are given either by a manifest (csv file with columns 'event' and
+'miniseed_dir'), by a directory holding one subdirectory of miniseed files
+per event, named by event timestamp (ex. '2019-09-26T135930'), or by event
+timestamps whose files are looked up in an index of a miniseed archive (see
+convert_acc.index).
+
+All channels of all events share one pool of worker processes and one cache of
+decoded miniseed data. For each event, <output>/<event>/stats.csv and
+<output>/<event>/summary.json are written (and, with --figures, results.pdf and
+comparison figures rendered in parallel, see convert_acc.render); events whose
+summary.json already exists are skipped. Timing of each stage of the run is
+written to <output>/profile.json (see convert_acc.profiling).
+
+usage: python -m convert_acc.batch (--manifest FILE | --events-dir DIR | --archive DIR --events TIMESTAMP ...) --output DIR
+"""
+import os
+import sys
+import re
+import csv
+import json
+import time
+import logging
+import argparse
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+
+import convert_acc
+from convert_acc import profiling
+from convert_acc.report import StatsTable
+from convert_acc.render import renderEventFigures
+
+
+# progress and failures of events (level set by --log-level, see main - other modules keep level of root logger)
+logger = logging.getLogger(__name__)
+
+# same format as event timestamps entered in PrimaryUI
+EVENT_TIMESTAMP_PATTERN = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{6}')
+
+
+class SerialExecutor:
+    """stand-in for ProcessPoolExecutor which runs jobs in this process (used when workers is 1)"""
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def readManifest(manifestPath):
+    """
+    return list of (event timestamp, miniseed dir) tuples read from manifest
+    manifestPath: string holding path of csv file with columns 'event' and 'miniseed_dir'
+    (relative miniseed dirs are relative to directory of manifest)
+    """
+    baseDir = os.path.dirname(os.path.abspath(manifestPath))
+    with open(manifestPath, newline='') as f:
+        return [(row['event'].strip(), os.path.join(baseDir, row['miniseed_dir'].strip()))
+                for row in csv.DictReader(f) if row['event'].strip()]
+
+
+def findEvents(eventsDir):
+    """
+    return list of (event timestamp, miniseed dir) tuples of subdirectories named by event timestamp
+    eventsDir: string holding path of directory holding one subdirectory per event
+    """
+    events = []
+    for name in sorted(os.listdir(eventsDir)):
+        path = os.path.join(eventsDir, name)
+        if os.path.isdir(path) and EVENT_TIMESTAMP_PATTERN.fullmatch(name):
+            events.append((name, path))
+    return events
+
+
+def getChannelFiles(miniseedDir):
+    """
+    return list holding a sorted list of miniseed file paths for each channel
+    (raises ValueError if miniseed dir does not hold 24 miniseed files per hour, same as PrimaryUI)
+    """
+    mseedFiles = [os.path.join(miniseedDir, f) for f in os.listdir(miniseedDir) if f.endswith('.m')]
+    if not convert_acc.isFileCountValid(len(mseedFiles)):
+        raise ValueError('{0} holds {1} miniseed files (24 per hour expected)'.format(miniseedDir, len(mseedFiles)))
+    return convert_acc.groupFilesByChannel(mseedFiles)
+
+
+def getSummary(eventTimestamp, miniseedDir, channelResults, elapsed, approach='time'):
+    """
+    return dict holding peak values (and their times) of every channel of an event
+    channelResults: list of ChannelResult objects of event
+    elapsed: float holding seconds taken to process event
+    approach: string holding conversion approach used (one of Conversion.approaches)
+    """
+    channels = {}
+    peaks = {}
+    for r in channelResults:
+        channelStats = {}
+        for column in convert_acc.Conversion.resultColumns:
+            stats = r.getPeakStats(column)
+            channelStats[column] = {'peak': stats.value, 'time': stats.time, 'index': stats.index,
+                                    'min': stats.minimum, 'max': stats.maximum, 'mean': stats.mean}
+            if column not in peaks or abs(stats.value) > abs(peaks[column]['peak']):
+                peaks[column] = {'peak': stats.value, 'channel': r.sensorCodeWithChannel}
+        channels[r.sensorCodeWithChannel] = channelStats
+    return {
+        'event': eventTimestamp,
+        'eventUTC': str(convert_acc.timestampToUTC(eventTimestamp)),
+        'miniseedDir': os.path.abspath(miniseedDir) if miniseedDir else None,
+        'approach': approach,
+        'peaks': peaks,
+        'channels': channels,
+        'elapsedSeconds': round(elapsed, 3),
+    }
+
+
+def writeEventOutput(eventDir, summary, channelResults):
+    """
+    write stats table (csv) and summary (json) of event - summary is written last as it marks event done
+    eventDir: string holding path of output directory of event
+    """
+    statsTable = StatsTable(convert_acc.getReadableTimestamp(summary['event']))
+    statsColumnNames = statsTable.columnHeaders[-4:]
+    for r in channelResults:
+        for statsColumnName, column in zip(statsColumnNames, convert_acc.Conversion.resultColumns):
+            statsTable.updateStatsDf(r.sensorCodeWithChannel, statsColumnName, r.getStats(column)[2])
+    statsTable.df.to_csv(os.path.join(eventDir, 'stats.csv'), index=False)
+
+    summaryPath = os.path.join(eventDir, 'summary.json')
+    with open(summaryPath + '.tmp', 'w') as f:
+        json.dump(summary, f, indent=2)
+    os.replace(summaryPath + '.tmp', summaryPath)
+    profiling.countFiles('written', [os.path.join(eventDir, 'stats.csv'), summaryPath])
+
+
+def processEvents(events, outputDir, workers=None, cacheDir=None, force=False, eventsInFlight=2, approach='time',
+                  figures=False, index=None):
+    """
+    convert all channels of all given events with one shared pool of worker processes
+    events: list of (event timestamp, miniseed dir) tuples (miniseed dir is None if files are found in index)
+    outputDir: string holding path of directory in which a directory is written for each event
+    workers: int holding number of worker processes (None to use all cores, 1 to convert in this process)
+    cacheDir: string holding path of cache directory of decoded miniseed data (None to disable cache)
+    force: bool - if True, events already done are processed again
+    eventsInFlight: int holding number of events whose channels are queued at once (keeps pool busy
+        between events while bounding memory held by results)
+    approach: string holding conversion approach (one of Conversion.approaches)
+    figures: bool - if True, results and comparison figures of each event are rendered too
+    index: MiniseedIndex object in which miniseed files of events are looked up (None to list miniseed dirs)
+    return: dict holding lists of event timestamps keyed by 'done', 'skipped' and 'failed'
+    """
+    report = {'done': [], 'skipped': [], 'failed': []}
+    if workers == 1:
+        executor = SerialExecutor()
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+    def finish(eventTimestamp, miniseedDir, futures, startTime):
+        try:
+            with profiling.span('waitChannels', event=eventTimestamp):
+                channelResults = [profiling.unwrapResult(f.result(), profiled) for f in futures]
+            eventDir = os.path.join(outputDir, eventTimestamp)
+            if figures:
+                # figures are rendered by shared pool too (a pool of their own would compete for the same cores)
+                with profiling.span('renderFigures', event=eventTimestamp):
+                    renderEventFigures(channelResults, eventDir, executor=executor)
+            summary = getSummary(eventTimestamp, miniseedDir, channelResults, time.time() - startTime, approach)
+            with profiling.span('writeEventOutput', event=eventTimestamp):
+                writeEventOutput(eventDir, summary, channelResults)
+        except Exception as e:
+            logger.error('{0}: {1}'.format(eventTimestamp, e))
+            report['failed'].append(eventTimestamp)
+            return
+        logger.info('{0}: done'.format(eventTimestamp))
+        report['done'].append(eventTimestamp)
+
+    # spans recorded in worker processes are returned along with results when profiling
+    profiled = profiling.isEnabled()
+    convertFunction = profiling.wrapForWorker(convert_acc.convertChannelFiles)
+    with executor:
+        pending = deque()
+        for eventTimestamp, miniseedDir in events:
+            eventDir = os.path.join(outputDir, eventTimestamp)
+            if not force and os.path.exists(os.path.join(eventDir, 'summary.json')):
+                report['skipped'].append(eventTimestamp)
+                continue
+            try:
+                if index is not None:
+                    channelFiles = index.getEventChannelFiles(eventTimestamp)
+                else:
+                    channelFiles = getChannelFiles(miniseedDir)
+                os.makedirs(eventDir, exist_ok=True)
+            except (OSError, ValueError) as e:
+                logger.error('{0}: {1}'.format(eventTimestamp, e))
+                report['failed'].append(eventTimestamp)
+                continue
+            futures = [executor.submit(convertFunction, files, eventTimestamp, cacheDir, None, approach)
+                       for files in channelFiles]
+            pending.append((eventTimestamp, miniseedDir, futures, time.time()))
+            while len(pending) >= eventsInFlight:
+                finish(*pending.popleft())
+        while pending:
+            finish(*pending.popleft())
+    return report
+
+
+def getParser():
+    """return argparse parser of command line arguments"""
+    parser = argparse.ArgumentParser(prog='python -m convert_acc.batch',
+                                     description='Convert acceleration data of many events without the GUI.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--manifest', help="csv file with columns 'event' and 'miniseed_dir'")
+    source.add_argument('--events-dir', help='directory holding one miniseed directory per event, named by event timestamp')
+    source.add_argument('--archive', help='root directory of miniseed archive in which files of --events are looked up')
+    parser.add_argument('--events', nargs='+', default=[], help='event timestamps (with --archive)')
+    parser.add_argument('--index-db', default=None,
+                        help='SQLite index of archive, updated before lookup (default: <output>/archive_index.sqlite)')
+    parser.add_argument('--output', required=True, help='directory in which results of each event are written')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes (default: all cores)')
+    parser.add_argument('--cache-dir', default=None, help='cache of decoded miniseed data (default: <output>/cache)')
+    parser.add_argument('--no-cache', action='store_true', help='always decode miniseed files')
+    parser.add_argument('--force', action='store_true', help='process events already done again')
+    parser.add_argument('--approach', choices=convert_acc.Conversion.approaches, default='time',
+                        help='conversion approach (default: time)')
+    parser.add_argument('--figures', action='store_true', help='also render results.pdf and comparison figures of each event')
+    parser.add_argument('--no-profile', action='store_true', help='do not write timing of stages to <output>/profile.json')
+    parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], default='INFO',
+                        help='level of messages on progress of events (default: INFO, WARNING shows failures only)')
+    return parser
+
+
+def main(argv=None):
+    """
+    Main function of batch conversion.
+    argv: list of strings holding command line arguments (None to use sys.argv)
+    return: int holding exit status (1 if any event failed)
+    """
+    parser = getParser()
+    args = parser.parse_args(argv)
+    # messages are written to stderr (root handler, format of convert_acc.core)
+    logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s')
+    logger.setLevel(args.log_level)
+    if args.archive and not args.events:
+        parser.error('--archive requires --events')
+    os.makedirs(args.output, exist_ok=True)
+    index = None
+    if args.manifest:
+        events = readManifest(args.manifest)
+    elif args.events_dir:
+        events = findEvents(args.events_dir)
+    else:
+        from convert_acc.index import MiniseedIndex
+        index = MiniseedIndex(args.index_db or os.path.join(args.output, 'archive_index.sqlite'))
+        index.scan(args.archive)
+        events = [(eventTimestamp, None) for eventTimestamp in args.events]
+    cacheDir = None if args.no_cache else (args.cache_dir or os.path.join(args.output, 'cache'))
+
+    if not args.no_profile:
+        profiling.enable('batch')
+    try:
+        report = processEvents(events, args.output, args.workers, cacheDir, args.force, approach=args.approach,
+                               figures=args.figures, index=index)
+    finally:
+        profile = profiling.disable()
+        if profile is not None:
+            profile.write(os.path.join(args.output, 'profile.json'))
+    logger.info('{0} done, {1} skipped, {2} failed'.format(
+        len(report['done']), len(report['skipped']), len(report['failed'])))
+    return 1 if report['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
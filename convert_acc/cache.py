@@ -0,0 +1,135 @@
+"""
+On-disk cache of decoded channel data.
+
+Entries are keyed by the content hash of the source files and the trim window,
+so re-processing an event skips miniseed decoding entirely. Each entry is a
+.npy file holding counts (loaded memory-mapped) and a .json file holding
+metadata. Least recently used entries are evicted once the cache grows beyond
+its size limit.
+"""
+import os
+import json
+import hashlib
+import logging
+
+import numpy as np
+
+
+# default size limit of cache (1 GiB holds decoded windows of several hundred events)
+DEFAULT_MAX_BYTES = 1024 ** 3
+
+
+def getFileHash(path, blockSize=1 << 20):
+    """
+    return sha1 hex digest of file contents
+    path: string holding path of file
+    blockSize: int holding number of bytes read at a time
+    """
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(blockSize), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class CountCache:
+    """Content-addressed cache of decoded counts (see module docstring)."""
+    def __init__(self, cacheDir, maxBytes=DEFAULT_MAX_BYTES):
+        """
+        cacheDir: string holding path of cache directory (created if necessary)
+        maxBytes: int holding size limit of cache in bytes
+        """
+        self.cacheDir = cacheDir
+        self.maxBytes = maxBytes
+        os.makedirs(self.cacheDir, exist_ok=True)
+
+    def getKey(self, sourcePaths, startTime=None, endTime=None):
+        """
+        return key of entry made from contents of source files and trim window
+        sourcePaths: list of strings holding paths of source (ex. miniseed) files
+        startTime: start of window (anything with str() representation, None if untrimmed)
+        endTime: end of window (anything with str() representation, None if untrimmed)
+        """
+        h = hashlib.sha1()
+        for path in sorted(sourcePaths):
+            h.update(getFileHash(path).encode())
+        h.update('{0}|{1}'.format(startTime, endTime).encode())
+        return h.hexdigest()
+
+    def getPaths(self, key):
+        """return tuple of strings holding paths of .npy and .json files of entry"""
+        base = os.path.join(self.cacheDir, key)
+        return base + '.npy', base + '.json'
+
+    def load(self, key):
+        """
+        return cached entry (and mark it as recently used) or None if key is not cached
+        return: tuple holding:
+            1. read-only memory-mapped numpy array holding counts
+            2. numpy datetime64 holding time of first sample
+            3. float holding sampling rate
+        """
+        npyPath, jsonPath = self.getPaths(key)
+        try:
+            with open(jsonPath) as f:
+                meta = json.load(f)
+            counts = np.load(npyPath, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        # mtime of .npy file records last use for eviction
+        os.utime(npyPath, None)
+        return counts, np.datetime64(meta['startTime']), meta['fs']
+
+    def store(self, key, counts, startTime, fs):
+        """
+        store entry in cache and evict least recently used entries if cache is too large
+        counts: numpy array holding counts
+        startTime: numpy datetime64 holding time of first sample
+        fs: sampling rate
+        """
+        npyPath, jsonPath = self.getPaths(key)
+        meta = {'startTime': str(startTime), 'fs': float(fs), 'sampleCount': len(counts),
+                'dtype': str(counts.dtype)}
+        # write to temporary files and rename so other processes never see partial entries
+        tmpSuffix = '.{0}.tmp'.format(os.getpid())
+        with open(npyPath + tmpSuffix, 'wb') as f:
+            np.save(f, counts)
+        with open(jsonPath + tmpSuffix, 'w') as f:
+            json.dump(meta, f)
+        os.replace(jsonPath + tmpSuffix, jsonPath)
+        os.replace(npyPath + tmpSuffix, npyPath)
+        self.evict()
+
+    def getEntries(self):
+        """return list of tuples (last use, bytes, key) of entries in cache, least recently used first"""
+        entries = []
+        for name in os.listdir(self.cacheDir):
+            if not name.endswith('.npy'):
+                continue
+            key = name[:-4]
+            try:
+                size = sum(os.path.getsize(p) for p in self.getPaths(key))
+                entries.append((os.path.getmtime(self.getPaths(key)[0]), size, key))
+            except OSError:
+                # entry removed by another process
+                continue
+        return sorted(entries)
+
+    def getSize(self):
+        """return int holding total bytes of entries in cache"""
+        return sum(e[1] for e in self.getEntries())
+
+    def evict(self):
+        """remove least recently used entries until cache is within size limit"""
+        entries = self.getEntries()
+        total = sum(e[1] for e in entries)
+        for _, size, key in entries:
+            if total <= self.maxBytes:
+                break
+            for path in self.getPaths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+            logging.debug('evicted {0} from cache'.format(key))
@@ -0,0 +1,1544 @@
+# Filename: core.py
+
+"""
+Conversion of accelerometer data to velocity and displacement (processing core of convert_acc).
+Imports only numpy at module level - scipy, obspy, pandas and matplotlib are imported by the
+functions needing them, so the core can be used without GUI, display stack or pdf libraries.
+"""
+import sys
+import os
+import copy
+import logging
+from functools import partial
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+
+import numpy as np
+
+from convert_acc import profiling
+from convert_acc.cache import CountCache
+from convert_acc.archive import ArchiveStore
+
+ERROR_MSG = 'ERROR'
+
+# set logging to 'DEBUG' to print debug statements to console
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+"""
+General Notes:
+use camelCase throughout as Qt uses it
+
+"""
+
+SENSOR_CODES = ('N39', 'S39', 'N24', 'S24', 'N12', 'S12', 'B4F', 'FF')
+
+# in order of those on page 5 of third-party report          
+SENSOR_CODES_WITH_CHANNELS = [
+                            'N39x',
+                            'N39y',
+                            'N39z',
+                            'S39x',
+                            'S39y',
+                            'S39z',
+                            'N24x',
+                            'N24y',
+                            'N24z',
+                            'S24x',
+                            'S24y',
+                            'S24z',
+                            'N12x',
+                            'N12y',
+                            'N12z',
+                            'S12x',
+                            'S12y',
+                            'S12z',
+                            'B4Fx',                             
+                            'B4Fy',
+                            'B4Fz',
+                            'FFN',
+                            'FFW',
+                            'FFZ'
+                            ]
+
+
+def getSensorCodeInfo(inputFile):
+    """
+    Return strings holding sensor code only and sensor code with channel
+    In far field cases, these will be identical ('FFW', 'FFN', 'FFZ')
+    inputFile: string holding either filename or path of .txt or .m file
+    return: tuple of strings holding sensor code info ex. ('B4F', 'B4Fx')
+    """
+    # get string holding file extension - either 'txt' or 'm' (without dot)
+    inputFileExt = inputFile.split('.')[-1]
+    inputFileBase = inputFile.split('.' + inputFileExt)[0]
+    # info in filenames are separated by dots
+    sensorCodeWithChannel = inputFileBase.rsplit('.')[-1]
+
+    lastLetter = sensorCodeWithChannel[-1]
+    if lastLetter.islower():
+        sensorCode = sensorCodeWithChannel[:-1]
+    else:
+        sensorCode = sensorCodeWithChannel
+
+    return sensorCode, sensorCodeWithChannel
+
+
+def getSensorCode(sensorCodeWithChannel):
+    """
+    Return string holding sensor code only ex. 'B4F' from 'B4Fx'
+    (far field sensor codes 'FFW', 'FFN', 'FFZ' have no lowercase channel letter and are returned as is)
+    """
+    if sensorCodeWithChannel[-1].islower():
+        return sensorCodeWithChannel[:-1]
+    return sensorCodeWithChannel
+
+
+def getFloor(sensorCodeText):
+    """
+    Return string holding only floor portion (only digits) of sensor code
+    sensorCodeText: string holding either sensor code or sensor code with channel
+    """
+    floorChars = [c for c in sensorCodeText if c.isdigit()]
+    floor = ''.join(floorChars)
+    return floor
+
+
+def getSensitivity(sensorCodeWithChannel):
+    """
+    return float holding sensitivity in V/g based on given sensorCode
+    sensorCodeWithChannel: string of form 'B4Fx'
+    """
+    groundFloorSensorCodes = [c for c in SENSOR_CODES_WITH_CHANNELS if 'F' in c]
+    upperFloorSensorCodes = [c for c in SENSOR_CODES_WITH_CHANNELS if 'F' not in c]
+    if sensorCodeWithChannel in groundFloorSensorCodes:
+        return 1.25
+    elif sensorCodeWithChannel in upperFloorSensorCodes:
+        return 0.625
+    else:
+        raise ValueError('Sensitivity must contain non-null value.')
+
+
+def getFloorCode(sensorCodeText):
+    """
+    Return string holding floor code.
+    Sample input: 'N39x'
+    Sample ouput: 'L40'
+    """
+    if sensorCodeText[0] == 'F':
+        return 'GF'
+    elif sensorCodeText[0] in ['N', 'S']:
+        letter = 'L'
+        numeric = str(int(getFloor(sensorCodeText)) + 1)
+    elif sensorCodeText[0] == 'B':
+        letter = 'B'
+        numeric = getFloor(sensorCodeText)
+    return letter + numeric
+
+
+def getAxis(sensorCodeWithChannel):
+    """
+    return upper case version of axis: 'X', 'Y', or 'Z'
+    """
+    lastLetter = sensorCodeWithChannel[-1]
+    if lastLetter in ['x', 'y', 'z']:
+        return lastLetter.upper()
+    else:
+        dirDict = {'N': 'X', 'W': 'Y', 'Z': 'Z'}
+        return dirDict[lastLetter]
+
+
+def getTimeText(inputFile):
+    """
+    Get hour (int) and full timestamp (string) from given miniseed or text file name.
+    inputFile: string holding either filename or path of .txt or .m file
+    return:
+    tuple in form: (int holding hour between 0-23, string holding full timestamp)
+    ex. (10, '20190926100000')
+    """
+    filename = inputFile.split('/')[-1]
+    timestampText = filename.split('.')[0]
+    UTCHour = timestampText[8:10]
+    return (UTCHour, timestampText)
+
+
+def sortFilesBySensorCode(inputFileList):
+    """
+    Sort given list of files alphabetically by sensor code.
+    inputFileList: list of strings holding filenames (or paths?) of miniseed or text files.
+    return: list of files sorted by sensor code (according to order of SENSOR_CODES).
+    """
+    sortedList = []
+    for code in SENSOR_CODES:
+        fileGroup = [f for f in inputFileList if code in f]
+        sortedFileGroup = sorted(fileGroup)
+        sortedList += sortedFileGroup
+    return sortedList
+
+
+def sortFiles(inputFileList):
+    """
+    Sort given list of files according to order in third-party report (files of each hour in turn, any number of hours).
+    inputFileList: list of strings holding filenames or full paths of miniseed or text files.
+    return: sorted list of input text files
+    """
+    # full timestamps (YYYYMMDDHHMMSS) sort in order of time, also across midnight
+    timestampTexts = sorted(set(getTimeText(f)[1] for f in inputFileList))
+    sortedList = []
+    for timestampText in timestampTexts:
+        sortedList += sortFilesBySensorCode([f for f in inputFileList if getTimeText(f)[1] == timestampText])
+    return sortedList
+
+
+def isFileCountValid(fileCount):
+    """
+    return True if given number of miniseed or text files may hold all channels (one file per channel and hour,
+    any number of hours ex. 24 or 48)
+    """
+    return fileCount > 0 and fileCount % len(SENSOR_CODES_WITH_CHANNELS) == 0
+
+
+def getReadableTimestamp(eventTimestamp):
+    """return string holding readable version of timestamp"""
+    import pandas as pd
+    eventTimestamp = pd.Timestamp(eventTimestamp)
+    eventTimestampReadable = eventTimestamp.strftime('%m/%d/%y %H:%M:%S')
+    return eventTimestampReadable
+
+
+def getResourcePath(relativePath):
+    """ 
+    Get absolute path to resource, works for dev and for PyInstaller 
+    relativePath: string holding relative path of file whose absolute path will be returned
+    return: string holding absolute path of given file
+    """
+    try:
+        # PyInstaller creates a temp folder and stores path in _MEIPASS
+        basePath = sys._MEIPASS
+    except Exception:
+        basePath = os.path.abspath("./convert_acc")
+
+    return os.path.join(basePath, relativePath)
+
+
+def getDatetime64(timestamp):
+    """
+    return numpy datetime64 (microsecond precision) from given timestamp
+    timestamp: string ex. '2019-09-26T10:58:30.000000', datetime, or obspy UTCDateTime object
+    """
+    # UTCDateTime objects hold python datetime in attribute 'datetime'
+    timestamp = getattr(timestamp, 'datetime', timestamp)
+    return np.datetime64(timestamp, 'us')
+
+
+def getTimestamps(startTime, fs, sampleIndexes, sampleCount):
+    """
+    return timestamps of given samples rebuilt from time of first sample and sampling frequency
+    startTime: numpy datetime64 holding time of first sample (index 0)
+    fs: sampling frequency
+    sampleIndexes: numpy array of ints holding indexes of samples
+    sampleCount: int holding number of samples in data (timestamps of samples outside data will be None)
+    return: numpy object array holding strings in format '2019-09-26T10:58:30.010000' (or None)
+    """
+    offsets = np.round(sampleIndexes * (1e6 / fs)).astype('timedelta64[us]')
+    timestamps = np.datetime_as_string(startTime + offsets, unit='us').astype(object)
+    timestamps[(sampleIndexes < 0) | (sampleIndexes >= sampleCount)] = None
+    return timestamps
+
+
+def timestampToUTC(eventTimestamp):
+    """
+    convert event timestamp from local Turkish time to UTC
+    (will need to be edited if Turkey re-institutes daylight savings time,
+    apparently DST is not expected for UTC at least through 2029)
+    eventTimestamp: string holding event timestamp in local Turkish time (entered by user)
+    return: UTCDateTime object holding timestamp in UTC
+    """
+    from obspy import UTCDateTime
+    eventTimestamp = UTCDateTime(eventTimestamp)
+    # subtract 3 hours from timestamp in local Turkish time (10800 seconds)
+    eventTimestampUTC = eventTimestamp - 10800
+    return eventTimestampUTC
+
+
+def getWindowBounds(eventTimestamp):
+    """
+    return start and end timestamps to be used as window boundaries
+    eventTimestamp: UTCDateTime object holding timestamp in UTC
+    return: tuple of UTCDateTime objects holding start and end times in UTC
+    """
+    startTime = eventTimestamp - 60
+    endTime = startTime + 400
+    return (startTime, endTime)
+
+
+# gap or overlap between consecutive segments of a channel (see stitchSegments)
+# kind: string holding 'gap' or 'overlap'
+# time: numpy datetime64 holding time at which gap or overlap starts
+# sampleCount: int holding number of samples missing (gap) or given twice (overlap)
+SegmentIssue = namedtuple('SegmentIssue', ['kind', 'time', 'sampleCount'])
+
+
+def stitchSegments(segments, label=''):
+    """
+    join segments of a single channel (ex. hourly files, any number of them) into one preallocated array, placing
+    each segment by its start time - gaps are filled with zeros and samples overlapping earlier segments are dropped
+    (gaps and overlaps are logged as warnings)
+    segments: list of tuples (counts, startTime, fs) in any order - counts: 1-d array, startTime: time of first sample
+        (string, datetime, numpy datetime64 or UTCDateTime object), fs: sampling rate
+    label: string naming data in warnings (ex. sensor code with channel)
+    return: tuple holding:
+        1. numpy int32 array holding counts
+        2. numpy datetime64 holding time of first sample
+        3. float holding sampling rate
+        4. list of SegmentIssue records (in order of time)
+    """
+    if not segments:
+        raise ValueError('no data to stitch{0}'.format(' of ' + label if label else ''))
+    segments = sorted(((counts, getDatetime64(startTime), float(fs)) for counts, startTime, fs in segments),
+                      key=lambda segment: segment[1])
+    startTime, fs = segments[0][1], segments[0][2]
+    if any(segment[2] != fs for segment in segments):
+        raise ValueError('sampling rates of {0} differ: {1}'.format(label, sorted(set(s[2] for s in segments))))
+
+    def getSampleTime(position):
+        return startTime + np.timedelta64(int(round(position * 1e6 / fs)), 'us')
+
+    # position of first sample of each segment within stitched array
+    offsets = [int(round((segmentStart - startTime) / np.timedelta64(1, 'us') * fs / 1e6))
+               for _, segmentStart, _ in segments]
+    counts = np.empty(max(offset + len(s[0]) for offset, s in zip(offsets, segments)), dtype=np.int32)
+    issues = []
+    position = 0
+    for offset, (segmentCounts, _, _) in zip(offsets, segments):
+        skip = 0
+        if offset > position:
+            counts[position:offset] = 0
+            issues.append(SegmentIssue('gap', getSampleTime(position), offset - position))
+        elif offset < position:
+            skip = min(position - offset, len(segmentCounts))
+            issues.append(SegmentIssue('overlap', getSampleTime(offset), skip))
+        if offset + len(segmentCounts) > position:
+            counts[offset + skip:offset + len(segmentCounts)] = segmentCounts[skip:]
+            position = offset + len(segmentCounts)
+
+    for issue in issues:
+        logging.warning('{0}: {1} of {2} samples at {3}{4}'.format(
+            label, issue.kind, issue.sampleCount, issue.time, ' (filled with zeros)' if issue.kind == 'gap' else ''))
+        profiling.count('segment{0}s'.format(issue.kind.capitalize()))
+    return counts, startTime, fs, issues
+
+
+def readMiniseedCounts(mseedPaths, startTime=None, endTime=None):
+    """
+    read miniseed files of a single channel straight into memory (no text files are written)
+    mseedPaths: list of strings holding paths of miniseed files (one per hour, any number of hours) of a single channel
+    startTime: UTCDateTime object holding start of window (None to keep all data)
+    endTime: UTCDateTime object holding end of window (None to keep all data)
+    return: tuple holding:
+        1. numpy int32 array holding counts (traces stitched by stitchSegments)
+        2. UTCDateTime object holding time of first sample
+        3. float holding sampling rate
+    """
+    from obspy import read, Stream, UTCDateTime
+    profiling.countFiles('read', mseedPaths)
+    stream = Stream()
+    with profiling.span('decodeMiniseed', files=len(mseedPaths)):
+        for path in mseedPaths:
+            stream += read(path)
+        stream.trim(startTime, endTime)
+    traces = [trace for trace in stream if trace.stats.npts]
+    if not traces:
+        raise ValueError('no data in {0} within {1} - {2}'.format(mseedPaths, startTime, endTime))
+    # join hourly traces of channel into a single array
+    counts, firstSampleTime, fs, _ = stitchSegments(
+        [(trace.data, trace.stats.starttime, trace.stats.sampling_rate) for trace in traces],
+        getSensorCodeInfo(mseedPaths[0])[1])
+    return counts, UTCDateTime(str(firstSampleTime)), fs
+
+
+def readTspairHeader(headerLine):
+    """
+    return metadata given in header line of TSPAIR text file
+    headerLine: string ex. 'TIMESERIES AT_ALZ__B4F_D, 9001 samples, 100 sps, 2019-09-26T10:58:30.000000, TSPAIR, INTEGER, '
+    return: tuple holding:
+        1. int holding number of samples
+        2. float holding sampling rate
+        3. numpy datetime64 holding time of first sample
+    """
+    fields = [f.strip() for f in headerLine.split(',')]
+    if len(fields) < 5 or not fields[0].startswith('TIMESERIES') or fields[4] != 'TSPAIR':
+        raise ValueError('not a TSPAIR header: {0}'.format(headerLine.strip()))
+    sampleCount = int(fields[1].split()[0])
+    fs = float(fields[2].split()[0])
+    startTime = getDatetime64(fields[3])
+    return sampleCount, fs, startTime
+
+
+def readTspair(txtFilePath):
+    """
+    read counts of TSPAIR text file (written by obspy) into int32 array
+    (timestamp column is skipped, timestamps can be rebuilt with getTimestamps)
+    txtFilePath: string holding path of text file
+    return: tuple holding:
+        1. numpy int32 array holding counts
+        2. numpy datetime64 holding time of first sample
+        3. float holding sampling rate
+    """
+    profiling.countFiles('read', [txtFilePath])
+    with profiling.span('parseTxtFile'), open(txtFilePath) as f:
+        sampleCount, fs, startTime = readTspairHeader(f.readline())
+        counts = np.loadtxt(f, usecols=1, dtype=np.int32, max_rows=sampleCount, ndmin=1)
+    if len(counts) != sampleCount:
+        logging.warning('{0}: header gives {1} samples, {2} read'.format(txtFilePath, sampleCount, len(counts)))
+    return counts, startTime, fs
+
+
+def archiveMiniseedFiles(mseedPaths, archive):
+    """
+    add miniseed files not yet held in archive (files already added are not decoded again)
+    mseedPaths: list of strings holding paths of miniseed files
+    archive: ArchiveStore object
+    """
+    from obspy import read
+    for path in mseedPaths:
+        sensorCodeWithChannel = getSensorCodeInfo(path)[1]
+        if archive.isArchived(sensorCodeWithChannel, path):
+            continue
+        profiling.countFiles('read', [path])
+        with profiling.span('archiveMiniseed', channel=sensorCodeWithChannel):
+            for trace in read(path):
+                archive.addCounts(sensorCodeWithChannel, trace.data.astype(np.int32),
+                                  getDatetime64(trace.stats.starttime), trace.stats.sampling_rate)
+        archive.setArchived(sensorCodeWithChannel, path)
+
+
+def getArchivedCounts(mseedPaths, startTime, endTime, archiveDir):
+    """
+    return window of counts of a single channel from archive (miniseed files are added to archive first
+    if necessary)
+    mseedPaths: list of strings holding paths of miniseed files (one per hour) of a single channel
+    startTime: UTCDateTime object holding start of window
+    endTime: UTCDateTime object holding end of window
+    archiveDir: string holding path of archive directory
+    return: tuple holding:
+        1. numpy int32 array holding counts (slice of memory map)
+        2. numpy datetime64 holding time of first sample
+        3. float holding sampling rate
+    """
+    archive = ArchiveStore(archiveDir)
+    archiveMiniseedFiles(mseedPaths, archive)
+    with profiling.span('readArchive'):
+        window = archive.getWindow(getSensorCodeInfo(mseedPaths[0])[1], getDatetime64(startTime),
+                                   getDatetime64(endTime))
+    if window is None:
+        raise ValueError('no data of {0} within {1} - {2}'.format(mseedPaths, startTime, endTime))
+    return window
+
+
+def getMiniseedCounts(mseedPaths, startTime=None, endTime=None, cacheDir=None, archiveDir=None):
+    """
+    return counts of a single channel from archive or cache if given, otherwise read them with
+    readMiniseedCounts (and store them in cache)
+    cacheDir: string holding path of cache directory (None to always decode miniseed files)
+    archiveDir: string holding path of archive directory (takes precedence over cacheDir)
+    return: tuple holding:
+        1. numpy int32 array holding counts (read-only memory map if loaded from cache or archive)
+        2. numpy datetime64 holding time of first sample
+        3. float holding sampling rate
+    """
+    if archiveDir is not None:
+        return getArchivedCounts(mseedPaths, startTime, endTime, archiveDir)
+    if cacheDir is None:
+        counts, firstSampleTime, fs = readMiniseedCounts(mseedPaths, startTime, endTime)
+        return counts, getDatetime64(firstSampleTime), fs
+    cache = CountCache(cacheDir)
+    with profiling.span('loadCache'):
+        key = cache.getKey(mseedPaths, startTime, endTime)
+        entry = cache.load(key)
+    if entry is None:
+        profiling.count('cacheMisses')
+        counts, firstSampleTime, fs = readMiniseedCounts(mseedPaths, startTime, endTime)
+        entry = (counts, getDatetime64(firstSampleTime), fs)
+        with profiling.span('storeCache'):
+            cache.store(key, *entry)
+        profiling.countFiles('written', cache.getPaths(key))
+    else:
+        profiling.count('cacheHits')
+        profiling.countFiles('read', cache.getPaths(key))
+    return entry
+
+
+def groupFilesByChannel(inputFileList):
+    """
+    Group given files by channel.
+    inputFileList: list of strings holding filenames or full paths of miniseed or text files.
+    return: list holding a sorted list of files for each channel (in order of SENSOR_CODES_WITH_CHANNELS)
+    """
+    channelFiles = []
+    for c in SENSOR_CODES_WITH_CHANNELS:
+        files = sorted([f for f in inputFileList if getSensorCodeInfo(f)[1] == c])
+        if files:
+            channelFiles.append(files)
+    return channelFiles
+
+
+def integrateArray(inputData, dt, rule='trapezoid', axis=-1):
+    """
+    Return cumulative integral of given data (first value of integral is always 0)
+    Works on whole arrays so many channels can be integrated in one call.
+    inputData: numpy array (1-d for one channel or 2-d with channels along leading axis) or pandas series
+    dt: float holding time between samples in seconds
+    rule: string holding 'trapezoid' or 'cumsum' (rectangle rule using left-hand samples)
+    axis: int holding axis along which to integrate (time axis)
+    return: numpy array of same shape as inputData (or pandas series if inputData is a series)
+    """
+    data = np.asarray(inputData, dtype=np.float64)
+    data = np.moveaxis(data, axis, -1)
+    integrated = np.empty(data.shape, dtype=np.float64)
+    integrated[..., :1] = 0.
+    if rule == 'trapezoid':
+        # same operations as dt * (z[0] + z[1]) / 2. applied to each pair of samples
+        increments = np.add(data[..., :-1], data[..., 1:])
+        increments *= dt
+        increments /= 2.
+    elif rule == 'cumsum':
+        increments = data[..., :-1] * dt
+    else:
+        raise ValueError('Integration rule must be either "trapezoid" or "cumsum".')
+    np.cumsum(increments, axis=-1, out=integrated[..., 1:])
+    integrated = np.moveaxis(integrated, -1, axis)
+
+    # input can only be a pandas series if pandas has already been imported
+    pd = sys.modules.get('pandas')
+    if pd is not None and isinstance(inputData, pd.Series):
+        return pd.Series(integrated, index=inputData.index)
+    return integrated
+
+
+def integrateChunk(chunk, dt, carry=None):
+    """
+    Return cumulative integral of chunk of data continuing integral of previous chunk (trapezoid rule)
+    chunk: 1-d numpy array holding data
+    dt: float holding time between samples in seconds
+    carry: tuple holding last sample and last integral value of previous chunk (None for first chunk)
+    return: tuple holding numpy array holding integral and carry to be given with next chunk
+    """
+    if not len(chunk):
+        return np.empty(0), carry
+    if carry is None:
+        integrated = integrateArray(chunk, dt)
+    else:
+        # integrate from last sample of previous chunk and drop its (already emitted) value
+        integrated = integrateArray(np.concatenate(([carry[0]], chunk)), dt)[1:]
+        integrated += carry[1]
+    return integrated, (chunk[-1], integrated[-1])
+
+
+def getPaddedArray(inputData, padLength, fillValue=0., dtype=np.float64):
+    """
+    Return copy of given data with pad of given length added to both head and tail (along last axis)
+    (data is written into a single preallocated buffer)
+    inputData: array-like holding data to be padded
+    padLength: int holding number of samples in each pad
+    fillValue: value used for padded samples (0. for data, None for timestamps)
+    dtype: numpy dtype of returned array
+    return: numpy array with padded data
+    """
+    data = np.asarray(inputData)
+    sampleCount = data.shape[-1]
+    padded = np.full(data.shape[:-1] + (sampleCount + 2 * padLength,), fillValue, dtype=dtype)
+    padded[..., padLength:padLength + sampleCount] = data
+    return padded
+
+
+def getButterCoefficients(filterType, order, fs, lowcut, highcut):
+    """
+    return bandpass or highpass filter coefficients...
+    from https://scipy-cookbook.readthedocs.io/items/ButterworthBandpass.html
+    filterType: string holding 'band' or 'high'
+    return:
+        b: numerator of filter
+        a: denominator of filter
+    """
+    from scipy.signal import butter
+    nyq = 0.5 * fs
+    low = lowcut / nyq
+    high = highcut / nyq
+    if filterType == 'band':
+        b, a = butter(order, [low, high], btype='band')
+    elif filterType == 'high':
+        b, a = butter(order, low, btype='high')
+    logging.info('butterworth coefficients - b: {0}, a: {1}'.format(b, a))
+    return b, a
+
+
+# bank of Butterworth filters shared by all conversions of a process
+# (each filter is designed once, in second-order sections, and applied with sosfilt)
+class FilterBank:
+    def __init__(self):
+        # second-order sections keyed by (filterType, order, fs, lowcut, highcut)
+        self.filters = {}
+
+    def getSos(self, filterType, order, fs, lowcut, highcut):
+        """
+        return second-order sections of bandpass or highpass filter (designed on first request only)
+        filterType: string holding 'band' or 'high'
+        return: numpy array of shape (number of sections, 6) (shared - must not be modified)
+        """
+        # high cutoff frequency is not used by highpass filter
+        key = (filterType, order, float(fs), float(lowcut), float(highcut) if filterType == 'band' else None)
+        sos = self.filters.get(key)
+        if sos is None:
+            from scipy.signal import butter
+            nyq = 0.5 * fs
+            if filterType == 'band':
+                sos = butter(order, [lowcut / nyq, highcut / nyq], btype='band', output='sos')
+            elif filterType == 'high':
+                sos = butter(order, lowcut / nyq, btype='high', output='sos')
+            else:
+                raise ValueError('Filter type must be either "band" or "high".')
+            self.filters[key] = sos
+            logging.info('butterworth second-order sections ({0}): {1}'.format(filterType, sos))
+        return sos
+
+    def getInitialState(self, filterType, order, fs, lowcut, highcut, channelShape=()):
+        """
+        return filter state (zi) of filter at rest, to be given to apply() with first chunk of data
+        channelShape: tuple holding shape of data excluding time axis (empty for 1-d data)
+        """
+        sos = self.getSos(filterType, order, fs, lowcut, highcut)
+        return np.zeros((sos.shape[0],) + tuple(channelShape) + (2,))
+
+    def apply(self, data, filterType, order, fs, lowcut, highcut, zi=None, axis=-1):
+        """
+        apply filter to data
+        data: numpy array - 1-d for one channel or n-d with time along given axis
+        zi: filter state carried from previous chunk (see getInitialState) or None to filter from rest
+        return: filtered numpy array (or tuple holding filtered array and final filter state if zi is given)
+        """
+        from scipy.signal import sosfilt
+        sos = self.getSos(filterType, order, fs, lowcut, highcut)
+        return sosfilt(sos, data, axis=axis, zi=zi)
+
+
+FILTER_BANK = FilterBank()
+
+
+def convertCountArray(counts, sensitivity, fs=100, lowcut=0.05, highcut=40, order=2,
+                      zeroPadLength=500, ignoredSamples=6000, maxSamples=None):
+    """
+    Convert raw counts to acceleration, velocity and displacement using contiguous numpy arrays only
+    counts: array holding raw counts - 1-d for one channel or 2-d (channels, samples)
+    sensitivity: float holding sensitivity in V/g (or array holding one sensitivity per channel)
+    fs: sampling frequency
+    lowcut: low cutoff frequency for bandpass and highpass filters
+    highcut: high cutoff frequency for bandpass filter
+    order: order of filters
+    zeroPadLength: int holding length of zero pad added to both ends of data before filtering
+    ignoredSamples: int holding number of samples (including head pad) removed after bandpass filter
+    maxSamples: int holding index of last sample kept (not counting head pad) - None to keep whole record
+        (records shorter than the 400 s window of an event are kept up to index 40000, tail pad included)
+    return: dict holding arrays keyed by column name:
+        'g', 'offset_g', 'bandpassed_g', 'detrended_velocity_cms', 'highpassed_displacement_cm'
+        (all holding samples from ignoredSamples to maxSamples + zeroPadLength of padded data)
+    """
+    from scipy.signal import detrend
+    counts = np.asarray(counts)
+    dt = 1 / float(fs)
+    sampleCount = counts.shape[-1]
+    if maxSamples is None:
+        maxSamples = max(40000, sampleCount - 1)
+    elif maxSamples < sampleCount - 1:
+        logging.warning('{0} of {1} samples after index {2} are dropped by conversion'.format(
+            sampleCount - 1 - maxSamples, sampleCount, maxSamples))
+    # one sensitivity per row of counts
+    gPerCount = 1 / np.asarray(sensitivity, dtype=np.float64)
+    if gPerCount.ndim:
+        gPerCount = gPerCount[:, np.newaxis]
+
+    # convert count to g directly into zero padded buffer
+    g = np.zeros(counts.shape[:-1] + (sampleCount + 2 * zeroPadLength,))
+    gData = g[..., zeroPadLength:zeroPadLength + sampleCount]
+    np.multiply(counts, 2.5 / 8388608, out=gData)
+    gData *= gPerCount
+
+    offsetG = detrend(g, type='constant')
+    bandpassedG = FILTER_BANK.apply(offsetG, 'band', order, fs, lowcut, highcut)
+    # filter is linear so bandpassed acceleration in m/s^2 is found without filtering twice
+    velocityMs = integrateArray(bandpassedG * 9.80665, dt)
+
+    # remove ignored samples from head and zero pad from tail
+    window = slice(ignoredSamples, maxSamples + zeroPadLength + 1)
+    velocityMs = detrend(velocityMs[..., window], type='constant')
+    displacementM = detrend(integrateArray(velocityMs, dt), type='constant')
+    highpassedDisplacementM = FILTER_BANK.apply(displacementM, 'high', order, fs, lowcut, highcut)
+
+    velocityMs *= 100
+    highpassedDisplacementM *= 100
+    return {
+        'g': g[..., window],
+        'offset_g': offsetG[..., window],
+        'bandpassed_g': bandpassedG[..., window],
+        'detrended_velocity_cms': velocityMs,
+        'highpassed_displacement_cm': highpassedDisplacementM,
+    }
+
+
+def getFrequencyMask(freqs, lowcut, highcut, order=None):
+    """
+    Return band-limiting mask applied to spectrum by frequency-domain conversion
+    freqs: numpy array holding frequencies of spectrum (from rfftfreq)
+    lowcut: low cutoff frequency
+    highcut: high cutoff frequency
+    order: int holding order of Butterworth magnitude response used as smooth (zero-phase) mask,
+        or None for rectangular mask (no correction filter)
+    return: numpy array holding gain at each frequency (0 at zero frequency)
+    """
+    if order is None:
+        return ((freqs >= lowcut) & (freqs <= highcut)).astype(np.float64)
+    # ratio is infinite at zero frequency so highpass gain there is 0
+    lowRatio = np.divide(lowcut, freqs, out=np.full(freqs.shape, np.inf), where=freqs > 0)
+    highpassGain = 1 / np.sqrt(1 + lowRatio ** (2 * order))
+    lowpassGain = 1 / np.sqrt(1 + (freqs / highcut) ** (2 * order))
+    return highpassGain * lowpassGain
+
+
+def convertCountArrayFrequency(counts, sensitivity, fs=100, lowcut=0.05, highcut=40, order=2,
+                               taperFraction=0.05, correction=True):
+    """
+    Convert raw counts to acceleration, velocity and displacement in the frequency domain
+    (whole record is kept as there is no filter warm-up to discard)
+    Offset acceleration is tapered at both ends, zero padded and transformed with rfft. Spectrum is band-limited
+    with mask from getFrequencyMask and integrated by dividing by i*omega once for velocity and twice for
+    displacement.
+    counts: array holding raw counts - 1-d for one channel or 2-d (channels, samples)
+    sensitivity: float holding sensitivity in V/g (or array holding one sensitivity per channel)
+    fs: sampling frequency
+    lowcut: low cutoff frequency of mask
+    highcut: high cutoff frequency of mask
+    order: order of Butterworth magnitude response used as mask (if correction is True)
+    taperFraction: float holding fraction of record tapered (cosine taper) at each end
+    correction: bool - True to use smooth Butterworth mask, False to use rectangular mask
+    return: dict holding arrays (same length as counts) keyed by column name:
+        'g', 'offset_g', 'bandpassed_g', 'detrended_velocity_cms', 'highpassed_displacement_cm'
+    """
+    from scipy.fft import rfft, irfft, rfftfreq, next_fast_len
+    from scipy.signal.windows import tukey
+    counts = np.asarray(counts)
+    sampleCount = counts.shape[-1]
+    gPerCount = 1 / np.asarray(sensitivity, dtype=np.float64)
+    if gPerCount.ndim:
+        gPerCount = gPerCount[:, np.newaxis]
+
+    g = counts * (2.5 / 8388608)
+    g *= gPerCount
+    offsetG = g - g.mean(axis=-1, keepdims=True)
+
+    # padding to at least twice the record length keeps integrals from wrapping around
+    fftLength = next_fast_len(2 * sampleCount)
+    spectrum = rfft(offsetG * tukey(sampleCount, 2 * taperFraction), fftLength, axis=-1)
+    freqs = rfftfreq(fftLength, 1 / float(fs))
+    spectrum *= getFrequencyMask(freqs, lowcut, highcut, order if correction else None)
+
+    # mask is 0 at zero frequency so the division there is skipped
+    iOmega = 2j * np.pi * freqs
+    iOmega[0] = 1.
+    velocitySpectrum = spectrum * (9.80665 / iOmega)
+    bandpassedG = irfft(spectrum, fftLength, axis=-1)[..., :sampleCount]
+    velocityMs = irfft(velocitySpectrum, fftLength, axis=-1)[..., :sampleCount]
+    displacementM = irfft(velocitySpectrum / iOmega, fftLength, axis=-1)[..., :sampleCount]
+
+    velocityMs *= 100
+    displacementM *= 100
+    return {
+        'g': g,
+        'offset_g': offsetG,
+        'bandpassed_g': bandpassedG,
+        'detrended_velocity_cms': velocityMs,
+        'highpassed_displacement_cm': displacementM,
+    }
+
+
+# stats of a single column of converted data (index and value of peak are those of largest absolute value,
+# rounded is peak value rounded to four decimal places as shown in stats table and plots, and time is timestamp
+# of peak ex. '2019-09-26T10:59:31.240000' or None if peak lies outside recorded data)
+PeakStats = namedtuple('PeakStats', ['index', 'value', 'rounded', 'minimum', 'maximum', 'mean', 'time'])
+
+
+def getPeakStats(values, startTime=None, fs=100, firstIndex=0, sampleCount=None):
+    """
+    get min, max, mean and peak (largest absolute value) with its index and time in one pass over data
+    (argmin/argmax give indexes directly, so no search for peak value is needed)
+    values: numpy array holding data of one column - 1-d for one channel or 2-d (channels, samples)
+    startTime: numpy datetime64 holding time of first input sample (None to leave time of peak as None)
+    fs: sampling frequency
+    firstIndex: int holding index (within input samples) of first value
+    sampleCount: int holding number of input samples (None if all values are recorded samples)
+    return: PeakStats record (or list holding one PeakStats record per row if values is 2-d)
+    """
+    matrix = np.atleast_2d(values)
+    rows = np.arange(matrix.shape[0])
+    minIndexes = matrix.argmin(axis=-1)
+    maxIndexes = matrix.argmax(axis=-1)
+    minValues = matrix[rows, minIndexes]
+    maxValues = matrix[rows, maxIndexes]
+    meanValues = matrix.mean(axis=-1)
+
+    # peak is min only if its magnitude is strictly larger (max wins ties)
+    useMin = np.abs(minValues) > np.abs(maxValues)
+    peakIndexes = np.where(useMin, minIndexes, maxIndexes)
+    peakValues = np.where(useMin, minValues, maxValues)
+    if startTime is None:
+        peakTimes = [None] * len(rows)
+    else:
+        if sampleCount is None:
+            sampleCount = firstIndex + matrix.shape[-1]
+        peakTimes = getTimestamps(startTime, fs, firstIndex + peakIndexes, sampleCount)
+
+    stats = [PeakStats(int(i), float(v), round(float(v), 4), float(mn), float(mx), float(mean), t)
+             for i, v, mn, mx, mean, t in zip(peakIndexes, peakValues, minValues, maxValues, meanValues, peakTimes)]
+    return stats[0] if np.ndim(values) == 1 else stats
+
+
+def decimateMinMax(values, binCount, keepIndexes=()):
+    """
+    reduce data to min/max envelope for plotting - data is split into bins of equal size and only
+    first and last samples, min and max of each bin and given samples (ex. peak) are kept, so drawn
+    line looks the same as full data when each bin is no wider than a pixel
+    values: 1-d numpy array holding data
+    binCount: int holding number of bins (ex. width of plot in pixels)
+    keepIndexes: sequence of ints holding indexes of samples which must be kept
+    return: tuple holding sorted numpy array of indexes of kept samples and numpy array of their values
+    """
+    length = len(values)
+    if length <= 2 * binCount:
+        indexes = np.arange(length)
+        return indexes, values
+    binSize = -(-length // binCount)
+    binCount = -(-length // binSize)
+    # last bin is padded with its last value so that all bins have same size
+    bins = np.pad(values, (0, binCount * binSize - length), mode='edge').reshape(binCount, binSize)
+    offsets = np.arange(binCount) * binSize
+    indexes = np.concatenate([offsets + bins.argmin(axis=1), offsets + bins.argmax(axis=1),
+                              [0, length - 1], np.asarray(keepIndexes, dtype=np.int64)])
+    indexes = np.unique(np.minimum(indexes, length - 1))
+    return indexes, values[indexes]
+
+
+# get counts (and clean df when requested) from single text file
+class ProcessedFromTxtFile:
+    def __init__(self, txtFilePath):
+        self.txtFilePath = txtFilePath
+        # sensor code info not used within ProcessedFromTxtFile but necessary for Conversion instances
+        self.sensorCode, self.sensorCodeWithChannel = getSensorCodeInfo(self.txtFilePath)
+
+        self.counts, self.startTime, self.fs = readTspair(self.txtFilePath)
+        self.sampleCount = len(self.counts)
+
+        # dataframe is only built when requested (see df property)
+        self._df = None
+
+    @property
+    def df(self):
+        """pandas dataframe holding timestamp and count columns (built only when first requested)"""
+        if self._df is None:
+            self._df = self.getCleanDf()
+        return self._df
+
+    def getCleanDf(self):
+        """
+        return dataframe holding only timestamp and count values as separate columns
+        (timestamps are rebuilt from time of first sample and sampling frequency given in header)
+        """
+        import pandas as pd
+        timestamps = getTimestamps(self.startTime, self.fs, np.arange(self.sampleCount), self.sampleCount)
+        cleanDf = pd.DataFrame({'timestamp': timestamps, 'count': self.counts})
+        return cleanDf
+
+        
+# class used to convert data (in single dataframe) from
+# count to acceleration, velocity, and displacement
+class Conversion:
+    # names of columns (arrays) held after conversion, in order of plots and stats table
+    resultColumns = ['offset_g', 'bandpassed_g', 'detrended_velocity_cms', 'highpassed_displacement_cm']
+    # conversion approaches: time-domain (filters and cumulative integration) and frequency-domain
+    # with or without correction (Butterworth-shaped) filter (see convertCountArrayFrequency)
+    approaches = ('time', 'frequency', 'frequency_plain')
+
+    def __init__(self, df, sensorCode, sensorCodeWithChannel, eventTimestamp, fs=100, approach='time'):
+        """
+        Initializer for Conversion class
+        df: pandas df from ProcessedFromTxtFile object (or None if counts are given to convert() instead)
+        sensorCode: string holding sensor code ex. 'B4F'
+        sensorCodeWithChannel: string holding sensor code and axis ex. 'B4Fx'
+        eventTimestamp: string holding event timestamp ex.'2020-01-13T163712'
+        fs: sampling frequency
+        approach: string holding one of Conversion.approaches
+        """
+        if approach not in self.approaches:
+            raise ValueError('Approach must be one of {0}.'.format(self.approaches))
+        self.approach = approach
+        self.sensorCode = sensorCode
+        self.sensorCodeWithChannel = sensorCodeWithChannel
+        self.floor = getFloor(self.sensorCode)
+        self.eventTimestamp = eventTimestamp
+        self.sensitivity = self.setSensitivity(self.sensorCodeWithChannel)
+        # dict holding PeakStats record of each of resultColumns (see setArrays)
+        self.stats = {}
+        # self.accRawStats = None
+        self.accOffsetStats = None
+        self.accBandpassedStats = None
+        self.velStats = None
+        self.dispStats = None
+
+        # these may be taken from user in future
+        # low cutoff frequency for bandpass and highpass filters
+        self.lowcut = 0.05
+        # high cutoff frequency for bandpass filter
+        self.highcut = 40
+        # sampling frequency
+        self.fs = fs
+        # order of filters
+        self.order = 2
+        # time between samples in seconds
+        self.dt = 1 / float(self.fs)
+
+        self.zeroPadLength = 500
+        self.ignoredSamples = 6000
+        # index of last sample kept by time approach (None to keep whole record, see convertCountArray)
+        self.maxSamples = None
+        # fraction of record tapered at each end by frequency-domain approaches
+        self.taperFraction = 0.05
+        if self.approach != 'time':
+            # frequency-domain approaches keep whole record (no zero pad or filter warm-up)
+            self.zeroPadLength = 0
+            self.ignoredSamples = 0
+
+        # ChannelResult object created from this object (see getResult)
+        self.result = None
+
+        # dataframe is only built from self.arrays when requested (see df property)
+        self._df = None
+
+        # numpy datetime64 holding time of first sample and int holding number of samples (set in convert())
+        self.startTime = None
+        self.sampleCount = None
+        self.arrays = None
+
+        if df is not None:
+            self.convert(df['count'].to_numpy(), df['timestamp'].iloc[0])
+
+    @classmethod
+    def fromCounts(cls, counts, startTime, sensorCode, sensorCodeWithChannel, eventTimestamp, fs=100,
+                   approach='time'):
+        """
+        return Conversion object created straight from array of counts (ex. from obspy trace)
+        counts: numpy array holding raw counts
+        startTime: time of first sample (string, datetime, numpy datetime64 or UTCDateTime object)
+        """
+        conversionObject = cls(None, sensorCode, sensorCodeWithChannel, eventTimestamp, fs, approach)
+        conversionObject.convert(counts, startTime)
+        return conversionObject
+
+    @classmethod
+    def fromArchive(cls, archiveDir, sensorCodeWithChannel, eventTimestamp):
+        """
+        return Conversion object created from window of archived data (see ArchiveStore)
+        archiveDir: string holding path of archive directory
+        sensorCodeWithChannel: string holding sensor code and axis ex. 'B4Fx'
+        """
+        startTime, endTime = getWindowBounds(timestampToUTC(eventTimestamp))
+        window = ArchiveStore(archiveDir).getWindow(sensorCodeWithChannel, getDatetime64(startTime),
+                                                    getDatetime64(endTime))
+        if window is None:
+            raise ValueError('no archived data of {0} for event {1}'.format(sensorCodeWithChannel, eventTimestamp))
+        counts, firstSampleTime, fs = window
+        return cls.fromCounts(counts, firstSampleTime, getSensorCode(sensorCodeWithChannel), sensorCodeWithChannel,
+                              eventTimestamp, fs)
+
+    def convert(self, counts, startTime):
+        """
+        convert counts to acceleration, velocity and displacement and get stats of results
+        counts: numpy array holding raw counts
+        startTime: time of first sample (string, datetime, numpy datetime64 or UTCDateTime object)
+        """
+        with profiling.span('convert', channel=self.sensorCodeWithChannel, approach=self.approach):
+            arrays = self.getArrays(counts, self.sensitivity)
+        with profiling.span('computeStats', channel=self.sensorCodeWithChannel):
+            self.setArrays(arrays, startTime, len(counts))
+
+    def getArrays(self, counts, sensitivity):
+        """
+        return dict holding arrays of converted data using approach and parameters of this object
+        counts: numpy array holding raw counts (1-d, or 2-d holding one row per channel)
+        sensitivity: float holding sensitivity in V/g (or array holding one sensitivity per row of counts)
+        """
+        if self.approach == 'time':
+            return convertCountArray(counts, sensitivity, self.fs, self.lowcut, self.highcut, self.order,
+                                     self.zeroPadLength, self.ignoredSamples, self.maxSamples)
+        return convertCountArrayFrequency(counts, sensitivity, self.fs, self.lowcut, self.highcut, self.order,
+                                          self.taperFraction, self.approach == 'frequency')
+
+    def setArrays(self, arrays, startTime, sampleCount):
+        """
+        set arrays holding converted data and get stats of results
+        arrays: dict holding arrays keyed by column name (as returned by convertCountArray)
+        startTime: time of first sample (string, datetime, numpy datetime64 or UTCDateTime object)
+        sampleCount: int holding number of counts converted
+        """
+        self.startTime = getDatetime64(startTime)
+        self.sampleCount = sampleCount
+        self.arrays = arrays
+        self.stats = {column: self.computeStats(column) for column in self.resultColumns}
+        # self.accRawStats = self.getStats('g')
+        self.accOffsetStats = self.getStats('offset_g')
+        self.accBandpassedStats = self.getStats('bandpassed_g')
+        self.velStats = self.getStats('detrended_velocity_cms')
+        self.dispStats = self.getStats('highpassed_displacement_cm')
+
+    @property
+    def timestamps(self):
+        """timestamps of samples within same window as converted data (rebuilt when requested)"""
+        return getTimestamps(self.startTime, self.fs, self.getSampleIndexes(), self.sampleCount)
+
+    def getFirstIndex(self):
+        """return int holding index (within input counts) of first sample held in self.arrays"""
+        return self.ignoredSamples - self.zeroPadLength
+
+    def getSampleIndexes(self):
+        """return numpy array holding indexes (within input counts) of samples held in self.arrays"""
+        firstIndex = self.getFirstIndex()
+        return np.arange(firstIndex, firstIndex + len(self.arrays['g']))
+
+    @property
+    def df(self):
+        """pandas dataframe holding timestamps and converted data (built only when first requested)"""
+        if self._df is None:
+            self._df = self.getDf()
+        return self._df
+
+    def getDf(self):
+        """
+        return new pandas dataframe built from timestamps and arrays holding converted data
+        """
+        columns = ['timestamp', 'g', 'time (UTC)'] + self.resultColumns
+        data = dict(self.arrays)
+        data['timestamp'] = self.timestamps
+        data['time (UTC)'] = self.getTimeLabels()
+        import pandas as pd
+        return pd.DataFrame(data, columns=columns)
+
+    def getTimeLabels(self):
+        """return list of strings holding times in format 08:09:59.123 (None within zero pad)"""
+        return [self.getTime(t) for t in self.timestamps]
+
+    def logHeadTail(self):
+        """print head and tail of self.df to console"""
+        logging.debug(self.df.head())
+        logging.debug(self.df.tail())
+
+    def printDfDesc(self):
+        """print head and tail of self.df to console"""
+        print('columns')
+        print(self.df.columns)
+        print('head')
+        print(self.df.head())
+        print('tail')
+        print(self.df.tail())
+        print('length of df: {0}'.format(len(self.df)))
+
+    def getTime(self, timestamp):
+        """
+        convert full timestamp to format 08:09:59.123
+        timestamp: string holding timestamp with full date and time
+        return: string holding time in format 08:09:59.123 or None
+        """
+        if timestamp:
+            return timestamp[11:-3]
+
+    def setSensitivity(self, sensorCodeWithChannel):
+        """
+        return float holding sensitivity in V/g based on given sensorCode
+        sensorCodeWithChannel: string of form 'B4Fx'
+        """
+        return getSensitivity(sensorCodeWithChannel)
+
+    def convertCountToG(self, count):
+        """
+        convert acceleration as raw count to acceleration as g
+        count: int holding acceleration data collected by sensor
+        """
+        g = count * (2.5 / 8388608) * (1 / self.sensitivity)
+        return g
+
+    def getZeroPaddedDf(self, df, columns):
+        """
+        return pandas dataframe with zeropad added to both head and tail of data in given df
+        (length of zero pad determined by instance variable zeroPadLength) 
+        df: pandas dataframe used as input
+        columns: list of strings holding names of columns to be padded and
+            returned in new dataframe ['timestamp', 'g']
+        return: pandas dataframe with only padded columns
+        """
+        paddedData = {}
+        for column in columns:
+            if column == 'timestamp':
+                paddedData[column] = getPaddedArray(df[column].to_numpy(), self.zeroPadLength, None, object)
+            else:
+                paddedData[column] = getPaddedArray(df[column].to_numpy(), self.zeroPadLength)
+        import pandas as pd
+        return pd.DataFrame(paddedData, columns=columns)
+
+    def convertGToMetric(self, g):
+        """
+        return acceleration in m/s^2 from acceleration in g
+        g: float holding acceleration in g
+        """
+        return g * 9.80665
+
+    def butterPass(self, filterType):
+        """
+        return bandpass or highpass filter coefficients...
+        filterType: string holding 'band' or 'high'
+        return:
+            b: numerator of filter
+            a: denominator of filter
+        """
+        return getButterCoefficients(filterType, self.order, self.fs, self.lowcut, self.highcut)
+
+    def integrateSeries(self, inputSeries):
+        """return integrated series from given pandas series (trapezoid rule)"""
+        return integrateArray(inputSeries, self.dt)
+
+    def convertMToCm(self, m):
+        """
+        convert values in meters to values in centimeters
+        m: int or float holding distance in m
+        """
+        return m * 100
+
+    def computeStats(self, columnName):
+        """
+        compute stats of given array (see getPeakStats)
+        columnName: string holding name of array in self.arrays
+        return: PeakStats record
+        """
+        stats = getPeakStats(self.arrays[columnName], self.startTime, self.fs, self.getFirstIndex(), self.sampleCount)
+        logging.debug('stats for {0}:{1}\n'.format(self.sensorCodeWithChannel, columnName))
+        logging.debug('min: {0}\nmax: {1}\nmean: {2}\n'.format(stats.minimum, stats.maximum, stats.mean))
+        return stats
+
+    def getStats(self, columnName):
+        """
+        get index of peak value and peak value itself
+        columnName: string holding name of array in self.arrays
+        return: list holding:
+            1. int holding index of peak value
+            2. float holding peak value
+            3. float holding peak value rounded to four decimal places
+        """
+        return list(self.getPeakStats(columnName)[:3])
+
+    def getPeakStats(self, columnName):
+        """
+        return stats of given array (computed once when arrays are set for result columns)
+        columnName: string holding name of array in self.arrays
+        return: PeakStats record (index, value, rounded, minimum, maximum, mean and time of peak)
+        """
+        if columnName not in self.stats:
+            self.stats[columnName] = self.computeStats(columnName)
+        return self.stats[columnName]
+
+    def getResult(self):
+        """return ChannelResult object holding final results and peak stats (created only once)"""
+        if self.result is None:
+            self.result = ChannelResult(self)
+        return self.result
+
+    def plotResultsGraph(self, canvasObject, column, titleSuffix, yLimit):
+        """plot graph of data to given ResultsCanvas object (see ChannelResult.plotResultsGraph)"""
+        self.getResult().plotResultsGraph(canvasObject, column, titleSuffix, yLimit)
+
+    def plotComparisonGraph(self, canvasObject, yLimit):
+        """plot displacement to given ComparisonCanvas object (see ChannelResult.plotComparisonGraph)"""
+        self.getResult().plotComparisonGraph(canvasObject, yLimit)
+
+
+# compact record holding final results and peak stats of a single channel
+# (produced once per channel and shared by stats table and plots so that no
+# channel needs to be converted twice)
+class ChannelResult:
+    __slots__ = ('sensorCode', 'sensorCodeWithChannel', 'floor', 'eventTimestamp', 'startTime', 'fs',
+                 'firstIndex', 'sampleCount', 'arrays', 'stats', 'accOffsetStats', 'accBandpassedStats', 'velStats',
+                 'dispStats', '_timeLabels')
+
+    resultsSubplotDict = dict(zip(SENSOR_CODES_WITH_CHANNELS, [x for x in range(1, 25)]))
+
+    # number of min/max bins per pixel of plot width (more than one keeps detail when pdf reports are zoomed)
+    plotBinsPerPixel = 2
+
+    # key '4' refers to floor 'B4'
+    comparisonSubplotDict = {'39': 1, '24': 2, '12': 3, '4': 4}
+
+    def __init__(self, conversionObject):
+        """
+        Initializer for ChannelResult class
+        conversionObject: instance of Conversion class
+        """
+        self.sensorCode = conversionObject.sensorCode
+        self.sensorCodeWithChannel = conversionObject.sensorCodeWithChannel
+        self.floor = conversionObject.floor
+        self.eventTimestamp = conversionObject.eventTimestamp
+        # timestamps are rebuilt from these when needed
+        self.startTime = conversionObject.startTime
+        self.fs = conversionObject.fs
+        self.firstIndex = conversionObject.getFirstIndex()
+        self.sampleCount = conversionObject.sampleCount
+        # keep only final results (copied out of larger padded buffers where necessary)
+        self.arrays = {}
+        for column in Conversion.resultColumns:
+            values = conversionObject.arrays[column]
+            self.arrays[column] = values if values.base is None else values.copy()
+        self.stats = {column: conversionObject.stats[column] for column in Conversion.resultColumns}
+        self.accOffsetStats = conversionObject.accOffsetStats
+        self.accBandpassedStats = conversionObject.accBandpassedStats
+        self.velStats = conversionObject.velStats
+        self.dispStats = conversionObject.dispStats
+        self._timeLabels = None
+
+    def getStats(self, columnName):
+        """
+        return stats (computed during conversion) of given column
+        columnName: string holding name of array in self.arrays
+        return: list holding index of peak value, peak value, and peak value rounded to four decimal places
+        """
+        return list(self.stats[columnName][:3])
+
+    def getPeakStats(self, columnName):
+        """
+        return stats (computed during conversion) of given column
+        columnName: string holding name of array in self.arrays
+        return: PeakStats record (index, value, rounded, minimum, maximum, mean and time of peak)
+        """
+        return self.stats[columnName]
+
+    def getPeakTimestamp(self, columnName):
+        """return string holding timestamp of peak value of given column ex. '2019-09-26T10:59:31.240000'"""
+        return self.stats[columnName].time
+
+    def getSubset(self, columns):
+        """
+        return copy of this object holding only arrays and stats of given columns
+        (ex. to send less data to worker processes rendering figures of a single column)
+        columns: list of strings holding names of arrays in self.arrays
+        """
+        subset = copy.copy(self)
+        subset.arrays = {column: self.arrays[column] for column in columns}
+        subset.stats = {column: self.stats[column] for column in columns}
+        subset._timeLabels = None
+        return subset
+
+    def getLength(self):
+        """return int holding number of values in each of self.arrays"""
+        return len(next(iter(self.arrays.values())))
+
+    def getTimeLabels(self):
+        """return list of strings holding times in format 08:09:59.123 (created on first call only)"""
+        if self._timeLabels is None:
+            length = self.getLength()
+            sampleIndexes = np.arange(self.firstIndex, self.firstIndex + length)
+            timestamps = getTimestamps(self.startTime, self.fs, sampleIndexes, self.sampleCount)
+            self._timeLabels = [t[11:-3] if t else None for t in timestamps]
+        return self._timeLabels
+
+    def getTimeLabel(self, position):
+        """
+        return string holding time of sample at given x position of plot in format 08:09:59.123
+        (empty string if position is outside data, used as tick formatter so only ticks are labelled)
+        """
+        index = int(round(position))
+        if index < 0 or index >= self.getLength():
+            return ''
+        timestamp = getTimestamps(self.startTime, self.fs, np.array([self.firstIndex + index]), self.sampleCount)[0]
+        return timestamp[11:-3] if timestamp else ''
+
+    def formatTick(self, position, tickNumber=None):
+        """return label of tick at given x position (see getTimeLabel, signature of matplotlib FuncFormatter)"""
+        return self.getTimeLabel(position)
+
+    def plotDecimated(self, ax, column):
+        """
+        draw min/max envelope of given column (see decimateMinMax) sized to width of axes in pixels
+        (peak sample is always kept, x values are sample positions labelled with their times)
+        ax: matplotlib Axes object
+        column: string holding name of column used as y data
+        """
+        from matplotlib.ticker import FuncFormatter, MaxNLocator
+        binCount = max(1, int(ax.get_window_extent().width * self.plotBinsPerPixel))
+        x, y = decimateMinMax(self.arrays[column], binCount, [self.getPeakStats(column).index])
+        ax.plot(x, y, color='gray', linewidth=0.25)
+        ax.xaxis.set_major_locator(MaxNLocator(4))
+        # bound method (not lambda) so figures can be pickled
+        ax.xaxis.set_major_formatter(FuncFormatter(self.formatTick))
+
+    def plotResultsGraph(self, canvasObject, column, titleSuffix, yLimit):
+        """
+        plot graph of data to given ResultsCanvas object (one of 24 graphs on one page)
+        (figure.tight_layout() is left to caller, to be called once all graphs of figure are plotted)
+        canvasObject: instance of ResultsCanvas class
+        column: string holding name of column used as y data
+        plotTitle: string holding title of plot
+        yLimit: float holding value to be used to set range of plot along y-axis (from negative yLimit to yLimit)
+        """
+        plotTitle = self.sensorCodeWithChannel + ' ' + titleSuffix
+
+        subplotPos = self.resultsSubplotDict[self.sensorCodeWithChannel]
+
+        ax = canvasObject.figure.add_subplot(8, 3, subplotPos)
+
+        self.plotDecimated(ax, column)
+        ax.set_title(plotTitle)
+        ax.set_xlabel('time (UTC)')
+
+        ax.set_ylim(-yLimit, yLimit)
+        #ax.xaxis.set_visible(False)
+
+        # mark peak value and add text to plot
+        stats = self.getPeakStats(column)
+        ax.plot(stats.index, stats.value, marker='o', color='red', markersize=2)
+        ax.text(0.85, 0.85, '{0}'.format(stats.rounded), color='red', transform=ax.transAxes)
+
+    def plotComparisonGraph(self, canvasObject, yLimit):
+        """
+        plot displacement (for now) on a figure comparing displacements at different levels
+        canvasObject: instance of ComparisonCanvas class
+        yLimit: float holding value to be used to set range of plot along y-axis (from negative yLimit to yLimit)
+        """
+        subplotPos = self.comparisonSubplotDict[self.floor]
+        ax = canvasObject.figure.add_subplot(4, 1, subplotPos)
+        self.drawComparisonAxes(ax, yLimit, canvasObject.windowTitle)
+
+    def drawComparisonAxes(self, ax, yLimit, title):
+        """
+        plot displacement to given axes of a comparison figure (one axes per floor)
+        ax: matplotlib Axes object
+        yLimit: float holding value to be used to set range of plot along y-axis (from negative yLimit to yLimit)
+        title: string holding title of comparison figure (shown above top floor only)
+        """
+        self.plotDecimated(ax, 'highpassed_displacement_cm')
+        ax.set_ylim(-yLimit, yLimit)
+        ax.xaxis.set_visible(False)
+        if self.floor == '39':
+            ax.set_title(title)
+        ax.set_ylabel(self.sensorCodeWithChannel, rotation=0)
+        ax.set_xlabel('Time (UTC)')
+
+        # mark peak value and add text to plot
+        stats = self.getPeakStats('highpassed_displacement_cm')
+        ax.plot(stats.index, stats.value, marker='o', color='red', markersize=2)
+        ax.text(0.8, 0.85, '{0}'.format(stats.rounded), color='red', transform=ax.transAxes)
+
+
+# class used to convert counts chunk by chunk as they arrive (ex. for continuous monitoring)
+class StreamingConversion:
+    """
+    Filter states (zi of second-order sections) and integration constants are carried between chunks, so results do not depend
+    on how data is split into chunks and memory use is bounded by chunk size.
+    Mean removal used by Conversion needs the whole window, so here offset is removed with the running
+    mean of all samples received and velocity drift is removed with the same highpass filter used for
+    displacement.
+    """
+    def __init__(self, sensorCodeWithChannel, fs=100, lowcut=0.05, highcut=40, order=2):
+        """
+        sensorCodeWithChannel: string holding sensor code and axis ex. 'B4Fx'
+        fs: sampling frequency
+        lowcut: low cutoff frequency for bandpass and highpass filters
+        highcut: high cutoff frequency for bandpass filter
+        order: order of filters
+        """
+        self.sensorCodeWithChannel = sensorCodeWithChannel
+        self.sensitivity = getSensitivity(sensorCodeWithChannel)
+        self.fs = fs
+        self.dt = 1 / float(fs)
+        # arguments of filters in FILTER_BANK
+        self.filterArgs = (order, fs, lowcut, highcut)
+        self.reset()
+
+    def reset(self):
+        """clear carried state (next chunk is treated as start of data)"""
+        self.sampleCount = 0
+        self.gSum = 0.
+        self.bandZi = FILTER_BANK.getInitialState('band', *self.filterArgs)
+        self.velocityZi = FILTER_BANK.getInitialState('high', *self.filterArgs)
+        self.displacementZi = FILTER_BANK.getInitialState('high', *self.filterArgs)
+        self.velocityCarry = None
+        self.displacementCarry = None
+        # peak absolute values of each column received so far
+        self.peaks = dict.fromkeys(['g'] + Conversion.resultColumns, 0.)
+
+    def push(self, counts):
+        """
+        convert next chunk of counts
+        counts: 1-d array holding raw counts following last chunk given
+        return: dict holding arrays (same length as counts) keyed by column name:
+            'g', 'offset_g', 'bandpassed_g', 'detrended_velocity_cms', 'highpassed_displacement_cm'
+        """
+        counts = np.asarray(counts)
+        if not len(counts):
+            return {c: np.empty(0) for c in self.peaks}
+        g = counts * (2.5 / 8388608)
+        g /= self.sensitivity
+
+        # running mean of g up to each sample
+        cumulativeG = np.cumsum(g)
+        cumulativeG += self.gSum
+        offsetG = g - cumulativeG / np.arange(self.sampleCount + 1, self.sampleCount + len(g) + 1)
+        self.gSum = cumulativeG[-1]
+        self.sampleCount += len(g)
+
+        bandpassedG, self.bandZi = FILTER_BANK.apply(offsetG, 'band', *self.filterArgs, zi=self.bandZi)
+        velocityMs, self.velocityCarry = integrateChunk(bandpassedG * 9.80665, self.dt, self.velocityCarry)
+        velocityMs, self.velocityZi = FILTER_BANK.apply(velocityMs, 'high', *self.filterArgs, zi=self.velocityZi)
+        displacementM, self.displacementCarry = integrateChunk(velocityMs, self.dt, self.displacementCarry)
+        displacementM, self.displacementZi = FILTER_BANK.apply(displacementM, 'high', *self.filterArgs,
+                                                              zi=self.displacementZi)
+
+        chunk = {
+            'g': g,
+            'offset_g': offsetG,
+            'bandpassed_g': bandpassedG,
+            'detrended_velocity_cms': velocityMs * 100,
+            'highpassed_displacement_cm': displacementM * 100,
+        }
+        for column, values in chunk.items():
+            self.peaks[column] = max(self.peaks[column], np.abs(values).max())
+        return chunk
+
+
+def getConversionObjectFromTxtFiles(txtFiles, eventTimestamp, approach='time'):
+    """
+    txtFiles: list of strings holding paths of text files (one per hour, any number of hours) of a single channel
+    eventTimestamp: string holding event timestamp ex.'2020-01-13T163712'
+    approach: string holding one of Conversion.approaches
+    return: conversion object made from counts of text files (stitched by stitchSegments)
+    """
+    processedFiles = [ProcessedFromTxtFile(f) for f in txtFiles]
+    first = processedFiles[0]
+    counts, firstSampleTime, fs, _ = stitchSegments([(p.counts, p.startTime, p.fs) for p in processedFiles],
+                                                    first.sensorCodeWithChannel)
+    return Conversion.fromCounts(counts, firstSampleTime, first.sensorCode, first.sensorCodeWithChannel,
+                                 eventTimestamp, fs, approach)
+
+
+def convertTxtFiles(txtFiles, eventTimestamp, approach='time'):
+    """
+    convert data of a single channel (called in worker processes by convertChannels)
+    txtFiles: list of strings holding paths of text files (one per hour) of a single channel
+    eventTimestamp: string holding event timestamp ex.'2020-01-13T163712'
+    approach: string holding one of Conversion.approaches
+    return: ChannelResult object
+    """
+    return getConversionObjectFromTxtFiles(txtFiles, eventTimestamp, approach).getResult()
+
+
+def convertMiniseedFiles(mseedFiles, eventTimestamp, cacheDir=None, archiveDir=None, approach='time'):
+    """
+    read and convert data of a single channel from miniseed files without writing text files
+    (called in worker processes by convertChannels)
+    mseedFiles: list of strings holding paths of miniseed files (one per hour) of a single channel
+    eventTimestamp: string holding event timestamp ex.'2020-01-13T163712'
+    cacheDir: string holding path of cache directory of decoded data (None to disable cache)
+    archiveDir: string holding path of archive directory (None to read from miniseed files or cache)
+    approach: string holding one of Conversion.approaches
+    return: ChannelResult object
+    """
+    startTime, endTime = getWindowBounds(timestampToUTC(eventTimestamp))
+    counts, firstSampleTime, fs = getMiniseedCounts(mseedFiles, startTime, endTime, cacheDir, archiveDir)
+    sensorCode, sensorCodeWithChannel = getSensorCodeInfo(mseedFiles[0])
+    c = Conversion.fromCounts(counts, firstSampleTime, sensorCode, sensorCodeWithChannel, eventTimestamp, fs,
+                              approach)
+    return c.getResult()
+
+
+def convertChannelFiles(channelFiles, eventTimestamp, cacheDir=None, archiveDir=None, approach='time'):
+    """
+    convert data of a single channel from either miniseed files or text files
+    channelFiles: list of strings holding paths of miniseed (.m) or text files of a single channel
+    eventTimestamp: string holding event timestamp ex.'2020-01-13T163712'
+    cacheDir: string holding path of cache directory of decoded miniseed data (None to disable cache)
+    archiveDir: string holding path of archive directory of miniseed data (None to disable archive)
+    approach: string holding one of Conversion.approaches
+    return: ChannelResult object
+    """
+    with profiling.span('channel', channel=getSensorCodeInfo(channelFiles[0])[1]):
+        if channelFiles[0].endswith('.m'):
+            return convertMiniseedFiles(channelFiles, eventTimestamp, cacheDir, archiveDir, approach)
+        return convertTxtFiles(channelFiles, eventTimestamp, approach)
+
+
+def mapChannels(function, channelFiles, eventTimestamp, workers=None, cacheDir=None, archiveDir=None):
+    """
+    call function(files, eventTimestamp, cacheDir, archiveDir) for the files of each channel,
+    each channel being handled by a worker process
+    workers: int holding number of worker processes (None to use all cores, 1 to run in this process)
+    return: list of results (in same order as channelFiles)
+    """
+    eventTimestamps = [eventTimestamp] * len(channelFiles)
+    cacheDirs = [cacheDir] * len(channelFiles)
+    archiveDirs = [archiveDir] * len(channelFiles)
+    if workers == 1 or len(channelFiles) < 2:
+        return list(map(function, channelFiles, eventTimestamps, cacheDirs, archiveDirs))
+    workers = min(workers or os.cpu_count() or 1, len(channelFiles))
+    # spans recorded in worker processes are returned along with results when profiling
+    workerFunction = profiling.wrapForWorker(function)
+    # map() returns results in order of input regardless of order in which workers finish
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(workerFunction, channelFiles, eventTimestamps, cacheDirs, archiveDirs)
+        return [profiling.unwrapResult(r, workerFunction is not function) for r in results]
+
+
+def iterChannels(function, channelFiles, eventTimestamp, workers=None, cacheDir=None, archiveDir=None):
+    """
+    apply function to files of each channel (same as mapChannels) and yield each result as soon as it is done
+    (closing generator before all channels are done cancels channels not yet started)
+    function: module-level function taking (channelFiles, eventTimestamp, cacheDir, archiveDir) of a single channel
+    channelFiles: list holding a list of file paths (miniseed or text) for each channel
+    eventTimestamp: string holding event timestamp ex.'2020-01-13T163712'
+    workers: int holding number of worker processes (None to use all cores, 1 to run in this process)
+    cacheDir: string holding path of cache directory of decoded miniseed data (None to disable cache)
+    archiveDir: string holding path of archive directory of miniseed data (None to disable archive)
+    yield: tuple holding index of channel within channelFiles and result of function (in order of completion)
+    """
+    if workers == 1 or len(channelFiles) < 2:
+        for index, files in enumerate(channelFiles):
+            yield index, function(files, eventTimestamp, cacheDir, archiveDir)
+        return
+    workers = min(workers or os.cpu_count() or 1, len(channelFiles))
+    workerFunction = profiling.wrapForWorker(function)
+    executor = ProcessPoolExecutor(max_workers=workers)
+    futures = {executor.submit(workerFunction, files, eventTimestamp, cacheDir, archiveDir): index
+               for index, files in enumerate(channelFiles)}
+    try:
+        for future in as_completed(futures):
+            yield futures[future], profiling.unwrapResult(future.result(), workerFunction is not function)
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def convertChannels(channelFiles, eventTimestamp, workers=None, cacheDir=None, archiveDir=None, approach='time'):
+    """
+    convert data of all channels - channels are independent so each is handled by a worker process
+    channelFiles: list holding a list of miniseed or text file paths for each channel
+    eventTimestamp: string holding event timestamp ex.'2020-01-13T163712'
+    workers: int holding number of worker processes (None to use all cores, 1 to convert in this process)
+    cacheDir: string holding path of cache directory of decoded miniseed data (None to disable cache)
+    archiveDir: string holding path of archive directory of miniseed data (None to disable archive)
+    approach: string holding one of Conversion.approaches
+    return: list of ChannelResult objects (in same order as channelFiles)
+    """
+    # partial objects of module functions can be sent to worker processes
+    convertFunction = partial(convertChannelFiles, approach=approach)
+    return mapChannels(convertFunction, channelFiles, eventTimestamp, workers, cacheDir, archiveDir)
@@ -0,0 +1,750 @@
+# Filename: gui.py
+
+"""PyQt5 GUI of convert_acc (imported by the launcher, not needed to use the processing core)."""
+import sys
+import os
+import time
+import logging
+import threading
+from functools import partial
+from collections import deque
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtWidgets import QMainWindow
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtWidgets import QLineEdit
+from PyQt5.QtWidgets import QPushButton
+from PyQt5.QtWidgets import QVBoxLayout
+from PyQt5.QtWidgets import QLabel
+from PyQt5.QtWidgets import QButtonGroup
+from PyQt5.QtWidgets import QRadioButton
+from PyQt5.QtWidgets import QCheckBox
+from PyQt5.QtWidgets import QScrollArea
+
+# from PyQt5 import QtWebEngineWidgets
+# from PyQt5.QtWidgets import QDialog
+# from PyQt5.QtWidgets import QProgressBar
+from PyQt5.QtWidgets import QProgressDialog
+from PyQt5.QtCore import Qt
+from PyQt5.QtCore import QObject
+from PyQt5.QtCore import QThread
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtCore import QRegExp
+from PyQt5.QtGui import QRegExpValidator
+# from PyQt5.QtWidgets import QErrorMessage
+from PyQt5.QtWidgets import QMessageBox
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+from matplotlib.figure import Figure
+
+from convert_acc.core import *
+from convert_acc import profiling
+from convert_acc.report import StatsTable
+from convert_acc.report import ReportWriter
+from convert_acc.render import renderEventImages
+from convert_acc.render import getImageFigure
+
+
+# window titles of results canvases (in same order as Conversion.resultColumns)
+RESULTS_WINDOW_TITLES = ['Acceleration (g)', 'Bandpassed Acceleration (g)', 'Velocity (cm/s)', 'Displacement (cm)']
+
+
+# subclass of QMainWindow to set up the portion of GUI
+# to take information from user and serve as controller of program
+class PrimaryUI(QMainWindow):
+    """AccConvert's initial view for taking input from user."""
+    def __init__(self, workers=None):
+        """
+        View initializer.
+        workers: int holding number of worker processes used for conversion (None to use all cores)
+        """
+        super().__init__()
+
+        self.workers = workers
+
+        # self.eventTimestamp is string (converted to pd.Timestamp when necessary)
+        self.eventTimestamp = None
+        self.eventTimestampReadable = None
+        self.miniseedDir = None
+        self.miniseedFileList = None
+        self.miniseedFileCount = None
+        self.workingBaseDir = None
+        self.workingDir = None
+        # directory holding cache of decoded miniseed data (inside working base dir)
+        self.cacheDir = None
+        # list holding a list of miniseed file paths for each channel
+        self.channelMiniseedFiles = None
+        # progress dialog, background thread and worker of event being processed (None when idle)
+        self.progress = None
+        self.progressText = None
+        self.thread = None
+        self.worker = None
+        # EventJob objects of events submitted while another event is being processed
+        self.jobQueue = deque()
+
+        # stats table and its max values (in same order as Conversion.resultColumns) of last event shown
+        self.statsTable = StatsTable(self.eventTimestampReadable)
+        self.statsColumnMaxValues = None
+
+        self.offsetGResultsCanvas = ResultsCanvas(RESULTS_WINDOW_TITLES[0])
+        self.bandpassedGResultsCanvas = ResultsCanvas(RESULTS_WINDOW_TITLES[1])
+        self.velResultsCanvas = ResultsCanvas(RESULTS_WINDOW_TITLES[2])
+        self.dispResultsCanvas = ResultsCanvas(RESULTS_WINDOW_TITLES[3])
+        self.resultsCanvases = [self.offsetGResultsCanvas, self.bandpassedGResultsCanvas, self.velResultsCanvas, self.dispResultsCanvas]
+
+        self.NXcomparisonCanvas = ComparisonCanvas('N. Corner X-Dir (cm)')
+        self.NYcomparisonCanvas = ComparisonCanvas('N. Corner Y-Dir (cm)')
+        self.SXcomparisonCanvas = ComparisonCanvas('S. Corner X-Dir (cm)')
+        self.SYcomparisonCanvas = ComparisonCanvas('S. Corner Y-Dir (cm)')
+
+        # retain current order of self.comparisonCanvases
+        self.comparisonCanvases = [self.NXcomparisonCanvas, self.NYcomparisonCanvas, self.SXcomparisonCanvas, self.SYcomparisonCanvas]
+        self.allCanvases = self.resultsCanvases + self.comparisonCanvases
+
+        # Set some of main window's properties
+        self.setWindowTitle('Accelerometer Data Conversion')
+        self.setFixedSize(500, 375)
+        # Set the central widget and the general layout
+        self.generalLayout = QVBoxLayout()
+        self.centralWidget = QWidget(self)
+        self.setCentralWidget(self.centralWidget)
+        self.centralWidget.setLayout(self.generalLayout)
+        # Create the display and the buttons
+        self.createTextInputFields()
+        self.createExportCheckBox()
+        self.createRadioButtons()
+        self.createSubmitButton()
+
+        self.eventField.textChanged.connect(self.enableSubmitButton)
+        self.miniseedDirField.textChanged.connect(self.enableSubmitButton)
+        self.workingBaseDirField.textChanged.connect(self.enableSubmitButton)
+
+    def enableSubmitButton(self):
+        """Allow click on submit button if all fields contain valid input"""
+        if  self.isEventTimestampValid() and \
+            self.isDirPathValid(self.miniseedDirField) and \
+            self.isDirPathValid(self.workingBaseDirField):
+                self.submitBtn.setEnabled(True)
+
+    def setEventTimestamp(self):
+        """Set event timestamp (string) based on user input"""
+        logging.debug(self.eventField.text())
+        self.eventTimestamp = self.eventField.text()
+
+    def isEventTimestampValid(self):
+        """
+        Confirm event timestamp is entered in correct format
+        return: boolean (True if valid)
+        """
+        regEx = QRegExp("[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{6}")
+        timestampValidator = QRegExpValidator(regEx, self)
+        result = timestampValidator.validate(self.eventField.text(), 0)
+        # validate() returns tuple with 2 as first item if valid
+        if result[0] == 2:
+            return True
+        else:
+            return False
+
+    def setMiniseedDir(self):
+        """Set miniseed directory path based on user input"""
+        self.miniseedDir = self.miniseedDirField.text()
+
+    def setWorkingBaseDir(self):
+        """Set base working directory path based on user input"""
+        self.workingBaseDir = self.workingBaseDirField.text()
+
+    def isDirPathValid(self, field):
+        """
+        Confirm that entered directory path exists
+        field: name of field holding path entered by user
+        return: boolean (True if path exists)
+        """
+        if os.path.exists(field.text()):
+            return True
+        else:
+            return False
+
+    def isWorkingDirWritable(self):
+        """Return true if entered working directory is writable"""
+        if os.access(os.path.dirname(self.workingBaseDirField.text()), os.W_OK):
+            return True
+        else:
+            message = QMessageBox(QMessageBox.Critical, 'Invalid Input', 'Working directory is not writable. Please choose another location.', QMessageBox.Ok)
+            message.exec_()
+            return False
+
+    def setMiniseedFileInfo(self):
+        """
+        Set: 
+            -list of strings holding miniseed file names (relative to miniseed directory)
+            -variable holding integer with number of miniseed files
+        If miniseed directory does not hold 24 files per hour, it is taken as an archive and files of event are looked up
+        in index of archive.
+        """
+        self.miniseedFileList = [f for f in os.listdir(self.miniseedDir) if f.endswith(".m")]
+        if not isFileCountValid(len(self.miniseedFileList)):
+            self.miniseedFileList = self.findArchivedMiniseedFiles()
+        self.miniseedFileCount = len(self.miniseedFileList)
+        logging.debug('miniseed file count: {}'.format(self.miniseedFileCount))
+
+    def findArchivedMiniseedFiles(self):
+        """
+        return list of strings holding paths (relative to miniseed directory) of miniseed files of event found in
+        index of archive held in working base dir (index is updated with files added to archive since last lookup,
+        or built in memory if working base dir cannot be written to)
+        (empty list if files of any channel are missing)
+        """
+        from convert_acc.index import MiniseedIndex
+        indexPath = os.path.join(self.workingBaseDir, 'archive_index.sqlite')
+        if not os.access(self.workingBaseDir, os.W_OK):
+            logging.warning('{0} is not writable, index of archive is built in memory'.format(self.workingBaseDir))
+            indexPath = None
+        try:
+            index = MiniseedIndex(indexPath)
+            index.scan(self.miniseedDir)
+            channelFiles = index.getEventChannelFiles(self.eventTimestamp)
+        except Exception as e:
+            logging.warning('miniseed files of event not found in archive: {0}'.format(e))
+            return []
+        return [os.path.relpath(path, self.miniseedDir) for files in channelFiles for path in files]
+
+    def isMiniseedCountValid(self):
+        """Return true if miniseed directory holds 24 miniseed files per hour (ex. 24 or 48, any number of hours)"""
+        if not isFileCountValid(self.miniseedFileCount):
+            message = QMessageBox(QMessageBox.Critical, 'Invalid Input', 'Miniseed directory must contain 24 files with extension .m for each hour (ex. 24 or 48)\n(or be an archive holding files of all channels for the event)', QMessageBox.Ok)
+            message.exec_()
+            return False
+        else:
+            return True
+
+    def setWorkingDir(self):
+        """
+        If not yet created, create working dir using event id/timestamp entered
+        by user.
+        """
+        self.workingDir = os.path.join(self.workingBaseDir, self.eventTimestamp)
+        self.cacheDir = os.path.join(self.workingBaseDir, 'cache')
+
+        if not os.path.isdir(self.workingDir):
+            os.mkdir(self.workingDir)
+
+    def timestampToUTC(self, eventTimestamp):
+        """
+        convert event timestamp from local Turkish time to UTC (see module function timestampToUTC)
+        eventTimestamp: string holding event timestamp in local Turkish time (entered by user)
+        return: UTCDateTime object holding timestamp in UTC
+        """
+        return timestampToUTC(eventTimestamp)
+
+    def getWindowBounds(self, eventTimestamp):
+        """
+        return start and end timestamps to be used as window boundaries
+        eventTimestamp: UTCDateTime object holding timestamp in UTC
+        return: tuple of UTCDateTime objects holding start and end times in UTC
+        """
+        return getWindowBounds(eventTimestamp)
+
+    def createTextInputFields(self):
+        """Create text input fields"""
+        self.eventLabel = QLabel(self)
+        self.eventLabel.setText('Timestamp of event in format "2020-01-11T163736"')
+        self.miniseedDirLabel = QLabel(self)
+        self.miniseedDirLabel.setText('Absolute path of directory holding miniseed files')
+        self.workingBaseDirLabel = QLabel(self)
+        self.workingBaseDirLabel.setText('Absolute path of base output directory\n(Report will be found here in new directory named with timestamp.)')
+
+        self.eventField = QLineEdit(self)
+        self.miniseedDirField = QLineEdit(self)
+        self.workingBaseDirField = QLineEdit(self)
+
+        self.generalLayout.addWidget(self.eventLabel)
+        self.generalLayout.addWidget(self.eventField)
+        self.generalLayout.addWidget(self.miniseedDirLabel)
+        self.generalLayout.addWidget(self.miniseedDirField)
+        self.generalLayout.addWidget(self.workingBaseDirLabel)
+        self.generalLayout.addWidget(self.workingBaseDirField)
+
+    def createExportCheckBox(self):
+        """Create check boxes allowing user to export miniseed data as text files and stats tables as html (unchecked by default)"""
+        self.exportTxtCheckBox = QCheckBox('Export miniseed data as text files (TSPAIR)', self)
+        self.generalLayout.addWidget(self.exportTxtCheckBox)
+        self.exportHtmlCheckBox = QCheckBox('Export stats tables as html files', self)
+        self.generalLayout.addWidget(self.exportHtmlCheckBox)
+
+    def createRadioButtons(self):
+        """Create radio buttons"""
+        self.approachGroup = QButtonGroup(self.centralWidget)
+        self.timePlain = QRadioButton('Time-domain conversion')
+        self.timePlain.setChecked(True)
+        # self.timeBaseline = QRadioButton('Time-domain with baseline correction')
+        self.freqCorrection = QRadioButton('Frequency-domain with correction filter')
+        self.freqPlain = QRadioButton('Frequency-domain without correction filter')
+
+        self.approachGroup.addButton(self.timePlain)
+        # self.approachGroup.addButton(self.timeBaseline)
+        self.approachGroup.addButton(self.freqCorrection)
+        self.approachGroup.addButton(self.freqPlain)
+
+        self.generalLayout.addWidget(self.timePlain)
+        # self.generalLayout.addWidget(self.timeBaseline)
+        self.generalLayout.addWidget(self.freqCorrection)
+        self.generalLayout.addWidget(self.freqPlain)
+
+    def getApproach(self):
+        """return string holding conversion approach of checked radio button (one of Conversion.approaches)"""
+        if self.freqCorrection.isChecked():
+            return 'frequency'
+        if self.freqPlain.isChecked():
+            return 'frequency_plain'
+        return 'time'
+
+    def setChannelMiniseedFiles(self):
+        """Set list holding list of miniseed file paths (one file per hour) for each channel"""
+        mseedPaths = [os.path.join(self.miniseedDir, f) for f in self.miniseedFileList]
+        self.channelMiniseedFiles = groupFilesByChannel(mseedPaths)
+
+    def showProgress(self, job):
+        """show progress dialog (not modal, so next events can be submitted and earlier results viewed meanwhile)"""
+        self.progress = QProgressDialog('Processing acceleration data', 'Cancel', 0, len(job.channelMiniseedFiles), self)
+        self.progress.setWindowTitle('In Progress: {0}'.format(job.eventTimestampReadable))
+        self.progress.setWindowModality(Qt.NonModal)
+        self.progress.setMinimumDuration(0)
+        self.progress.setAutoClose(False)
+        self.progress.setAutoReset(False)
+        self.progress.canceled.connect(self.cancelProcessing)
+        self.progressText = 'Processing acceleration data'
+        self.progress.show()
+
+    def updateProgress(self, done, total, text):
+        """
+        show progress of event being processed (called by signal of ProcessingWorker)
+        done: int holding number of steps done
+        total: int holding number of steps
+        text: string describing last step done (ex. peak displacement of channel converted)
+        """
+        self.progressText = text
+        if self.jobQueue:
+            text += '\n{0} more event(s) queued'.format(len(self.jobQueue))
+        self.progress.setMaximum(total)
+        self.progress.setValue(done)
+        self.progress.setLabelText(text)
+
+    def cancelProcessing(self):
+        """stop processing event (channels already being converted are finished first)"""
+        if self.worker is not None:
+            self.progress.setLabelText('Cancelling...')
+            self.worker.cancel()
+
+    def createJob(self):
+        """return EventJob holding event entered by user (so fields may be changed while event is processed)"""
+        return EventJob(self.eventTimestamp, self.miniseedDir, self.miniseedFileList, self.workingDir, self.cacheDir,
+                        self.channelMiniseedFiles, self.getApproach(), self.exportTxtCheckBox.isChecked(),
+                        self.exportHtmlCheckBox.isChecked())
+
+    def startNextJob(self):
+        """process next queued event with ProcessingWorker in background thread (unless an event is being processed)"""
+        if self.thread is not None or not self.jobQueue:
+            return
+        job = self.jobQueue.popleft()
+        self.showProgress(job)
+        self.thread = QThread(self)
+        self.worker = ProcessingWorker(job, self.workers)
+        self.worker.moveToThread(self.thread)
+        self.thread.started.connect(self.worker.run)
+        self.worker.progress.connect(self.updateProgress)
+        self.worker.finished.connect(self.showResults)
+        self.worker.failed.connect(self.showError)
+        self.worker.cancelled.connect(self.showCancelled)
+        self.worker.done.connect(self.thread.quit)
+        self.thread.finished.connect(self.finishJob)
+        self.thread.start()
+
+    def finishJob(self):
+        """clean up after event is processed (or cancelled) and start next queued event"""
+        self.progress.close()
+        self.worker.deleteLater()
+        self.thread.deleteLater()
+        self.worker = None
+        self.thread = None
+        self.startNextJob()
+
+    def showResults(self, job):
+        """
+        show figures of processed event on results and comparison canvases (called by signal of ProcessingWorker)
+        job: EventJob object holding results of event
+        """
+        self.statsTable = job.statsTable
+        self.statsColumnMaxValues = job.statsColumnMaxValues
+        for canvas, image in zip(self.resultsCanvases + self.comparisonCanvases,
+                                 job.resultsImages + job.comparisonImages):
+            canvas.setFigure(getImageFigure(image, canvas.windowTitle))
+        self.showCanvases()
+
+        seconds = time.time() - job.startTime
+        print("--- {} minutes ---".format(seconds / 60.0))
+        self.statsTable.printTable()
+
+    def showCancelled(self, job):
+        """
+        report event whose processing was cancelled (called by signal of ProcessingWorker)
+        job: EventJob object of event
+        """
+        seconds = time.time() - job.startTime
+        print('--- {0} cancelled after {1} minutes ---'.format(job.eventTimestampReadable, seconds / 60.0))
+
+    def showError(self, text):
+        """show message of error raised while processing event"""
+        message = QMessageBox(QMessageBox.Critical, 'Processing Failed', text, QMessageBox.Ok)
+        message.exec_()
+
+    def showCanvases(self):
+        """show results and comparison windows"""
+        for canvas in self.allCanvases:
+            canvas.show()
+
+    def processUserInput(self):
+        """validate user input and queue event to be processed in background thread"""
+        self.setEventTimestamp()
+        self.eventTimestampReadable = getReadableTimestamp(self.eventTimestamp)
+        self.setMiniseedDir()
+        self.setWorkingBaseDir()
+        # checked first as index of archive may be created in working base dir (see findArchivedMiniseedFiles)
+        if not self.isWorkingDirWritable():
+            return
+        self.setMiniseedFileInfo()
+        if not self.isMiniseedCountValid():
+            return
+        self.setWorkingDir()
+        self.setChannelMiniseedFiles()
+        self.jobQueue.append(self.createJob())
+        if self.thread is not None:
+            # show number of queued events
+            self.updateProgress(self.progress.value(), self.progress.maximum(), self.progressText)
+        self.startNextJob()
+
+    def createSubmitButton(self):
+        """Create single submit button - default state is inactive"""
+        self.submitBtn = QPushButton(self)
+        self.submitBtn.setText("Submit")
+        # conversion approach is read from radio buttons when event is submitted (see createJob)
+        self.submitBtn.clicked.connect(self.processUserInput)
+        self.generalLayout.addWidget(self.submitBtn)
+        self.submitBtn.setEnabled(False)
+
+
+# settings of an event submitted by user and results of its processing
+class EventJob:
+    def __init__(self, eventTimestamp, miniseedDir, miniseedFileList, workingDir, cacheDir, channelMiniseedFiles,
+                 approach='time', exportTxt=False, exportHtml=False):
+        """
+        eventTimestamp: string holding event timestamp ex.'2020-01-13T163712'
+        miniseedDir: string holding path of directory holding miniseed files
+        miniseedFileList: list of strings holding names of miniseed files
+        workingDir: string holding path of directory in which report (and exports) are written
+        cacheDir: string holding path of cache directory of decoded miniseed data
+        channelMiniseedFiles: list holding a list of miniseed file paths for each channel
+        approach: string holding one of Conversion.approaches
+        exportTxt: bool - True to export miniseed data as text files
+        exportHtml: bool - True to export stats tables as html files
+        """
+        self.eventTimestamp = eventTimestamp
+        self.eventTimestampReadable = getReadableTimestamp(eventTimestamp)
+        self.miniseedDir = miniseedDir
+        self.miniseedFileList = miniseedFileList
+        self.workingDir = workingDir
+        self.cacheDir = cacheDir
+        self.channelMiniseedFiles = channelMiniseedFiles
+        self.approach = approach
+        self.exportTxt = exportTxt
+        self.exportHtml = exportHtml
+        # time at which event was submitted (used to print processing time)
+        self.startTime = time.time()
+
+        # results filled in by ProcessingWorker
+        self.statsTable = StatsTable(self.eventTimestampReadable)
+        self.statsColumnMaxValues = None
+        self.channelResults = None
+        # images of figures rendered off-screen by worker processes (in same order as canvases of PrimaryUI)
+        self.resultsImages = None
+        self.comparisonImages = None
+
+
+# worker processing a single event in background thread (see PrimaryUI.startNextJob)
+# channels are converted by worker processes and reported one by one as they finish, then the eight figures are
+# rendered off-screen in parallel worker processes and report is written from their images - images are handed back
+# to GUI only once all are rendered
+class ProcessingWorker(QObject):
+    # number of steps done, number of steps and description of last step
+    progress = pyqtSignal(int, int, str)
+    # EventJob object holding results
+    finished = pyqtSignal(object)
+    # message of error raised while processing
+    failed = pyqtSignal(str)
+    # EventJob object of event cancelled
+    cancelled = pyqtSignal(object)
+    # emitted last in any case
+    done = pyqtSignal()
+
+    def __init__(self, job, workers=None):
+        """
+        job: EventJob object
+        workers: int holding number of worker processes used for conversion (None to use all cores)
+        """
+        super().__init__()
+        self.job = job
+        self.workers = workers
+        self.cancelEvent = threading.Event()
+        # order of following three lists must remain as is
+        # get stats column names except for static columns
+        self.statsColumnNames = self.job.statsTable.columnHeaders[-4:]
+        self.conversionColumnNames = list(Conversion.resultColumns)
+
+    def cancel(self):
+        """ask worker to stop (checked after each channel is converted, may be called from any thread)"""
+        self.cancelEvent.set()
+
+    def isCancelled(self):
+        return self.cancelEvent.is_set()
+
+    def run(self):
+        """process event (run in background thread) and emit finished, failed or cancelled"""
+        profiling.enable(self.job.eventTimestamp)
+        try:
+            with profiling.span('event', event=self.job.eventTimestamp, approach=self.job.approach):
+                isFinished = self.processEvent()
+            if isFinished:
+                self.finished.emit(self.job)
+            else:
+                self.cancelled.emit(self.job)
+        except Exception as e:
+            logging.exception('error processing event {0}'.format(self.job.eventTimestamp))
+            self.failed.emit('{0}: {1}'.format(type(e).__name__, e))
+        finally:
+            self.writeProfile(profiling.disable())
+            self.done.emit()
+
+    def processEvent(self):
+        """
+        convert channels, draw figures and write report of event (each stage is timed, see writeProfile)
+        return: boolean (False if cancelled)
+        """
+        if self.job.exportTxt:
+            with profiling.span('exportTxt'):
+                self.convertMiniseedToAscii()
+        if self.isCancelled():
+            return False
+        with profiling.span('convertChannels', channels=len(self.job.channelMiniseedFiles)):
+            if not self.convertChannels():
+                return False
+        self.job.statsColumnMaxValues = self.getStatsMaxValues()
+        self.progress.emit(0, 0, 'Drawing figures')
+        with profiling.span('drawFigures'):
+            # each of the eight figures is rendered by its own worker process (see render.renderEventImages)
+            maxValues = dict(zip(self.conversionColumnNames, self.job.statsColumnMaxValues))
+            self.job.resultsImages, self.job.comparisonImages = renderEventImages(self.job.channelResults, maxValues,
+                                                                                  self.workers)
+        self.progress.emit(0, 0, 'Writing report')
+        with profiling.span('writeReport'):
+            self.writeReport()
+        if self.job.exportHtml:
+            with profiling.span('exportHtml'):
+                self.job.statsTable.tableToHtml(self.job.workingDir)
+                self.job.statsTable.tableToHtml(self.job.workingDir, 'acceleration')
+        return True
+
+    def writeProfile(self, profile):
+        """
+        write timing of each stage, file and byte counters of event to profile_<event timestamp>.json in working dir
+        profile: profiling.Profile object
+        """
+        path = os.path.join(self.job.workingDir, 'profile_{0}.json'.format(self.job.eventTimestamp))
+        try:
+            profile.write(path)
+        except OSError as e:
+            logging.warning('could not write profile {0}: {1}'.format(path, e))
+
+    def convertMiniseedToAscii(self):
+        """
+        Convert all miniseed files in miniseed directory to ascii files (TSPAIR format)
+        (only called if user asks for text files as an export - conversion reads miniseed data in memory)
+        """
+        from obspy import read
+        startTime, endTime = getWindowBounds(timestampToUTC(self.job.eventTimestamp))
+        for i, f in enumerate(self.job.miniseedFileList):
+            if self.isCancelled():
+                return
+            mseedPath = os.path.join(self.job.miniseedDir, f)
+            basename = os.path.basename(f).rsplit(".m")[0]
+            filename = basename + ".txt"
+            outPath = os.path.join(self.job.workingDir, filename)
+            profiling.countFiles('read', [mseedPath])
+            stream = read(mseedPath)
+            trimmedStream = stream.trim(startTime, endTime)
+            try:
+                trimmedStream.write(outPath, format='TSPAIR')
+                profiling.countFiles('written', [outPath])
+            except Exception as e:
+                print('error converting miniseed to text file: {0}'.format(e))
+            self.progress.emit(i + 1, len(self.job.miniseedFileList), 'Exported {0}'.format(filename))
+
+    def convertChannels(self):
+        """
+        convert all channels (each channel is read from miniseed files and converted only once, results are used
+        for both stats table and plots), updating stats table and reporting progress as each channel finishes
+        return: boolean (False if cancelled before all channels were converted)
+        """
+        job = self.job
+        total = len(job.channelMiniseedFiles)
+        job.channelResults = [None] * total
+        convertFunction = partial(convertChannelFiles, approach=job.approach)
+        channels = iterChannels(convertFunction, job.channelMiniseedFiles, job.eventTimestamp, self.workers, job.cacheDir)
+        try:
+            for done, (index, channelResult) in enumerate(channels, 1):
+                job.channelResults[index] = channelResult
+                self.updateStatsTable(channelResult)
+                self.progress.emit(done, total, '{0} converted: peak displacement {1} cm'.format(
+                    channelResult.sensorCodeWithChannel, channelResult.dispStats[2]))
+                if self.isCancelled():
+                    return False
+        finally:
+            # cancels channels not yet started if cancelled
+            channels.close()
+        return True
+
+    def updateStatsTable(self, channelResult):
+        """
+        update row of stats table with max values at each of the (currently four) parameters
+        channelResult: instance of ChannelResult class
+        """
+        # accRawPeakVal = channelResult.accRawStats[2]
+        accOffsetPeakVal = channelResult.accOffsetStats[2]
+        accBandpassedPeakVal = channelResult.accBandpassedStats[2]
+        velPeakVal = channelResult.velStats[2]
+        dispPeakVal = channelResult.dispStats[2]
+
+        self.job.statsTable.updateStatsDf(channelResult.sensorCodeWithChannel, self.statsColumnNames[0], accOffsetPeakVal)
+        self.job.statsTable.updateStatsDf(channelResult.sensorCodeWithChannel, self.statsColumnNames[1], accBandpassedPeakVal)
+        self.job.statsTable.updateStatsDf(channelResult.sensorCodeWithChannel, self.statsColumnNames[2], velPeakVal)
+        self.job.statsTable.updateStatsDf(channelResult.sensorCodeWithChannel, self.statsColumnNames[3], dispPeakVal)
+
+    def getStatsMaxValues(self):
+        """
+        get max values from each column of the stats table (called only once after final stats table is completely populated)
+        (ensure that items of statsColumnNames and conversionColumnNames are in the same order)
+        return: list holding max values of each column in stats table
+        """
+        columnMaxValues = []
+        for column in self.statsColumnNames:
+            columnMaxValues.append(self.job.statsTable.getColumnMax(column))
+        print('max values of {0}:\n{1}'.format(self.statsColumnNames, columnMaxValues))
+        return columnMaxValues
+
+    def writeReport(self):
+        """
+        write report_<event timestamp>.pdf holding displacement comparison page, results pages and stats table pages
+        (results pages are images rendered for results canvases, so nothing is plotted twice)
+        """
+        job = self.job
+        reportPath = os.path.join(job.workingDir, 'report_{0}.pdf'.format(job.eventTimestamp))
+        displacementMaxVal = job.statsColumnMaxValues[-1]
+        with ReportWriter(reportPath, job.eventTimestampReadable) as report:
+            # add 25% of maxVal to maxVal to get range of plots along y-axis (same as comparison canvases)
+            report.addComparisonPage(job.channelResults, displacementMaxVal + displacementMaxVal * 0.25)
+            for image in job.resultsImages:
+                report.addImage(image)
+            report.addTablePage(job.statsTable)
+            report.addTablePage(job.statsTable, 'acceleration')
+
+
+# Comparison Figure objects were going to be used to display four plots but ...
+class ComparisonFigure(Figure):
+    def __init__(self, title, width=14, height=20, dpi=100):
+        Figure.__init__(self)
+        self.title = title
+        self.figsize = (width, height)
+        self.dpi = dpi
+
+
+class BaseCanvas(QMainWindow):
+    def __init__(self, windowTitle, width=14, height=20, dpi=100):
+        QMainWindow.__init__(self)
+        self.windowTitle = windowTitle
+        self.setWindowTitle(self.windowTitle)
+        self.figure = Figure(figsize=(width, height), dpi=dpi)
+        self.widget = QWidget()
+        self.setCentralWidget(self.widget)
+        self.vbox = QVBoxLayout()
+        self.widget.setLayout(self.vbox)
+        self.widget.layout().setContentsMargins(0, 0, 0, 0)
+        self.widget.layout().setSpacing(0)
+
+        self.canvas = FigureCanvas(self.figure)
+
+        self.scroll = QScrollArea(self.widget)
+        self.scroll.setWidget(self.canvas)
+
+        self.nav = NavigationToolbar(self.canvas, self.widget)
+        self.widget.layout().addWidget(self.nav)
+        self.widget.layout().addWidget(self.scroll)
+
+    def setFigure(self, figure):
+        """
+        show given figure in place of current one (ex. figure drawn off-screen by ProcessingWorker)
+        figure: matplotlib Figure object
+        """
+        self.figure = figure
+        self.canvas = FigureCanvas(self.figure)
+        # scroll area deletes canvas it held
+        self.scroll.setWidget(self.canvas)
+        nav = NavigationToolbar(self.canvas, self.widget)
+        self.widget.layout().replaceWidget(self.nav, nav)
+        self.nav.deleteLater()
+        self.nav = nav
+
+    # seems that use of QDesktopWidget() causes part of Navigation bar to turn black and/or not appear
+    '''
+    def setScreenLocation(self):
+        """set location of results canvases"""
+        availableGeom = QDesktopWidget().availableGeometry()
+        screenGeom = QDesktopWidget().screenGeometry()
+
+        widgetGeom = self.geometry()
+
+        x = screenGeom.width() - widgetGeom.width()
+        y = screenGeom.height() - widgetGeom.height()
+
+        self.move(x, y)
+    '''
+
+
+# ComparisonCanvas objects used to display four plots
+# wanted to show four ComparisonFigure objects (with four plots each) but seems that
+# each FigureCanvas can only have one Figure object
+class ComparisonCanvas(BaseCanvas):
+    def __init__(self, windowTitle):
+        BaseCanvas.__init__(self, windowTitle, width=4, height=7)
+        self.setFixedSize(450, 800)
+
+
+# ResultsCanvas objects used to display plots for all 24 devices/channels
+# Class has one instance each of:
+#    Figure (which can hold multiple subplots)
+#    FigureCanvas (which holds the figure)
+class ResultsCanvas(BaseCanvas):
+    def __init__(self, windowTitle):
+        BaseCanvas.__init__(self, windowTitle)
+        self.setFixedSize(1470, 1000)
+
+
+# Client code
+def main():
+    """Main function."""
+    # Create an instance of QApplication
+    convertacc = QApplication(sys.argv)
+
+    # Show the application's GUI
+    view = PrimaryUI()
+    view.show()
+
+    # Execute the program's main loop
+    sys.exit(convertacc.exec_())
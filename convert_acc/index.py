@@ -0,0 +1,230 @@
+"""
+SQLite index of a miniseed archive.
+
+A directory tree of miniseed files (ex. the recorder's archive of hourly
+files) is scanned once and the station, channel, start and end time, sampling
+rate and path of each file are recorded in a SQLite database. Later scans only
+read headers of files added or changed since (and drop files removed), so the
+index can be updated before every lookup. The files of an event are then found
+with a time-range query on an indexed column pair instead of a directory
+listing: files of a channel starting within the range padded by the longest
+file duration (kept by an index of its own) are read from index (channel,
+startTime), so both ends of the range are bounded by the index.
+
+Times are stored as microseconds since epoch (same as convert_acc.archive).
+
+usage: python -m convert_acc.index --db FILE --scan DIR [--event 2019-09-26T135930]
+"""
+import os
+import sys
+import logging
+import argparse
+
+from sqlalchemy import create_engine
+from sqlalchemy import MetaData
+from sqlalchemy import Table
+from sqlalchemy import Column
+from sqlalchemy import Index
+from sqlalchemy import Integer
+from sqlalchemy import BigInteger
+from sqlalchemy import Float
+from sqlalchemy import String
+from sqlalchemy import and_
+from sqlalchemy import func
+
+from convert_acc.core import SENSOR_CODES_WITH_CHANNELS
+from convert_acc.core import getSensorCodeInfo
+from convert_acc.core import getDatetime64
+from convert_acc.core import timestampToUTC
+from convert_acc.core import getWindowBounds
+from convert_acc.archive import EPOCH
+
+
+def getMicroseconds(timestamp):
+    """return int holding microseconds since epoch of given time (string, datetime, numpy datetime64 or UTCDateTime)"""
+    return int((getDatetime64(timestamp) - EPOCH).astype('int64'))
+
+
+class MiniseedIndex:
+    """Index of miniseed files held in SQLite database (see module docstring)."""
+    def __init__(self, dbPath):
+        """
+        dbPath: string holding path of SQLite database file (created if necessary) - None to hold index in memory
+            (ex. if no writable location is available, index is then lost once object is deleted)
+        """
+        self.dbPath = dbPath
+        if dbPath is None:
+            self.engine = create_engine('sqlite://')
+        else:
+            self.engine = create_engine('sqlite:///{0}'.format(os.path.abspath(dbPath)))
+        self.metadata = MetaData()
+        self.files = Table(
+            'miniseed_files', self.metadata,
+            Column('id', Integer, primary_key=True),
+            Column('path', String, nullable=False, unique=True),
+            Column('network', String),
+            Column('station', String),
+            # sensor code with channel as given in file name ex. 'B4Fx'
+            Column('channel', String, nullable=False),
+            Column('startTime', BigInteger, nullable=False),
+            Column('endTime', BigInteger, nullable=False),
+            Column('fs', Float),
+            Column('sampleCount', Integer),
+            # size and modification time of file when indexed (file is read again once changed)
+            Column('size', Integer),
+            Column('mtime', Float),
+            Index('ix_miniseed_files_channel_start', 'channel', 'startTime'),
+        )
+        # longest file duration is read from this index (see findFiles)
+        Index('ix_miniseed_files_duration', self.files.c.endTime - self.files.c.startTime)
+        self.metadata.create_all(self.engine)
+
+    def readFileInfo(self, path):
+        """
+        return dict holding row of given miniseed file (only headers of records are read)
+        path: string holding absolute path of miniseed file
+        """
+        from obspy import read
+        stream = read(path, headonly=True)
+        if not stream:
+            raise ValueError('no data in {0}'.format(path))
+        stat = os.stat(path)
+        stats = stream[0].stats
+        return {
+            'path': path,
+            'network': stats.network,
+            'station': stats.station,
+            'channel': getSensorCodeInfo(path)[1],
+            'startTime': getMicroseconds(min(trace.stats.starttime for trace in stream)),
+            'endTime': getMicroseconds(max(trace.stats.endtime for trace in stream)),
+            'fs': float(stats.sampling_rate),
+            'sampleCount': sum(trace.stats.npts for trace in stream),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+        }
+
+    def scan(self, rootDir):
+        """
+        add miniseed (.m) files found in directory tree to index, read files changed since last scan again and
+        remove files no longer found
+        rootDir: string holding path of root directory of archive
+        return: dict holding number of files 'added', 'updated', 'removed', 'unchanged' and 'failed'
+        """
+        rootDir = os.path.abspath(rootDir)
+        with self.engine.connect() as connection:
+            indexed = {row.path: (row.size, row.mtime) for row in connection.execute(
+                self.files.select().where(self.files.c.path.startswith(rootDir + os.sep, autoescape=True)))}
+
+        report = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0, 'failed': 0}
+        rows = []
+        found = set()
+        for dirPath, dirNames, fileNames in os.walk(rootDir):
+            dirNames.sort()
+            for fileName in sorted(fileNames):
+                if not fileName.endswith('.m'):
+                    continue
+                path = os.path.join(dirPath, fileName)
+                found.add(path)
+                stat = os.stat(path)
+                if indexed.get(path) == (stat.st_size, stat.st_mtime):
+                    report['unchanged'] += 1
+                    continue
+                try:
+                    rows.append(self.readFileInfo(path))
+                except Exception as e:
+                    logging.warning('could not index {0}: {1}'.format(path, e))
+                    report['failed'] += 1
+                    continue
+                report['updated' if path in indexed else 'added'] += 1
+
+        removed = [path for path in indexed if path not in found]
+        changed = [row['path'] for row in rows if row['path'] in indexed]
+        report['removed'] = len(removed)
+        with self.engine.begin() as connection:
+            for path in removed + changed:
+                connection.execute(self.files.delete().where(self.files.c.path == path))
+            if rows:
+                connection.execute(self.files.insert(), rows)
+        return report
+
+    def findFiles(self, startTime, endTime, channels=SENSOR_CODES_WITH_CHANNELS):
+        """
+        return rows of files holding data within given time range (inclusive), ordered by channel and start time
+        startTime: start of range (string, datetime, numpy datetime64 or UTCDateTime object)
+        endTime: end of range (same types as startTime)
+        channels: list of strings holding sensor codes with channel of files returned
+        return: list of rows (with attributes named as columns of index, ex. row.path)
+        """
+        c = self.files.c
+        startTime = getMicroseconds(startTime)
+        endTime = getMicroseconds(endTime)
+        with self.engine.connect() as connection:
+            # files holding data within range start no earlier than start of range minus longest file duration
+            maxDuration = connection.execute(func.max(c.endTime - c.startTime).select()).scalar() or 0
+            query = self.files.select().where(and_(c.channel.in_(list(channels)),
+                                                   c.startTime >= startTime - maxDuration,
+                                                   c.startTime <= endTime,
+                                                   c.endTime >= startTime)).order_by(c.channel, c.startTime)
+            return connection.execute(query).fetchall()
+
+    def getChannelFiles(self, startTime, endTime):
+        """
+        return list holding a list of paths of files of each channel (in order of SENSOR_CODES_WITH_CHANNELS, each
+        list sorted by start time) holding data within given time range
+        (raises ValueError if files of any channel are missing)
+        """
+        channelFiles = {}
+        for row in self.findFiles(startTime, endTime):
+            channelFiles.setdefault(row.channel, []).append(row.path)
+        missing = [c for c in SENSOR_CODES_WITH_CHANNELS if c not in channelFiles]
+        if missing:
+            raise ValueError('no indexed miniseed files of {0} within {1} - {2}'.format(
+                ', '.join(missing), startTime, endTime))
+        return [channelFiles[c] for c in SENSOR_CODES_WITH_CHANNELS]
+
+    def getEventChannelFiles(self, eventTimestamp):
+        """
+        return list holding a list of paths of miniseed files of each channel covering window of event
+        eventTimestamp: string holding event timestamp ex.'2020-01-13T163712'
+        """
+        startTime, endTime = getWindowBounds(timestampToUTC(eventTimestamp))
+        return self.getChannelFiles(startTime, endTime)
+
+
+def getParser():
+    """return argparse parser of command line arguments"""
+    parser = argparse.ArgumentParser(prog='python -m convert_acc.index',
+                                     description='Index a miniseed archive and find the files of events.')
+    parser.add_argument('--db', required=True, help='SQLite database file of index (created if necessary)')
+    parser.add_argument('--scan', default=None, help='root directory of archive to add to (or update in) index')
+    parser.add_argument('--event', nargs='+', default=[], help='event timestamps whose files are listed')
+    return parser
+
+
+def main(argv=None):
+    """
+    Main function of archive index.
+    argv: list of strings holding command line arguments (None to use sys.argv)
+    return: int holding exit status (1 if files of any event are missing)
+    """
+    args = getParser().parse_args(argv)
+    index = MiniseedIndex(args.db)
+    if args.scan:
+        report = index.scan(args.scan)
+        print('{added} added, {updated} updated, {removed} removed, {unchanged} unchanged, {failed} failed'.format(
+            **report))
+    status = 0
+    for eventTimestamp in args.event:
+        try:
+            channelFiles = index.getEventChannelFiles(eventTimestamp)
+        except ValueError as e:
+            logging.error('{0}: {1}'.format(eventTimestamp, e))
+            status = 1
+            continue
+        for path in sorted(path for files in channelFiles for path in files):
+            print(path)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+Timing instrumentation of processing stages.
+
+Stages are wrapped in named spans and amounts of work are counted:
+
+    with profiling.span('decodeMiniseed', channel='B4Fx'):
+        ...
+    profiling.countFiles('read', paths)
+
+Nothing is recorded unless a Profile has been enabled in the calling thread -
+span() then returns a shared do-nothing context manager and count() returns at
+once, so the instrumentation stays in place in production. Each thread records
+into a profile of its own (ex. a run in the background thread of the GUI does
+not mix its spans with those of another thread). Spans recorded in worker
+processes are returned along with results (see callProfiled) and merged into
+the profile of the main process, which is written as json by Profile.write.
+"""
+import os
+import json
+import time
+import threading
+from functools import partial
+
+
+# holds profile receiving spans and counters of each thread (see getActiveProfile)
+threadState = threading.local()
+
+
+class NullSpan:
+    """context manager doing nothing (returned by span() while profiling is disabled)"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    """context manager recording duration of a stage into a profile"""
+    def __init__(self, profile, name, attributes):
+        self.profile = profile
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.startTime = time.time()
+        self.startCounter = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, *exc):
+        duration = time.perf_counter() - self.startCounter
+        if excType is not None:
+            self.attributes['failed'] = excType.__name__
+        self.profile.addSpan(self.name, self.startTime, duration, self.attributes)
+        return False
+
+
+class Profile:
+    """Spans and counters of a single run (ex. processing of one event)."""
+    def __init__(self, name=None):
+        """
+        name: string describing run (ex. event timestamp)
+        """
+        self.name = name
+        self.startTime = time.time()
+        self.startCounter = time.perf_counter()
+        self.spans = []
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def addSpan(self, name, startTime, duration, attributes):
+        """
+        record span of stage
+        startTime: float holding wall clock time (seconds since epoch) at which stage started
+        duration: float holding seconds taken by stage
+        attributes: dict holding details of stage (ex. channel)
+        """
+        record = {'name': name, 'start': round(startTime - self.startTime, 6), 'duration': round(duration, 6),
+                  'pid': os.getpid(), 'thread': threading.current_thread().name}
+        record.update(attributes)
+        with self.lock:
+            self.spans.append(record)
+
+    def count(self, name, amount=1):
+        """add amount to counter"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def getRecords(self):
+        """return tuple holding list of spans (with absolute start times) and dict of counters (sent by workers)"""
+        with self.lock:
+            spans = [dict(s, start=s['start'] + self.startTime) for s in self.spans]
+            return spans, dict(self.counters)
+
+    def merge(self, records):
+        """
+        add spans and counters recorded by another profile (ex. in worker process)
+        records: tuple as returned by getRecords
+        """
+        spans, counters = records
+        with self.lock:
+            for s in spans:
+                self.spans.append(dict(s, start=round(s['start'] - self.startTime, 6)))
+            for name, amount in counters.items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def getStages(self):
+        """return dict holding number of spans, total and max seconds keyed by span name"""
+        stages = {}
+        with self.lock:
+            for s in self.spans:
+                stage = stages.setdefault(s['name'], {'count': 0, 'totalSeconds': 0., 'maxSeconds': 0.})
+                stage['count'] += 1
+                stage['totalSeconds'] += s['duration']
+                stage['maxSeconds'] = max(stage['maxSeconds'], s['duration'])
+        for stage in stages.values():
+            stage['totalSeconds'] = round(stage['totalSeconds'], 6)
+        return stages
+
+    def toDict(self):
+        """return dict holding profile (as written to json)"""
+        stages = self.getStages()
+        with self.lock:
+            return {
+                'name': self.name,
+                'startTime': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.startTime)),
+                'elapsedSeconds': round(time.perf_counter() - self.startCounter, 6),
+                'stages': stages,
+                'counters': dict(self.counters),
+                'spans': sorted(self.spans, key=lambda s: s['start']),
+            }
+
+    def write(self, path):
+        """write profile to json file"""
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.toDict(), f, indent=2)
+        os.replace(path + '.tmp', path)
+
+
+def getActiveProfile():
+    """return profile recording in calling thread (None while profiling is disabled)"""
+    return getattr(threadState, 'profile', None)
+
+
+def enable(name=None):
+    """
+    start recording into a new profile in calling thread and return it
+    (raises RuntimeError if a profile is already recording in this thread, see disable)
+    """
+    if getActiveProfile() is not None:
+        raise RuntimeError('profiling is already enabled in thread {0}'.format(threading.current_thread().name))
+    threadState.profile = Profile(name)
+    return threadState.profile
+
+
+def disable():
+    """stop recording in calling thread and return profile recorded (None if profiling was not enabled)"""
+    profile = getActiveProfile()
+    threadState.profile = None
+    return profile
+
+
+def isEnabled():
+    """return True if a profile is recording in calling thread"""
+    return getActiveProfile() is not None
+
+
+def span(name, **attributes):
+    """
+    return context manager recording duration of stage
+    name: string holding name of stage (spans of the same name are summed up in profile)
+    attributes: details of stage (ex. channel='B4Fx')
+    """
+    profile = getActiveProfile()
+    if profile is None:
+        return NULL_SPAN
+    return Span(profile, name, attributes)
+
+
+def count(name, amount=1):
+    """add amount to counter (ex. count('channelsConverted'))"""
+    profile = getActiveProfile()
+    if profile is not None:
+        profile.count(name, amount)
+
+
+def countFiles(direction, paths):
+    """
+    count files and their bytes (files are only looked at while profiling is enabled)
+    direction: string holding either 'read' or 'written'
+    paths: list of strings holding paths of files
+    """
+    profile = getActiveProfile()
+    if profile is None:
+        return
+    size = 0
+    for path in paths:
+        try:
+            size += os.path.getsize(path)
+        except OSError:
+            pass
+    profile.count('files' + direction.capitalize(), len(paths))
+    profile.count('bytes' + direction.capitalize(), size)
+
+
+def callProfiled(function, *args):
+    """
+    call function with a profile of its own (used to run function in worker process)
+    return: tuple holding result of function and records of profile (see Profile.getRecords)
+    """
+    previousProfile = getActiveProfile()
+    profile = threadState.profile = Profile()
+    try:
+        result = function(*args)
+    finally:
+        threadState.profile = previousProfile
+    return result, profile.getRecords()
+
+
+def wrapForWorker(function):
+    """return function to submit to worker processes (records spans in workers if profiling is enabled)"""
+    if getActiveProfile() is None:
+        return function
+    return partial(callProfiled, function)
+
+
+def unwrapResult(result, wrapped):
+    """
+    return result of function submitted to worker process (merging spans recorded by worker)
+    result: result returned by worker
+    wrapped: bool - True if function was wrapped by wrapForWorker
+    """
+    if not wrapped:
+        return result
+    result, records = result
+    profile = getActiveProfile()
+    if profile is not None:
+        profile.merge(records)
+    return result
@@ -0,0 +1,239 @@
+# Filename: render.py
+
+"""
+Off-screen rendering of result and comparison figures.
+
+Each figure is built and saved by its own worker process with the Agg backend
+(no Qt), from the ChannelResult objects of an event holding only the column
+plotted, so the eight figures of an event are rendered in parallel and the
+main process only assembles the images rendered by the workers into a pdf
+(renderEventFigures, comparison figures are written by workers as png files)
+or hands them to the GUI to be shown and added to the report
+(renderEventImages) - no figure is drawn again in the main process.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from convert_acc import profiling
+from convert_acc.core import Conversion
+
+
+# title suffixes of results figures (in same order as Conversion.resultColumns)
+TITLE_SUFFIXES = ['offset acceleration (g)', 'bandpassed acceleration (g)', 'detrended velocity (cm/s)',
+                  'highpassed displacement (cm)']
+
+# resolution (dots per inch) of rendered images (same as figures of canvases of PrimaryUI)
+IMAGE_DPI = 100
+
+# file name, title, corner and direction of each comparison figure (B4 channels appear on both corners)
+COMPARISON_FIGURES = [
+    ('nx.png', 'N. Corner X-Dir (cm)', 'N', 'x'),
+    ('ny.png', 'N. Corner Y-Dir (cm)', 'N', 'y'),
+    ('sx.png', 'S. Corner X-Dir (cm)', 'S', 'x'),
+    ('sy.png', 'S. Corner Y-Dir (cm)', 'S', 'y'),
+]
+
+
+class FigureHolder:
+    """off-screen stand-in for ResultsCanvas and ComparisonCanvas (plot methods of ChannelResult use figure and windowTitle)"""
+    def __init__(self, windowTitle, width, height, dpi=100):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        self.windowTitle = windowTitle
+        self.figure = Figure(figsize=(width, height), dpi=dpi)
+        FigureCanvasAgg(self.figure)
+
+
+def rasterizeFigure(figure):
+    """
+    return numpy uint8 array (rows, columns, RGB) holding pixels of figure drawn with Agg
+    figure: matplotlib Figure object (ex. of FigureHolder)
+    """
+    figure.canvas.draw()
+    return np.asarray(figure.canvas.buffer_rgba())[..., :3].copy()
+
+
+def getImageFigure(image, windowTitle=''):
+    """
+    return matplotlib Figure showing rendered image at its own size (ex. on canvas of PrimaryUI or as page of report)
+    image: numpy uint8 array (rows, columns, RGB) as returned by rasterizeFigure
+    windowTitle: string holding title of figure
+    """
+    holder = FigureHolder(windowTitle, image.shape[1] / IMAGE_DPI, image.shape[0] / IMAGE_DPI, IMAGE_DPI)
+    ax = holder.figure.add_axes([0, 0, 1, 1])
+    # pixels are not resampled, so image is written to pdf as rendered
+    ax.imshow(image, interpolation='none')
+    ax.set_axis_off()
+    return holder.figure
+
+
+def getComparisonChannels(channelResults, corner, direction):
+    """
+    return list of ChannelResult objects shown on comparison figure of given corner and direction (same as PrimaryUI)
+    corner: string holding 'N' or 'S'
+    direction: string holding 'x' or 'y'
+    """
+    return [r for r in channelResults
+            if direction in r.sensorCodeWithChannel and (corner in r.sensorCodeWithChannel or 'B' in r.sensorCodeWithChannel)]
+
+
+def getMaxValues(channelResults):
+    """return dict holding max of (rounded) peak values of all channels keyed by result column (same as stats table)"""
+    return {column: max(r.getStats(column)[2] for r in channelResults) for column in Conversion.resultColumns}
+
+
+def buildResultsFigure(channelResults, column, titleSuffix, yLimit):
+    """
+    return matplotlib Figure holding plots of given column of all channels (run in worker processes)
+    channelResults: list of ChannelResult objects
+    column: string holding name of column plotted
+    titleSuffix: string holding suffix of title of each plot
+    yLimit: float holding range of plots along y-axis (from negative yLimit to yLimit)
+    """
+    with profiling.span('drawFigure', figure=column):
+        holder = FigureHolder(titleSuffix, 14, 20)
+        for r in channelResults:
+            r.plotResultsGraph(holder, column, titleSuffix, yLimit)
+        holder.figure.tight_layout()
+    return holder.figure
+
+
+def buildComparisonFigure(channelResults, windowTitle, yLimit):
+    """
+    return matplotlib Figure comparing displacement of given channels (run in worker processes)
+    channelResults: list of ChannelResult objects (one per floor)
+    windowTitle: string holding title of figure
+    yLimit: float holding range of plots along y-axis (from negative yLimit to yLimit)
+    """
+    with profiling.span('drawFigure', figure=windowTitle):
+        holder = FigureHolder(windowTitle, 4, 7)
+        for r in channelResults:
+            r.plotComparisonGraph(holder, yLimit)
+        holder.figure.tight_layout()
+    return holder.figure
+
+
+def renderResultsImage(channelResults, column, titleSuffix, yLimit):
+    """
+    build figure holding plots of given column of all channels and render it (run in worker processes)
+    (see buildResultsFigure for arguments)
+    return: numpy uint8 array (rows, columns, RGB) holding pixels of figure
+    """
+    with profiling.span('renderFigure', figure=column):
+        return rasterizeFigure(buildResultsFigure(channelResults, column, titleSuffix, yLimit))
+
+
+def renderComparisonImage(channelResults, windowTitle, yLimit):
+    """
+    build comparison figure of displacement of given channels and render it (run in worker processes)
+    (see buildComparisonFigure for arguments)
+    return: numpy uint8 array (rows, columns, RGB) holding pixels of figure
+    """
+    with profiling.span('renderFigure', figure=windowTitle):
+        return rasterizeFigure(buildComparisonFigure(channelResults, windowTitle, yLimit))
+
+
+def renderComparisonFigure(channelResults, windowTitle, yLimit, path):
+    """
+    build comparison figure of displacement of given channels and save it to png (run in worker processes)
+    path: string holding path of png file written (see buildComparisonFigure for other arguments)
+    return: path
+    """
+    with profiling.span('renderFigure', figure=os.path.basename(path)):
+        buildComparisonFigure(channelResults, windowTitle, yLimit).savefig(path)
+    profiling.countFiles('written', [path])
+    return path
+
+
+def getFigureArgs(channelResults, maxValues=None):
+    """
+    return tuple holding list of arguments of buildResultsFigure (one per result column) and list of arguments of
+    buildComparisonFigure (in order of COMPARISON_FIGURES) - channels hold only the column plotted
+    channelResults: list of ChannelResult objects of all channels of event
+    maxValues: dict holding max peak value of each result column, used to set range of plots along y-axis
+        (None to use max of peak values of given channels, see getMaxValues)
+    """
+    if maxValues is None:
+        maxValues = getMaxValues(channelResults)
+    resultsArgs = []
+    for column, titleSuffix in zip(Conversion.resultColumns, TITLE_SUFFIXES):
+        # add 50% of max value to max value to get range of plots along y-axis (same as PrimaryUI)
+        resultsArgs.append(([r.getSubset([column]) for r in channelResults], column, titleSuffix,
+                            maxValues[column] * 1.5))
+    column = 'highpassed_displacement_cm'
+    comparisonArgs = []
+    for _, title, corner, direction in COMPARISON_FIGURES:
+        channels = [r.getSubset([column]) for r in getComparisonChannels(channelResults, corner, direction)]
+        comparisonArgs.append((channels, title, maxValues[column] * 1.25))
+    return resultsArgs, comparisonArgs
+
+
+def submitJobs(executor, jobs):
+    """
+    submit jobs to executor and return their results (in order of jobs) once all are done
+    executor: concurrent.futures executor (ex. ProcessPoolExecutor)
+    jobs: list of tuples holding module-level function followed by its arguments
+    """
+    # spans recorded in worker processes are returned along with results when profiling
+    wrapped = profiling.isEnabled()
+    futures = [executor.submit(profiling.wrapForWorker(job[0]), *job[1:]) for job in jobs]
+    return [profiling.unwrapResult(f.result(), wrapped) for f in futures]
+
+
+def runJobs(jobs, workers=None, executor=None):
+    """
+    call each function with its arguments in worker processes
+    jobs: list of tuples holding module-level function followed by its arguments
+    workers: int holding number of worker processes (None to use all cores, 1 to call functions in this process)
+    executor: executor to which jobs are submitted (ex. pool shared with conversion of other events, workers is then
+        ignored) - None to start a pool of given number of workers
+    return: list holding result of each job (in order of jobs)
+    """
+    if executor is not None:
+        return submitJobs(executor, jobs)
+    if workers == 1:
+        return [job[0](*job[1:]) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(jobs))) as executor:
+        return submitJobs(executor, jobs)
+
+
+def renderEventImages(channelResults, maxValues=None, workers=None):
+    """
+    render results figures and comparison figures of an event in parallel - only images are sent back from workers
+    (ex. to be shown on canvases of PrimaryUI and added to report, see getImageFigure)
+    (see getFigureArgs and runJobs for arguments)
+    return: tuple holding list of images of results figures (in order of Conversion.resultColumns) and list of images
+        of comparison figures (in order of COMPARISON_FIGURES)
+    """
+    resultsArgs, comparisonArgs = getFigureArgs(channelResults, maxValues)
+    jobs = ([(renderResultsImage,) + args for args in resultsArgs]
+            + [(renderComparisonImage,) + args for args in comparisonArgs])
+    images = runJobs(jobs, workers)
+    return images[:len(resultsArgs)], images[len(resultsArgs):]
+
+
+def renderEventFigures(channelResults, outputDir, maxValues=None, workers=None, executor=None):
+    """
+    render results figures (one pdf page per result column) and comparison figures of an event in parallel
+    writes <outputDir>/results.pdf and <outputDir>/nx.png, ny.png, sx.png and sy.png (results pages are images
+    rendered by workers, streamed into a single pdf by ReportWriter - no single-page pdf is written or parsed)
+    channelResults: list of ChannelResult objects of all channels of event
+    outputDir: string holding path of directory in which figures are written
+    (see getFigureArgs and runJobs for other arguments)
+    return: list of strings holding paths of files written
+    """
+    # report module imports this module
+    from convert_acc.report import ReportWriter
+    resultsArgs, comparisonArgs = getFigureArgs(channelResults, maxValues)
+    jobs = ([(renderResultsImage,) + args for args in resultsArgs]
+            + [(renderComparisonFigure,) + args + (os.path.join(outputDir, figure[0]),)
+               for args, figure in zip(comparisonArgs, COMPARISON_FIGURES)])
+    results = runJobs(jobs, workers, executor)
+
+    resultsPath = os.path.join(outputDir, 'results.pdf')
+    with ReportWriter(resultsPath) as report:
+        for image in results[:len(resultsArgs)]:
+            report.addImage(image)
+    return [resultsPath] + results[len(resultsArgs):]
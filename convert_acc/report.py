@@ -0,0 +1,277 @@
+# Filename: report.py
+
+"""Stats table and pdf report of convert_acc (tables and figures are drawn with matplotlib, imported when a pdf is written)."""
+import os
+
+import pandas as pd
+
+from convert_acc import profiling
+from convert_acc.core import SENSOR_CODES_WITH_CHANNELS
+from convert_acc.core import getFloorCode
+from convert_acc.core import getAxis
+from convert_acc.core import getResourcePath
+from convert_acc.render import COMPARISON_FIGURES
+from convert_acc.render import FigureHolder
+from convert_acc.render import getImageFigure
+from convert_acc.render import getComparisonChannels
+
+
+'''
+# used only for fpdf - remove later if fpdf not used at all
+class ReportTemplate(FPDF, HTMLMixin):
+
+    def header(self):
+        # Logo
+        self.image(getResourcePath('resources/placeholder.png'), x=7, y=6, w=45)
+        # Arial bold 15
+        self.set_font('Arial', 'B', 15)
+        # Move to the right
+        self.cell(120)
+        # Title
+        #self.cell(30, 10, 'Title', 1, 0, 'C')
+        self.cell(w=73, h=10, txt='SUMMARY REPORT', border=0, ln=1, align='R')
+
+        self.set_font('Arial', '', 9)
+        self.set_text_color(r=128, g=128, b=128)
+        self.cell(w=193, h=0, txt='assessment of impact due to building motion', border=0, ln=1, align='R')
+        # self.ln(1)
+        self.line(8,23,202,23)
+        self.ln(2)
+
+        self.set_text_color(0,0,0)
+        self.set_font('Arial', 'B', 8)
+        self.set_x(7)
+        self.cell(w=10, h=7, txt='EVENT:', border=0, ln=0, align='L')
+        
+        self.cell(w=1)
+        self.set_text_color(0,0,255)
+        self.cell(w=25, h=7, txt='2019-09-26 10:00:00 UTC', border=0, ln=0, align='L')
+
+        self.cell(w=118)
+        self.set_text_color(0,0,0)
+        self.cell(w=20, h=7, txt='SITE:', border=0, ln=0, align='L')
+        self.cell(w=2)
+        self.set_text_color(0,0,255)
+        self.cell(w=20, h=7, txt='Some Building, Istanbul', border=0, ln=0, align='R')
+
+        # Line break
+        self.ln(2)
+
+        # draw box - can't be in __init__() - move elsewhere?
+        self.rect(x=8, y=28, w=194, h=252)
+
+        # why doesn't this draw?
+        self.ellipse(x=50, y=50, w=5, h=5, style='F')
+
+    # Page footer
+    def footer(self):
+        # Position at 1.5 cm from bottom
+        self.set_y(-15)
+        self.set_x(8)
+
+        self.set_font('Arial', 'I', 5)
+        self.set_text_color(r=128, g=128, b=128)
+        # self.cell(8)
+        self.cell(w=180, h=0, txt='GRM shall have no liability or responsibility to any person or entity with respect to any liability, loss, or damage caused or alleged to be caused directly or indirectly by use of this report. Content is subject to limitations from process assumptions', border=0, ln=1, align='L')
+        self.cell(w=180, h=3, txt='and uncertainties.', border=0, ln=1, align='L')
+
+        self.set_text_color(0,0,0)
+        # Arial italic 8
+        self.set_font('Arial', '', 6)
+        # Page number
+        self.cell(10, 10, 'page ' + str(self.page_no()) + ' of 5', 0, 0, 'L')
+
+        #self.set_font('Arial', 'B', 15)
+        self.cell(7, 7, '', border=0, ln=0, align='C')
+        self.set_font('Arial', '', 6)
+        self.cell(27, 10, 'created by AT-SHM v1.0 on', border=0, ln=0, align='L')
+        self.set_text_color(0,0,255)
+        self.cell(10, 10, time.strftime('%Y-%m-%d %H:%M:%S UTC+3', time.localtime()), border=0, ln=0, align='L')
+
+        self.image(getResourcePath('resources/two_logos2.png'), x=160, y=285, w=45)
+'''
+
+# table holding peak values for acceleration, velocity, and displacement for each
+# channel of each device (modeled after third-party report)
+class StatsTable:
+    # colours of header row and of odd and even rows (same as stats_table_template.html)
+    headerColor = '#d3d3d3'
+    rowColors = ('#b8d1f3', '#dae5f4')
+
+    def __init__(self, eventTimestampReadable):
+        self.eventTimestampReadable = eventTimestampReadable
+        self.columnHeaders = ['Ch', 'ID', 'Floor', 'Axis', 'Offset Acc (g)', 'Acc (g)', 'Vel (cm/s)', 'Disp (cm)']
+        self.df = pd.DataFrame(columns=self.columnHeaders)
+
+        self.populateStaticColumns()
+
+    def populateStaticColumns(self):
+        channels = [x for x in range(1, 25)]
+        self.df['Ch'] = channels
+        self.df['ID'] = SENSOR_CODES_WITH_CHANNELS
+        floors = [getFloorCode(x) for x in SENSOR_CODES_WITH_CHANNELS]
+        self.df['Floor'] = floors
+        axes = [getAxis(x) for x in SENSOR_CODES_WITH_CHANNELS]
+        self.df['Axis'] = axes
+
+    def updateStatsDf(self, sensorCodeWithChannel, statsColumnName, value):
+        """
+        update stats dataframe where 'ID' equals sensorCodeWithChannel
+        sensorCodeWithChannel: string holding sensor code with channel (from Conversion object)
+        statsColumnName: string holding name of stats table dataframe column to be updated
+        value: value to be set in statsDf (will come from stats of Conversion object)
+        """
+        self.df.loc[self.df['ID'] == sensorCodeWithChannel, statsColumnName] = value
+
+    def getColumnMax(self, statsColumnName):
+        """
+        get maximum value in given column
+        statsColumnName: string holding name of stats table dataframe column from which to find maximum value
+        """
+        return self.df[statsColumnName].max()
+
+    def printTable(self):
+        """print stats table to console"""
+        print(self.df)
+
+    def getTableDf(self, columns='all'):
+        """
+        return dataframe holding columns of given table
+        columns: string holding 'all' for all columns or 'acceleration' for bandpassed acceleration only
+        """
+        if columns == 'acceleration':
+            return self.df[['Ch', 'ID', 'Floor', 'Axis', 'Acc (g)']]
+        return self.df
+
+    def drawTable(self, ax, columns='all'):
+        """
+        draw table on given axes with same styling as html export (stats_table_template.html):
+        grey header row, rows alternately shaded blue and light blue, centered text and no cell borders
+        ax: matplotlib Axes object (table fills full width of axes)
+        columns: string holding 'all' for all columns or 'acceleration' for bandpassed acceleration only
+        return: matplotlib Table object
+        """
+        ax.axis('off')
+        df = self.getTableDf(columns)
+        table = ax.table(cellText=df.fillna('').values, colLabels=list(df.columns), loc='upper center',
+                         cellLoc='center')
+        table.auto_set_font_size(False)
+        table.set_fontsize(8)
+        table.scale(1, 1.5)
+        for (row, _), cell in table.get_celld().items():
+            if row == 0:
+                cell.set_facecolor(self.headerColor)
+                cell.get_text().set_fontweight('bold')
+            else:
+                cell.set_facecolor(self.rowColors[(row - 1) % 2])
+            cell.set_linewidth(0)
+        return table
+
+    def tableToHtml(self, workingDir, columns='all'):
+        """
+        export stats table as html file (optional, report pdf does not use html)
+        workingDir: string holding path to working directory (where html file will be created)
+        columns: string holding 'all' for all columns or 'acceleration' for bandpassed acceleration only
+        return: string holding path of html file
+        """
+        html = self.getTableDf(columns).to_html(index=False, border=0)
+        htmlFile = os.path.join(workingDir, self.getFileName(columns) + '.html')
+        with open(getResourcePath('resources/stats_table_template.html'), 'r') as inFile:
+            tableText = inFile.read().replace('insert table', html)
+        with open(htmlFile, 'w') as outFile:
+            outFile.write(tableText)
+        profiling.countFiles('written', [htmlFile])
+        return htmlFile
+
+    def tableToPdf(self, workingDir, columns='all'):
+        """
+        draw stats table as single-page pdf (same page as in report, see ReportWriter.addTablePage)
+        workingDir: string holding path to working directory (where pdf will be created)
+        columns: string holding 'all' for all columns or 'acceleration' for bandpassed acceleration only
+        return: string holding path of pdf file
+        """
+        pdfFile = os.path.join(workingDir, self.getFileName(columns) + '.pdf')
+        with ReportWriter(pdfFile, self.eventTimestampReadable) as report:
+            report.addTablePage(self, columns)
+        return pdfFile
+
+    def getFileName(self, columns='all'):
+        """return string holding file name (without extension) of exported table ex. 'stats_table_all'"""
+        return 'stats_table_acc' if columns == 'acceleration' else 'stats_table_all'
+
+
+# multi-page pdf report of an event (comparison page, results pages and stats table pages)
+class ReportWriter:
+    """
+    Every page is drawn as a matplotlib figure and streamed straight into a single pdf with PdfPages,
+    so no png, html or single-page pdf files are written and no pdf is parsed again.
+    """
+    # size of pages drawn by this class (A4 in inches)
+    pageSize = (8.27, 11.69)
+
+    def __init__(self, path, eventTimestampReadable=None):
+        """
+        path: string holding path of pdf file written
+        eventTimestampReadable: string holding event timestamp ex. '2019-09-26 13:59:30' shown in titles of comparison
+            and table pages (None if only figures or images are added, ex. results.pdf of render.renderEventFigures)
+        """
+        from matplotlib.backends.backend_pdf import PdfPages
+        self.path = path
+        self.eventTimestampReadable = eventTimestampReadable
+        self.pdf = PdfPages(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def newPage(self, title):
+        """return matplotlib Figure of page size with given title at top left"""
+        figure = FigureHolder(title, *self.pageSize).figure
+        figure.text(0.05, 0.97, title, fontsize=10, fontweight='bold')
+        return figure
+
+    def addFigure(self, figure):
+        """add given matplotlib Figure (ex. figure of ResultsCanvas) as a page"""
+        with profiling.span('writePdfPage'):
+            self.pdf.savefig(figure)
+
+    def addImage(self, image):
+        """
+        add rendered figure as a page (pixels are written as they are, nothing is drawn again)
+        image: numpy uint8 array (rows, columns, RGB) as returned by render.rasterizeFigure
+        """
+        self.addFigure(getImageFigure(image))
+
+    def addComparisonPage(self, channelResults, yLimit):
+        """
+        add page holding four comparison figures of displacement (N and S corners, x and y directions)
+        channelResults: list of ChannelResult objects of all channels
+        yLimit: float holding value to be used to set range of plots along y-axis (from negative yLimit to yLimit)
+        """
+        from matplotlib.gridspec import GridSpec, GridSpecFromSubplotSpec
+        figure = self.newPage('Unconfirmed preliminary results for event: {0} UTC+3'.format(self.eventTimestampReadable))
+        grid = GridSpec(2, 2, left=0.1, right=0.95, bottom=0.04, top=0.93, wspace=0.4, hspace=0.15)
+        for cell, (_, title, corner, direction) in zip(grid, COMPARISON_FIGURES):
+            floorGrid = GridSpecFromSubplotSpec(4, 1, subplot_spec=cell, hspace=0.3)
+            for r in getComparisonChannels(channelResults, corner, direction):
+                ax = figure.add_subplot(floorGrid[r.comparisonSubplotDict[r.floor] - 1])
+                r.drawComparisonAxes(ax, yLimit, title)
+        self.addFigure(figure)
+
+    def addTablePage(self, statsTable, columns='all'):
+        """
+        add page holding stats table
+        statsTable: StatsTable object
+        columns: string holding 'all' for all columns or 'acceleration' for bandpassed acceleration only
+        """
+        figure = self.newPage('Peak values for event: {0} UTC+3'.format(self.eventTimestampReadable))
+        statsTable.drawTable(figure.add_axes([0.05, 0.05, 0.9, 0.88]), columns)
+        self.addFigure(figure)
+
+    def close(self):
+        """finish writing pdf"""
+        self.pdf.close()
+        profiling.countFiles('written', [self.path])
@@ -0,0 +1,230 @@
+"""
+Synthetic acceleration data of all channels for load and scaling tests.
+
+Files are written in the layout of the recorder: one miniseed file (and
+optionally one TSPAIR text file) per channel and UTC hour, named
+YYYYMMDDHHMMSS.ALZ.NNN.<code>.m (NNN being the number of the sensor unit).
+Data are background noise around a constant offset, with seismic pulses
+(decaying sine waves, larger on upper floors) injected at given times. Counts
+are encoded with the gain and sensitivities used by Conversion, so converted
+acceleration holds the amplitudes given here.
+
+Events are written the same way as by the recorder (all hours covering the
+window of the event, see getWindowBounds), one directory per event named by
+event timestamp, as read by convert_acc.batch.
+
+usage: python -m convert_acc.synthetic --output DIR [--events 2019-09-26T135930 ...] [--hours N] [--tspair]
+"""
+import os
+import sys
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+from convert_acc.core import SENSOR_CODES_WITH_CHANNELS
+from convert_acc.core import getSensorCode
+from convert_acc.core import getSensitivity
+from convert_acc.core import getFloor
+from convert_acc.core import getDatetime64
+from convert_acc.core import timestampToUTC
+from convert_acc.core import getWindowBounds
+
+
+# counts per volt of recorder (inverse of gain used by Conversion.convertCountToG)
+COUNTS_PER_VOLT = 8388608 / 2.5
+
+# seismic pulse injected into data of all channels
+# time: numpy datetime64 holding (UTC) time of onset
+# amplitude: float holding peak acceleration in g at ground floor (horizontal axes)
+# frequency: float holding frequency of oscillation in Hz
+# decay: float holding time constant of exponential decay in seconds
+Pulse = namedtuple('Pulse', ['time', 'amplitude', 'frequency', 'decay'])
+
+
+def getAmplification(sensorCodeWithChannel):
+    """
+    return float holding factor by which pulses are amplified at sensor (1 at ground floor, growing with floor,
+    vertical axes at half the horizontal amplitude)
+    sensorCodeWithChannel: string holding sensor code and axis ex. 'N39x'
+    """
+    factor = 1.
+    if sensorCodeWithChannel[0] in ['N', 'S']:
+        factor += int(getFloor(sensorCodeWithChannel)) / 26.
+    if sensorCodeWithChannel[-1] in ['z', 'Z']:
+        factor *= 0.5
+    return factor
+
+
+def getUnitNumber(sensorCodeWithChannel):
+    """return int holding number of sensor unit of channel (NNN in file names, one unit per three channels)"""
+    return SENSOR_CODES_WITH_CHANNELS.index(sensorCodeWithChannel) // 3 + 1
+
+
+def getFileName(hourStart, sensorCodeWithChannel, extension='m'):
+    """
+    return string holding name of file of channel ex. '20190926100000.ALZ.007.B4Fx.m'
+    hourStart: numpy datetime64 holding start of hour (or time of first sample) of file
+    extension: string holding 'm' for miniseed or 'txt' for TSPAIR
+    """
+    timeText = str(hourStart.astype('datetime64[s]')).replace('-', '').replace(':', '').replace('T', '')
+    return '{0}.ALZ.{1:03d}.{2}.{3}'.format(timeText, getUnitNumber(sensorCodeWithChannel), sensorCodeWithChannel,
+                                            extension)
+
+
+def getSyntheticCounts(sensorCodeWithChannel, startTime, sampleCount, fs=100., noise=200., pulses=(), seed=0):
+    """
+    return counts of channel holding noise around offset and given pulses
+    sensorCodeWithChannel: string holding sensor code and axis ex. 'B4Fx'
+    startTime: numpy datetime64 holding (UTC) time of first sample
+    sampleCount: int holding number of samples
+    fs: sampling rate
+    noise: float holding standard deviation of background noise in counts
+    pulses: list of Pulse records
+    seed: int holding seed of random numbers (same seed and channel give same counts)
+    return: numpy int32 array
+    """
+    rng = np.random.default_rng([seed, SENSOR_CODES_WITH_CHANNELS.index(sensorCodeWithChannel)])
+    offset = rng.uniform(-50000, 50000)
+    counts = rng.normal(offset, noise, sampleCount)
+    countsPerG = getSensitivity(sensorCodeWithChannel) * COUNTS_PER_VOLT * getAmplification(sensorCodeWithChannel)
+    for pulse in pulses:
+        onset = (getDatetime64(pulse.time) - startTime) / np.timedelta64(1, 's')
+        first = max(int(np.ceil(onset * fs)), 0)
+        # pulses have decayed to less than 1e-6 of amplitude after 14 time constants
+        stop = min(int((onset + 14 * pulse.decay) * fs) + 1, sampleCount)
+        if first >= stop:
+            continue
+        t = np.arange(first, stop) / fs - onset
+        phase = rng.uniform(0, 2 * np.pi)
+        counts[first:stop] += (pulse.amplitude * countsPerG * np.exp(-t / pulse.decay)
+                               * np.sin(2 * np.pi * pulse.frequency * t + phase) * np.minimum(t * pulse.frequency, 1))
+    return np.round(counts).astype(np.int32)
+
+
+def getHourSegments(startTime, sampleCount, fs):
+    """
+    return list of (hour start, first sample, stop sample) tuples splitting samples at (UTC) hour boundaries
+    startTime: numpy datetime64 holding time of first sample
+    """
+    segments = []
+    first = 0
+    while first < sampleCount:
+        sampleTime = startTime + np.timedelta64(int(round(first * 1e6 / fs)), 'us')
+        hourStart = sampleTime.astype('datetime64[h]').astype('datetime64[us]')
+        nextHour = hourStart + np.timedelta64(1, 'h')
+        stop = min(int(np.ceil((nextHour - startTime) / np.timedelta64(1, 'us') * fs / 1e6)), sampleCount)
+        segments.append((hourStart, first, stop))
+        first = stop
+    return segments
+
+
+def writeChannelFiles(outputDir, sensorCodeWithChannel, counts, startTime, fs=100., formats=('mseed',),
+                      splitHours=True):
+    """
+    write counts of channel to miniseed and/or TSPAIR files
+    outputDir: string holding path of directory written to
+    counts: numpy int32 array holding counts
+    startTime: numpy datetime64 holding (UTC) time of first sample
+    formats: list of strings holding 'mseed' and/or 'tspair'
+    splitHours: bool - if True, one file is written per (UTC) hour, otherwise a single file named by first sample
+    return: list of strings holding paths of files written
+    """
+    from obspy import Trace, UTCDateTime
+    if splitHours:
+        segments = getHourSegments(startTime, len(counts), fs)
+    else:
+        segments = [(startTime, 0, len(counts))]
+    paths = []
+    for fileTime, first, stop in segments:
+        header = {'network': 'AT', 'station': 'ALZ', 'channel': getSensorCode(sensorCodeWithChannel)[:3],
+                  'sampling_rate': fs,
+                  'starttime': UTCDateTime(str(startTime + np.timedelta64(int(round(first * 1e6 / fs)), 'us')))}
+        trace = Trace(np.ascontiguousarray(counts[first:stop]), header=header)
+        if 'mseed' in formats:
+            paths.append(os.path.join(outputDir, getFileName(fileTime, sensorCodeWithChannel, 'm')))
+            trace.write(paths[-1], format='MSEED', encoding='STEIM2')
+        if 'tspair' in formats:
+            paths.append(os.path.join(outputDir, getFileName(fileTime, sensorCodeWithChannel, 'txt')))
+            trace.write(paths[-1], format='TSPAIR')
+    return paths
+
+
+def writeChannels(outputDir, startTime, duration, fs=100., noise=200., pulses=(), seed=0,
+                  channels=SENSOR_CODES_WITH_CHANNELS, formats=('mseed',), splitHours=True):
+    """
+    write synthetic data of given channels
+    outputDir: string holding path of directory written to (created if necessary)
+    startTime: (UTC) time of first sample (string, datetime, numpy datetime64 or UTCDateTime object)
+    duration: float holding seconds of data of each channel
+    channels: list of strings holding sensor codes with channel
+    (see getSyntheticCounts and writeChannelFiles for other arguments)
+    return: list holding a list of paths of files written for each channel
+    """
+    os.makedirs(outputDir, exist_ok=True)
+    startTime = getDatetime64(startTime)
+    sampleCount = int(round(duration * fs))
+    channelFiles = []
+    for sensorCodeWithChannel in channels:
+        counts = getSyntheticCounts(sensorCodeWithChannel, startTime, sampleCount, fs, noise, pulses, seed)
+        channelFiles.append(writeChannelFiles(outputDir, sensorCodeWithChannel, counts, startTime, fs, formats,
+                                              splitHours))
+    return channelFiles
+
+
+def writeEvent(outputDir, eventTimestamp, hours=None, fs=100., noise=200., amplitude=0.01, frequency=2., decay=10.,
+               seed=0, formats=('mseed',)):
+    """
+    write files of all channels covering window of event with a pulse at event time
+    outputDir: string holding path of directory written to
+    eventTimestamp: string holding event timestamp in local time ex.'2019-09-26T135930'
+    hours: int holding number of hours written from start of hour of window (None for all hours covering window,
+        two if window crosses an hour boundary)
+    amplitude, frequency, decay: parameters of pulse (see Pulse)
+    return: list holding a list of paths of files written for each channel
+    """
+    eventTime = getDatetime64(timestampToUTC(eventTimestamp))
+    windowStart, windowEnd = [getDatetime64(t) for t in getWindowBounds(timestampToUTC(eventTimestamp))]
+    startTime = windowStart.astype('datetime64[h]').astype('datetime64[us]')
+    if hours is None:
+        endTime = windowEnd.astype('datetime64[h]').astype('datetime64[us]') + np.timedelta64(1, 'h')
+        hours = int((endTime - startTime) / np.timedelta64(1, 'h'))
+    pulses = [Pulse(eventTime, amplitude, frequency, decay)]
+    return writeChannels(outputDir, startTime, hours * 3600, fs, noise, pulses, seed, formats=formats)
+
+
+def getParser():
+    """return argparse parser of command line arguments"""
+    parser = argparse.ArgumentParser(prog='python -m convert_acc.synthetic',
+                                     description='Write synthetic miniseed (and TSPAIR) files of all channels.')
+    parser.add_argument('--output', required=True, help='directory in which a directory is written for each event')
+    parser.add_argument('--events', nargs='+', default=['2019-09-26T135930'],
+                        help='event timestamps in local time (default: 2019-09-26T135930)')
+    parser.add_argument('--hours', type=int, default=None,
+                        help='hours written per event (default: all hours covering window of event)')
+    parser.add_argument('--fs', type=float, default=100., help='sampling rate (default: 100)')
+    parser.add_argument('--noise', type=float, default=200., help='standard deviation of noise in counts (default: 200)')
+    parser.add_argument('--amplitude', type=float, default=0.01, help='peak acceleration of pulse in g (default: 0.01)')
+    parser.add_argument('--frequency', type=float, default=2., help='frequency of pulse in Hz (default: 2)')
+    parser.add_argument('--decay', type=float, default=10., help='decay time constant of pulse in seconds (default: 10)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of random noise (default: 0)')
+    parser.add_argument('--tspair', action='store_true', help='also write TSPAIR text files')
+    return parser
+
+
+def main(argv=None):
+    """
+    Main function of synthetic data generator.
+    argv: list of strings holding command line arguments (None to use sys.argv)
+    """
+    args = getParser().parse_args(argv)
+    formats = ('mseed', 'tspair') if args.tspair else ('mseed',)
+    for eventTimestamp in args.events:
+        channelFiles = writeEvent(os.path.join(args.output, eventTimestamp), eventTimestamp, args.hours, args.fs,
+                                  args.noise, args.amplitude, args.frequency, args.decay, args.seed, formats)
+        print('{0}: {1} files'.format(eventTimestamp, sum(len(files) for files in channelFiles)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
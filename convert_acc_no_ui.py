@@ -9,13 +9,14 @@ import os
 import subprocess
 import pandas as pd
 import numpy as np
-from scipy.signal import butter, lfilter, detrend
 import math
 import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import convert_acc
 
 
 from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
 
 
 __version__ = '0.1'
@@ -37,6 +38,8 @@ fix inconsisent use of sensor code naming (prefixes, sensorCode, sensorCodeWithC
 
 SENSOR_CODES = ('N39', 'S39', 'N24', 'S24', 'N12', 'S12', 'B4F', 'FF')
 
+PLOT_DIR = "/home/grm/acc-data-conversion/working/no_ui/plots"
+
 
 def getAllSensorCodesWithChannels():
     """
@@ -299,285 +302,58 @@ class ProcessedFromTxtFile:
 
 
 # class used to convert data from count to acceleration, velocity, and displacement
-class Conversion:
-    def __init__(self, df, sensorCode, sensorCodeWithChannel, eventTimestamp):
-        self.df = df
-        self.sensorCode = sensorCode
-        self.sensorCodeWithChannel = sensorCodeWithChannel
-        self.eventTimestamp = eventTimestamp
-        self.sensitivity = None
-
-        self.plotDir = "/home/grm/acc-data-conversion/working/no_ui/plots"
-
-        self.accRawStats = None
-        self.accOffsetStats = None
-        self.accBandpassedStats = None
-        self.velStats = None
-        self.dispStats = None
-
-        # int holding number of samples (at head of dataset) to ignore when plotting and getting stats
-        self.ignoredSamples = 7000
-
-        # these may be taken from user in future
+# (array core of convert_acc with parameters of this script - results are kept as ChannelResult records)
+class Conversion(convert_acc.Conversion):
+    def __init__(self, sensorCode, sensorCodeWithChannel, eventTimestamp, fs=100):
+        convert_acc.Conversion.__init__(self, None, sensorCode, sensorCodeWithChannel, eventTimestamp, fs)
         # low cutoff frequency for bandpass and highpass filters
         self.lowcut = 0.07
-        # high cutoff frequency for bandpass filter
-        self.highcut = 40
-        # sampling frequency
-        self.fs = 100
-        # order of filters
-        self.order = 2
-        # time between samples in seconds
-        self.dt = 1/float(self.fs)
-        
-        self.truncateDf()
-        self.setSensitivity()
-        self.convertCountToG()
-        self.addZeroPad()
-        self.convertGToOffsetG()
-        self.convertGToMetric()
-
-        self.butterBandpassFilter('offset_g', 'bandpassed_g')
-        self.butterBandpassFilter('acc_ms2', 'bandpassed_ms2')
-
-        self.integrateDfColumn('bandpassed_ms2', 'velocity_ms')
-
-        self.clipDf()
-
-        self.detrendData('velocity_ms', 'detrended_velocity_ms')
-
-        self.convertMToCm('detrended_velocity_ms', 'detrended_velocity_cms')
-        
-        self.integrateDfColumn('detrended_velocity_ms', 'displacement_m')
-
-        self.detrendData('displacement_m', 'detrended_displacement_m')
-
-        self.butterHighpassFilter('detrended_displacement_m', 'highpassed_displacement_m')
-
-        self.convertMToCm('highpassed_displacement_m', 'highpassed_displacement_cm')
-
-        self.accRawStats = self.getStats('g')
-        self.accOffsetStats = self.getStats('offset_g')
-        self.accBandpassedStats = self.getStats('bandpassed_g')
-        self.velStats = self.getStats('detrended_velocity_cms')
-        self.dispStats = self.getStats('highpassed_displacement_cm')
-        
-        
-    def logHeadTail(self):
-        """print head and tail of self.df to console"""
-        logging.debug(self.df.head())
-        logging.debug(self.df.tail())
-    
-    
-    def truncateDf(self):
-        """
-        truncate self.df based on timestamp for known time event
-        args: 
-        eventTimestamp: string holding timestamp (same as event dir name) 
-        in format: '2020-01-13T163712'
-        """
-        # convert string timestamp to pandas Timestamp instance
-        eventTimestamp = pd.Timestamp(self.eventTimestamp)
-        # convert timestamp from local Turkish time to UTC
-        eventTimestamp = eventTimestamp - pd.Timedelta('3 hours')
-        startTime = eventTimestamp - pd.Timedelta('1 minute')
-        endTime = startTime + pd.Timedelta('400 seconds')
-        
-        # see caveats in pandas docs on this!!
-        self.df = self.df.loc[(self.df['timestamp'] > startTime) & (self.df['timestamp'] <= endTime)]
-        logging.info('start time: {}'.format(startTime))
-        logging.info('end time: {}'.format(endTime))
-        self.logHeadTail()
-        
-        
-    def setSensitivity(self):
-        """
-        return float holding sensitivity in V/g based on sensorCode
-        """
-        # CHECK AUTOPRO REPORT ON THIS - FF SHOULD GET SAME AS GROUND FLOOR
-        groundFloorSensorCodes = [c for c in SENSOR_CODES if c.endswith('F')]
-        upperFloorSensorCodes = [c for c in SENSOR_CODES if not c.endswith('F')]
-        for code in groundFloorSensorCodes:
-            if self.sensorCode.startswith(code):
-                self.sensitivity = 1.25
-        for code in upperFloorSensorCodes:
-            if self.sensorCode.startswith(code):
-                self.sensitivity = 0.625
-        if self.sensitivity:
-            return self.sensitivity
-        else:
-            raise ValueError('Non-null value must be assigned to sensitivity.')
-        
-            
-    def convertCountToG(self):
-        """
-        add new column to df holding acceleration in g (converted from raw counts)
-        """
-        self.df['g'] = self.df['count'] * (2.5/8388608) * (1/self.sensitivity)
-        self.logHeadTail()
-        
-        
-    def addZeroPad(self, padLength=500, location='both'):
-        """
-        add zeropad of given length at given location to necessary columns: timestamp and g
-        """
-        zeros = np.zeros(shape=(padLength))
-        zeroPad = pd.Series(zeros)
-        nullList = [None] * padLength
-        nullSeries = pd.Series(nullList)
-        if location == 'both':
-            paddedG = pd.concat([zeroPad, self.df['g'], zeroPad])
-            paddedTimestamp = pd.concat([nullSeries, self.df['timestamp'], nullSeries])
-        elif location == 'tail':
-            paddedG = pd.concat([self.df['g'], zeroPad])
-            paddedTimestamp = pd.concat([self.df['timestamp'], nullSeries])
-        paddedTimestamp.reset_index(drop=True, inplace=True)
-        paddedG.reset_index(drop=True, inplace=True)
-        paddedData = {'timestamp': paddedTimestamp, 'g': paddedG}
-        self.df = pd.DataFrame(paddedData, columns=['timestamp','g'])
-        
-        
-    def convertGToOffsetG(self):
-        """add new column to df where mean of g has been removed"""
-        #gMean = self.df['g'].mean(axis=0)
-        #self.df['offset_g'] = self.df['g'] - gMean
-        #print('mean of g: {0} subtracted from g for {1}'.format(gMean, self.sensorCodeWithChannel))
-        
-        # gives same result as above
-        self.df['offset_g'] = detrend(self.df['g'], type='constant')
-    
-    
-    def convertGToMetric(self):
-        """add new column to df showing acceleration in m/s^2"""
-        self.df['acc_ms2'] = self.df['offset_g'] * 9.80665
-        self.logHeadTail()
-    
-    
-    def butterBandpass(self):
-        """
-        return bandpass filter coefficients...
-        from https://scipy-cookbook.readthedocs.io/items/ButterworthBandpass.html
-        return:
-        b: numerator of filter
-        a: denominator of filter
-        """
-        nyq = 0.5 * self.fs
-        low = self.lowcut / nyq
-        high = self.highcut / nyq
-        b, a = butter(self.order, [low, high], btype='band')
-        #b, a = butter(self.order, low, btype='highpass')
-        logging.info('butterworth coefficients - b: {0}, a: {1}'.format(b, a))
-        return b, a
-    
-    
-    def butterBandpassFilter(self, inputColumn, outputColumn):
-        """
-        create columns in df holding bandpassed acceleration data
-        (apply bandpass filter to data using filter coefficients b and a)
-        from https://scipy-cookbook.readthedocs.io/items/ButterworthBandpass.html
-        """
-        b, a = self.butterBandpass()
-        self.df[outputColumn] = lfilter(b, a, self.df[inputColumn])
-
-    
-    def integrateDfColumn(self, inputColumn, outputColumn):
-        """integrate given dataframe column (given as string)"""
-        inputList = list(self.df[inputColumn])
-        inputListFromIndex1 = inputList[1:]
-        zipped = zip(inputList, inputListFromIndex1)
-        # values will be appended to integratedList
-        integratedList = [0]
-        for z in zipped:
-            integrated = self.dt * (z[0] + z[1])/2. + integratedList[-1]
-            integratedList.append(integrated)
-        self.df[outputColumn] = integratedList
-
-
-    def clipDf(self):
-        self.df = self.df.iloc[self.ignoredSamples:40500].reset_index()
-        
-        
-    def detrendData(self, inputColumn, outputColumn):
-        """
-        detrend data by removing mean
-        (will get called after data is clipped so as not to include extreme values
-        that would skew the mean)
-        """
-        #mean = df.iloc[self.ignoredSamples:40500].mean()
-        #df[outputColumn] = df[inputColumn] - mean
-        self.df[outputColumn] = detrend(self.df[inputColumn], type='constant')
-    
-    
-    def butterHighpass(self):
-        """
-        return coefficients for highpass filter
-        modeled after Butterworth bandpass code in scipy cookbook
-        """
-        nyq = 0.5 * self.fs
-        cutoff = self.lowcut / nyq
-        b, a = butter(self.order, cutoff, btype='high')
-        return b, a
-    
-    
-    def butterHighpassFilter(self, inputColumn, outputColumn):
-        """
-        modeled after Butterworth bandpass code in scipy cookbook
-        """
-        b, a = self.butterHighpass()
-        self.df[outputColumn] = lfilter(b, a, self.df[inputColumn])
-        
-        
-    def convertMToCm(self, inputColumn, outputColumn):
-        """
-        convert values in meters to values in centimeters
-        """
-        self.df[outputColumn] = self.df[inputColumn] * 100
-
-
-    def getStats(self, columnName):
-        """
-        get min, max, mean and peak value of self.df
-        (to be called after df has been clipped)
-        columnName: string holding name of column in self.df
-        return: tuple holding:
-            1. string holding max and min (to be printed to console or on plots)
-            2. float holding peak value (greater absolute value of min and max)
-        """
+        # int holding number of samples (at head of padded dataset) to ignore when plotting and getting stats
+        self.ignoredSamples = 7000
+        # results are clipped at index 40500 of padded dataset
+        self.maxSamples = 40500 - self.zeroPadLength - 1
 
-        minVal = round(self.df[columnName].min(), 5)
-        maxVal = round(self.df[columnName].max(), 5)
-        meanVal = round(self.df[columnName].mean(), 5)
-        peakVal = max(abs(minVal), abs(maxVal))
 
-        logging.info('stats for {0}:{1}\n'.format(self.sensorCodeWithChannel, columnName))
-        stats = 'min: {0}\nmax: {1}\nmean: {2}\n'.format(minVal, maxVal, meanVal)
-        logging.info(stats)
-        return stats, peakVal
+def getEventWindow(eventTimestamp):
+    """
+    get bounds of window of data converted for known time event
+    eventTimestamp: string holding timestamp (same as event dir name) in format: '2020-01-13T163712'
+    return: tuple holding numpy datetime64 start time (excluded) and end time (included) of window in UTC
+    """
+    # convert timestamp from local Turkish time to UTC
+    eventTime = pd.Timestamp(eventTimestamp) - pd.Timedelta('3 hours')
+    startTime = eventTime - pd.Timedelta('1 minute')
+    endTime = startTime + pd.Timedelta('400 seconds')
+    logging.info('start time: {}'.format(startTime))
+    logging.info('end time: {}'.format(endTime))
+    return startTime.to_datetime64(), endTime.to_datetime64()
 
 
-    def plotGraph(self, column, titleSuffix, yLimit, padded=False):
-        """
-        plot graph of data and save graph
-        column: string holding name of column used as y data
-        plotTitle: string holding title of plot
-        yLimit: float holding value to be used to set range of plot along y-axis (from negative yLimit to yLimit)
-        padded: boolean - True if input data has pad (of 500 zeros on both ends)
-        """
-        plotTitle = self.sensorCodeWithChannel + ' ' + titleSuffix
-        #if padded:
-            # was originally set to display [500:40500]
-        #plot = df.iloc[self.ignoredSamples:40500].reset_index().plot(kind='line', linewidth=1.0, x='index', y=column, color='red', title=plotTitle)
-        #else:
-        plot = self.df.reset_index().plot(kind='line', x='index', y=column, color='red', title=plotTitle, linewidth=1.0)
-        fig = plot.get_figure()
-        ax = fig.add_subplot(111)
-        ax.set_ylim(-yLimit, yLimit)
-        # only text portion of stats will be shown on plot
-        stats = self.getStats(column)[0]
-        ax.annotate(stats, xy=(0.6, 0.65), xycoords='figure fraction')
-        plotFilename = '_'.join([self.eventTimestamp, self.sensorCodeWithChannel, column]) + '.png'
-        plotOutpath = os.path.join(self.plotDir, plotFilename)
-        fig.savefig(plotOutpath)
+def plotGraph(channelResult, column, titleSuffix, yLimit, plotDir=PLOT_DIR):
+    """
+    plot graph of data and save graph
+    channelResult: ChannelResult object
+    column: string holding name of column used as y data
+    titleSuffix: string holding suffix of title of plot
+    yLimit: float holding value to be used to set range of plot along y-axis (from negative yLimit to yLimit)
+    plotDir: string holding path of directory in which plot is saved
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    values = channelResult.arrays[column]
+    stats = channelResult.getPeakStats(column)
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+    ax.plot(np.arange(channelResult.firstIndex, channelResult.firstIndex + len(values)), values, color='red',
+            linewidth=1.0)
+    ax.set_title(channelResult.sensorCodeWithChannel + ' ' + titleSuffix)
+    ax.set_ylim(-yLimit, yLimit)
+    # min, max and mean are shown on plot
+    text = 'min: {0}\nmax: {1}\nmean: {2}\n'.format(round(stats.minimum, 5), round(stats.maximum, 5),
+                                                     round(stats.mean, 5))
+    ax.annotate(text, xy=(0.6, 0.65), xycoords='figure fraction')
+    plotFilename = '_'.join([channelResult.eventTimestamp, channelResult.sensorCodeWithChannel, column]) + '.png'
+    figure.savefig(os.path.join(plotDir, plotFilename))
 
 
 # table holding peak values for acceleration, velocity, and displacement for each
@@ -608,9 +384,44 @@ class StatsTable:
         return self.df[statsColumnName].max()
         
 
+def convertTxtFiles(txtFiles, eventTimestamp):
+    """
+    convert data of a single channel (called in worker processes by convertChannels)
+    txtFiles: list of strings holding paths of one or two text files of a single channel
+    eventTimestamp: string holding approximate time of event in form '2020-01-11T163736'
+    return: ChannelResult object (only arrays of final results and peak stats are sent back from worker process)
+    """
+    processedFiles = [ProcessedFromTxtFile(f) for f in sorted(txtFiles)]
+    timestamps = np.concatenate([p.df['timestamp'].to_numpy() for p in processedFiles])
+    counts = np.concatenate([p.df['count'].to_numpy() for p in processedFiles])
+    startTime, endTime = getEventWindow(eventTimestamp)
+    window = (timestamps > startTime) & (timestamps <= endTime)
+    c = Conversion(processedFiles[0].sensorCode, processedFiles[0].sensorCodeWithChannel, eventTimestamp)
+    c.convert(counts[window], timestamps[window][0])
+    return c.getResult()
+
+
+def convertChannels(channelTxtFiles, eventTimestamp, workers=None):
+    """
+    convert data of all channels in worker processes
+    channelTxtFiles: list holding a list of text file paths for each channel
+    eventTimestamp: string holding approximate time of event in form '2020-01-11T163736'
+    workers: int holding number of worker processes (None to use all cores, 1 to convert in this process)
+    return: list of ChannelResult objects (in same order as channelTxtFiles)
+    """
+    eventTimestamps = [eventTimestamp] * len(channelTxtFiles)
+    if workers == 1:
+        return list(map(convertTxtFiles, channelTxtFiles, eventTimestamps))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(convertTxtFiles, channelTxtFiles, eventTimestamps))
+
+
 # Client code
-def main():
-    """Main function."""
+def main(workers=None):
+    """
+    Main function.
+    workers: int holding number of worker processes used for conversion (None to use all cores)
+    """
 
     ip = InputProcessing('2019-09-26T135930', '/home/grm/AllianzSHMS/working/test-mseed-files_20190926')
     #ip = InputProcessing('2020-01-11T163736', '/home/grm/AllianzSHMS/working/test-mseed-files_20200111')
@@ -625,19 +436,11 @@ def main():
     titleSuffixes = ['offset acceleration (g)', 'bandpassed acceleration (g)', 'detrended velocity (cm/s)', 'highpassed displacement (cm)']
 
 
-    # replace c's and st's with conversionObject and statsTableObject given as args
+    # replace c's and st's with channelResult and statsTableObject given as args
     def updateStatsTable():
-        """update row of stats table with max values at each of the (currently four) parameters"""
-        accRawPeakVal = c.accRawStats[1]
-        accOffsetPeakVal = c.accOffsetStats[1]
-        accBandpassedPeakVal = c.accBandpassedStats[1]
-        velPeakVal = c.velStats[1]
-        dispPeakVal = c.dispStats[1]
-        #st.updateStatsDf(c.sensorCodeWithChannel, 'acc_g_raw', accRawPeakVal)
-        st.updateStatsDf(c.sensorCodeWithChannel, 'acc_g_offset', accOffsetPeakVal)
-        st.updateStatsDf(c.sensorCodeWithChannel, 'acc_g_bandpassed', accBandpassedPeakVal)
-        st.updateStatsDf(c.sensorCodeWithChannel, 'vel_cm_s', velPeakVal)
-        st.updateStatsDf(c.sensorCodeWithChannel, 'disp_cm', dispPeakVal)
+        """update row of stats table with peak values (greater absolute value of min and max) of each parameter"""
+        for statsColumnName, columnName in zip(statsColumnNames, conversionColumnNames):
+            st.updateStatsDf(c.sensorCodeWithChannel, statsColumnName, round(abs(c.getPeakStats(columnName).value), 5))
 
 
     def getStatsMaxValues(statsTableObject):
@@ -667,69 +470,36 @@ def main():
         return plotArgs
 
 
-    def drawPlots(conversionObject, columnMaxValues):
+    def drawPlots(channelResult, columnMaxValues):
         """
-        draw all (currently four) plots associated with given conversionObject 
-        conversionObject: instance of the Conversion class
+        draw all (currently four) plots associated with given channelResult
+        channelResult: ChannelResult object
         """
         plotArgs = getPlotArgs(columnMaxValues)
         for item in plotArgs:
             columnName, titleSuffix, maxVal = item
             # add 1% of maxVal to maxVal to get range of plots along y-axis
             yLimit = maxVal + maxVal * 0.01
-            # will probably need to create multiple df's in Conversion class for this
-            conversionObject.plotGraph(columnName, titleSuffix, yLimit)
+            plotGraph(channelResult, columnName, titleSuffix, yLimit)
 
 
-    def getConversionObjectFromTwoTxtFiles(txtFilePair):
-        """
-        txtFilePair: list of tuples containing text file name (and sensor code channel)
-        return: conversion object made from dataframe from combined text files
-        """
-        txtFilePair = sorted([item[0] for item in txtFilePair])
-        p1 = ProcessedFromTxtFile(txtFilePair[0])
-        df1 = p1.df
-        p2 = ProcessedFromTxtFile(txtFilePair[1])
-        df2 = p2.df
-        df = pd.concat([df1, df2])
-        return Conversion(df, p1.sensorCode, p1.sensorCodeWithChannel, ip.eventTimestamp)
-
-
-    def getConversionObjectFromOneTxtFile(txtFile):
-        """
-        txtFile: string holding name of text file produced from miniseed file
-        return: conversion object made from dataframe produced from text file
-        """
-        p = ProcessedFromTxtFile(txtFile)
-        df = p.df
-        return Conversion(df, p.sensorCode, p.sensorCodeWithChannel, ip.eventTimestamp)
-
-
-    # create Conversion objects twice: 
-        # once to compile statistics into stats table
-        # second time to create plots (using peak values from stats table as plot 
+    # convert each channel once:
+        # stats of all ChannelResult objects are compiled into stats table first
+        # same objects are then used to create plots (using peak values from stats table as plot 
         # ranges so that each parameter uses same scale)
     if ip.pairedTxtFileList:
-        for pair in ip.pairedTxtFileList:
-            c = getConversionObjectFromTwoTxtFiles(pair)
-            updateStatsTable()
-
-        statsColumnMaxValues = getStatsMaxValues(st)
-
-        for pair in ip.pairedTxtFileList:
-            c = getConversionObjectFromTwoTxtFiles(pair)
-            drawPlots(c, statsColumnMaxValues)
-        
+        channelTxtFiles = [[item[0] for item in pair] for pair in ip.pairedTxtFileList]
     else:
-        for txtFile in ip.txtFileList:
-            c = getConversionObjectFromOneTxtFile(txtFile)
-            updateStatsTable()
+        channelTxtFiles = [[txtFile] for txtFile in ip.txtFileList]
+    channelResults = convertChannels(channelTxtFiles, ip.eventTimestamp, workers)
+
+    for c in channelResults:
+        updateStatsTable()
 
-        statsColumnMaxValues = getStatsMaxValues(st)
+    statsColumnMaxValues = getStatsMaxValues(st)
 
-        for txtFile in ip.txtFileList:
-            c = getConversionObjectFromOneTxtFile(txtFile)
-            drawPlots(c, statsColumnMaxValues)
+    for c in channelResults:
+        drawPlots(c, statsColumnMaxValues)
 
     
 
@@ -1,3 +1,5 @@
+import os
+
 import convert_acc
 # import unittest
 import pytest
@@ -57,6 +59,32 @@ def test_sortFilesBySensorCode(unorderedFileListShort, orderedFileListShort):
 def test_sortFiles(unorderedFileListAll, orderedFileListAll):
 	assert convert_acc.sortFiles(unorderedFileListAll[0]) == orderedFileListAll[0]
 
+def test_sortFiles_hours(orderedFileListAll):
+	"""assert that files of any number of hours are sorted hour by hour, also across midnight"""
+	firstHour = [f for f in orderedFileListAll[0] if f.startswith('20190926100000')]
+	hours = ['20190926230000', '20190927000000', '20190927010000']
+	orderedFiles = [f.replace('20190926100000', h) for h in hours for f in firstHour]
+	assert convert_acc.sortFiles(list(reversed(orderedFiles))) == orderedFiles
+	assert convert_acc.isFileCountValid(72) and not convert_acc.isFileCountValid(50)
+
+
+def test_integrateArray():
+	"""assert that each row of a channel matrix is integrated as a single channel would be"""
+	data = np.array([[-0.000393, -0.000286, -0.000049, -0.000147],
+					 [1., 2., 3., 4.]])
+	integrated = convert_acc.integrateArray(data, 0.5)
+	np.testing.assert_array_equal(integrated[1], [0., 0.75, 2., 3.75])
+	np.testing.assert_array_equal(integrated[0], convert_acc.integrateArray(data[0], 0.5))
+	np.testing.assert_array_equal(convert_acc.integrateArray(data[1], 0.5, rule='cumsum'), [0., 0.5, 1.5, 3.])
+	np.testing.assert_array_equal(convert_acc.integrateArray(data.T, 0.5, axis=0), integrated.T)
+
+
+def test_integrateArray_series():
+	"""assert that a series is returned (with same index) when a series is given"""
+	inputSeries = pd.Series([1., 2., 3.], index=[5, 6, 7])
+	outputSeries = convert_acc.integrateArray(inputSeries, 1.)
+	pd.testing.assert_series_equal(outputSeries, pd.Series([0., 1.5, 4.], index=[5, 6, 7]))
+
 
 # ----------unit tests for methods------------
 
@@ -73,6 +101,24 @@ def test_getCleanDf(pObject):
 	assert columns[0] == 'timestamp' or columns[0] == 'count'
 	assert columns[1] == 'timestamp' or columns[1] == 'count'
 
+def test_readTspair(pObject):
+	"""assert that counts and rebuilt timestamps match the text file read as pairs of strings"""
+	rawDf = pd.read_csv(pObject.txtFilePath, header=None, skiprows=1, sep=r'\s+', names=['timestamp', 'count'])
+	assert pObject.counts.dtype == np.int32
+	assert pObject.sampleCount == 9001
+	assert pObject.fs == 100
+	np.testing.assert_array_equal(pObject.counts, rawDf['count'].to_numpy())
+	assert list(pObject.df['timestamp']) == list(rawDf['timestamp'])
+
+def test_readTspairHeader():
+	"""assert that header fields are parsed and other text is rejected"""
+	header = 'TIMESERIES AT_ALZ__B4F_D, 9001 samples, 100 sps, 2019-09-26T10:58:30.000000, TSPAIR, INTEGER, '
+	sampleCount, fs, startTime = convert_acc.readTspairHeader(header)
+	assert (sampleCount, fs) == (9001, 100.0)
+	assert startTime == np.datetime64('2019-09-26T10:58:30')
+	with pytest.raises(ValueError):
+		convert_acc.readTspairHeader('2019-09-26T10:58:30.000000  -39563')
+
 # unit tests for Conversion methods
 # using Conversion object with B4Fx for event starting at 2019-09-26T135930 local time
 # may have been better to mock the dataframe but keeping test data for now
@@ -135,6 +181,20 @@ def test_butterPass(cObject):
 	np.testing.assert_almost_equal(highA, [1., -1.99555712, 0.99556697], 8)
 
 
+def test_filterBank(cObject):
+	"""assert that filters are designed once and that sos filtering matches (b, a) filtering for every channel"""
+	from scipy.signal import lfilter
+	filterBank = convert_acc.FilterBank()
+	sos = filterBank.getSos('band', 2, 100, 0.05, 40)
+	assert filterBank.getSos('band', 2, 100., 0.05, 40) is sos
+	assert filterBank.getSos('high', 2, 100, 0.05, 40) is filterBank.getSos('high', 2, 100, 0.05, 20)
+	assert len(filterBank.filters) == 2
+	data = np.vstack([cObject.arrays['offset_g'], cObject.arrays['offset_g'][::-1]])
+	filtered = filterBank.apply(data, 'band', 2, 100, 0.05, 40)
+	bandB, bandA = cObject.butterPass('band')
+	for row, filteredRow in zip(data, filtered):
+		np.testing.assert_allclose(filteredRow, lfilter(bandB, bandA, row), rtol=1e-9, atol=1e-15)
+
 def test_integrateSeries(cObject):
 	inputSeries = pd.Series([-0.000393, -0.000286, -0.000049, -0.000147, -0.000438, -0.00053, -0.000383, 0.000026, 0.000019, -0.000225])
 	expectedSeries = pd.Series([0, -0.000003, -0.000005, -0.000006, -0.000009, -0.000014, -0.000018, -0.00002, -0.00002, -0.000021])
@@ -143,6 +203,17 @@ def test_integrateSeries(cObject):
 	# pd.testing.assert_series_equal(outputSeries, expectedSeries, check_exact=False, check_less_precise=6)
 
 
+def test_convertCountArray(cObject):
+	"""assert that a channel matrix gives the same results as the channels converted one by one"""
+	counts = np.arange(-20000, 20001, dtype='int32') % 977
+	arrays = convert_acc.convertCountArray(counts, 0.625)
+	matrixArrays = convert_acc.convertCountArray(np.vstack([counts, counts]), [0.625, 1.25])
+	for column in cObject.resultColumns:
+		np.testing.assert_allclose(matrixArrays[column][0], arrays[column], rtol=1e-10, atol=1e-15)
+		np.testing.assert_allclose(matrixArrays[column][1], arrays[column] / 2, rtol=1e-10, atol=1e-15)
+	assert len(arrays['g']) == len(cObject.df)
+
+
 def test_removeExtraneousSamples(cObject):
 	"""
 	assert that length of df is correct after removing ignored samples from head
@@ -152,11 +223,488 @@ def test_removeExtraneousSamples(cObject):
 	assert len(cObject.df) == 40001 - removedSampleCount
 
 
+def test_streamingConversion(pObject):
+	"""assert that streamed results do not depend on chunk size and state does not grow with data"""
+	whole = convert_acc.StreamingConversion('B4Fx').push(pObject.counts)
+	stream = convert_acc.StreamingConversion('B4Fx')
+	chunks = [stream.push(pObject.counts[i:i + 777]) for i in range(0, len(pObject.counts), 777)]
+	assert stream.sampleCount == len(pObject.counts)
+	assert stream.bandZi.shape == (2, 2) and stream.displacementZi.shape == (1, 2)
+	for column, values in whole.items():
+		np.testing.assert_allclose(np.concatenate([c[column] for c in chunks]), values, rtol=1e-9, atol=1e-9 * np.abs(values).max())
+		assert np.isclose(stream.peaks[column], np.abs(values).max())
+
 def test_getStats(cObject):
 	print('length of Conversion object df: {0}'.format(len(cObject.df)))
 	print(cObject.getStats('highpassed_displacement_cm'))
 	assert cObject.getStats('highpassed_displacement_cm')[1:] == [pytest.approx(-0.16880180775299947), -0.1688]
 
+def test_getPeakStats_record(cObject):
+	"""assert that extended stats hold those of getStats and min, max, mean and time of peak"""
+	stats = cObject.getPeakStats('highpassed_displacement_cm')
+	assert list(stats[:3]) == cObject.getStats('highpassed_displacement_cm')
+	assert cObject.getResult().getPeakStats('highpassed_displacement_cm') == stats
+	values = cObject.arrays['highpassed_displacement_cm']
+	assert values[stats.index] == stats.value == stats.minimum
+	assert stats.time == cObject.df['timestamp'][stats.index]
+
+def test_getPeakStats():
+	"""assert that stats of a matrix are those of each row and that peak is value of largest magnitude"""
+	matrix = np.array([[0., -3., 2., 1.], [1., 4., -4., 0.]])
+	stats = convert_acc.getPeakStats(matrix, np.datetime64('2019-09-26T10:58:30'), fs=2, firstIndex=1, sampleCount=4)
+	assert stats == [convert_acc.getPeakStats(row, np.datetime64('2019-09-26T10:58:30'), 2, 1, 4) for row in matrix]
+	assert stats[0] == (1, -3., -3., -3., 2., 0., '2019-09-26T10:58:31.000000')
+	# ties are resolved in favour of max, peaks outside recorded samples have no time
+	assert (stats[1].index, stats[1].value, stats[1].time) == (1, 4., '2019-09-26T10:58:31.000000')
+	assert convert_acc.getPeakStats(matrix[1], np.datetime64('2019-09-26T10:58:30'), sampleCount=1).time is None
+
+
+def test_decimateMinMax(cObject):
+	"""assert that decimated data is much shorter but keeps peak and min and max of every bin"""
+	values = cObject.arrays['highpassed_displacement_cm']
+	peakIndex = cObject.dispStats[0]
+	indexes, decimated = convert_acc.decimateMinMax(values, 100, [peakIndex, 7])
+	assert len(indexes) <= 2 * 100 + 3 and np.all(np.diff(indexes) > 0)
+	assert peakIndex in indexes and 7 in indexes and indexes[0] == 0 and indexes[-1] == len(values) - 1
+	np.testing.assert_array_equal(decimated, values[indexes])
+	binSize = -(-len(values) // 100)
+	for start in range(0, len(values), binSize):
+		inBin = (indexes >= start) & (indexes < start + binSize)
+		assert decimated[inBin].min() == values[start:start + binSize].min()
+		assert decimated[inBin].max() == values[start:start + binSize].max()
+	assert len(convert_acc.decimateMinMax(values, len(values))[0]) == len(values)
+
+
+def test_channelResult(cObject):
+	"""assert that ChannelResult holds final results and stats of Conversion object and can be pickled"""
+	import pickle
+	result = cObject.getResult()
+	assert cObject.getResult() is result
+	assert not hasattr(result, '__dict__')
+	assert result.getStats('highpassed_displacement_cm') == cObject.dispStats
+	np.testing.assert_array_equal(result.arrays['offset_g'], cObject.arrays['offset_g'])
+	assert result.getTimeLabels()[0] == cObject.df['time (UTC)'][0]
+	unpickled = pickle.loads(pickle.dumps(result))
+	assert unpickled.velStats == result.velStats
+	np.testing.assert_array_equal(unpickled.arrays['detrended_velocity_cms'], result.arrays['detrended_velocity_cms'])
+
+def test_convertChannels(txtFiles):
+	"""assert that parallel conversion returns same results in same order as serial conversion"""
+	serialResults = convert_acc.convertChannels(txtFiles, '2019-09-26T135930', workers=1)
+	parallelResults = convert_acc.convertChannels(txtFiles, '2019-09-26T135930', workers=2)
+	assert [r.sensorCodeWithChannel for r in parallelResults] == ['B4Fz', 'N39x', 'B4Fx']
+	for serial, parallel in zip(serialResults, parallelResults):
+		assert serial.dispStats == parallel.dispStats
+		np.testing.assert_array_equal(serial.arrays['offset_g'], parallel.arrays['offset_g'])
+
+
+def test_iterChannels(txtFiles):
+	"""assert that every channel is yielded once with its index and that closing generator early is possible"""
+	for workers in [1, 2]:
+		results = dict(convert_acc.iterChannels(convert_acc.convertChannelFiles, txtFiles, '2019-09-26T135930', workers))
+		assert sorted(results) == [0, 1, 2]
+		assert [results[i].sensorCodeWithChannel for i in range(3)] == ['B4Fz', 'N39x', 'B4Fx']
+	channels = convert_acc.iterChannels(convert_acc.convertChannelFiles, txtFiles, '2019-09-26T135930', workers=2)
+	index, result = next(channels)
+	channels.close()
+	assert result.sensorCodeWithChannel == ['B4Fz', 'N39x', 'B4Fx'][index]
+
+
+def test_profiling(tmp_path):
+	"""assert that nothing is recorded while disabled and that spans of worker processes are merged into profile"""
+	import json
+	from convert_acc import profiling
+	assert profiling.span('convert') is profiling.NULL_SPAN
+	profiling.count('filesRead')
+	txtFile = 'test_data/20190926100000.ALZ.001.B4Fx.txt'
+	profile = profiling.enable('test')
+	try:
+		with profiling.span('event', event='2019-09-26T135930'):
+			convert_acc.convertChannels([[txtFile], [txtFile]], '2019-09-26T135930', workers=2)
+	finally:
+		assert profiling.disable() is profile
+	stages = profile.getStages()
+	assert stages['channel']['count'] == stages['parseTxtFile']['count'] == 2
+	assert stages['event']['totalSeconds'] >= stages['channel']['maxSeconds']
+	assert profile.counters['filesRead'] == 2
+	assert profile.counters['bytesRead'] == 2 * os.path.getsize(txtFile)
+	assert {s['pid'] for s in profile.spans if s['name'] == 'channel'} != {os.getpid()}
+	profile.write(str(tmp_path / 'profile.json'))
+	with open(str(tmp_path / 'profile.json')) as f:
+		written = json.load(f)
+	assert written['name'] == 'test' and len(written['spans']) == len(profile.spans)
+	assert sorted(s['channel'] for s in written['spans'] if s['name'] == 'channel') == ['B4Fx', 'B4Fx']
+
+
+
+def test_profiling_threads():
+	"""assert that each thread records into its own profile and that profiling is not enabled twice in a thread"""
+	import threading
+	from convert_acc import profiling
+	profile = profiling.enable('main')
+	try:
+		with pytest.raises(RuntimeError):
+			profiling.enable('again')
+		threadProfiles = []
+		def run():
+			assert not profiling.isEnabled()
+			threadProfiles.append(profiling.enable('thread'))
+			with profiling.span('threadStage'):
+				profiling.count('filesRead')
+			profiling.disable()
+		thread = threading.Thread(target=run)
+		with profiling.span('mainStage'):
+			thread.start()
+			thread.join()
+	finally:
+		assert profiling.disable() is profile
+	assert list(profile.getStages()) == ['mainStage'] and profile.counters == {}
+	assert list(threadProfiles[0].getStages()) == ['threadStage'] and threadProfiles[0].counters == {'filesRead': 1}
+
+def test_convertCountArrayFrequency(pObject):
+	"""assert that frequency-domain conversion of a matrix gives same results as converting each row"""
+	matrix = np.stack([pObject.counts, pObject.counts[::-1]])
+	arrays = convert_acc.convertCountArrayFrequency(matrix, [1.25, 0.625])
+	for row, sensitivity in enumerate([1.25, 0.625]):
+		rowArrays = convert_acc.convertCountArrayFrequency(matrix[row], sensitivity)
+		for key, values in rowArrays.items():
+			assert values.shape == (len(pObject.counts),)
+			np.testing.assert_allclose(arrays[key][row], values, rtol=1e-10, atol=1e-15)
+
+def test_conversion_frequencyApproach(pObject):
+	"""assert that frequency-domain approaches keep whole record and agree with time-domain bandpassed acceleration"""
+	args = (pObject.counts, pObject.startTime, 'B4F', 'B4Fx', '2019-09-26T135930', pObject.fs)
+	timeResult = convert_acc.Conversion.fromCounts(*args).getResult()
+	for approach in ['frequency', 'frequency_plain']:
+		c = convert_acc.Conversion.fromCounts(*args, approach=approach)
+		assert c.getSampleIndexes()[0] == 0 and len(c.arrays['g']) == len(pObject.counts)
+		assert c.getResult().getStats('bandpassed_g')[2] == pytest.approx(timeResult.getStats('bandpassed_g')[2], rel=0.05)
+	with pytest.raises(ValueError):
+		convert_acc.Conversion(None, 'B4F', 'B4Fx', '2019-09-26T135930', approach='wavelet')
+
+def test_convertMiniseedFiles(tmp_path, mseedFile):
+	"""assert that converting miniseed data in memory gives same results as converting text file holding same data"""
+	txtFile = 'test_data/20190926100000.ALZ.001.B4Fx.txt'
+	mseedResult = convert_acc.convertChannelFiles([mseedFile], '2019-09-26T135930')
+	txtResult = convert_acc.convertChannelFiles([txtFile], '2019-09-26T135930')
+	assert mseedResult.dispStats == txtResult.dispStats
+	assert mseedResult.getTimeLabels() == txtResult.getTimeLabels()
+	assert os.listdir(str(tmp_path)) == ['20190926100000.ALZ.001.B4Fx.m']
+
+def test_getMiniseedCounts_cache(tmp_path, mseedFile):
+	"""assert that second read of same miniseed window is loaded (memory-mapped) from cache without decoding"""
+	cacheDir = str(tmp_path / 'cache')
+	counts, startTime, fs = convert_acc.getMiniseedCounts([mseedFile], cacheDir=cacheDir)
+	assert len(os.listdir(cacheDir)) == 2
+	cachedCounts, cachedStartTime, cachedFs = convert_acc.getMiniseedCounts([mseedFile], cacheDir=cacheDir)
+	assert isinstance(cachedCounts, np.memmap)
+	np.testing.assert_array_equal(cachedCounts, counts)
+	assert (cachedStartTime, cachedFs) == (startTime, fs)
+
+def test_countCache_evict(tmp_path):
+	"""assert that least recently used entries are evicted once cache exceeds size limit"""
+	from convert_acc.cache import CountCache
+	cache = CountCache(str(tmp_path), maxBytes=35000)
+	counts = np.arange(4000, dtype=np.int32)
+	startTime = np.datetime64('2019-09-26T10:58:30.000000')
+	cache.store('a', counts, startTime, 100.)
+	cache.store('b', counts, startTime, 100.)
+	os.utime(cache.getPaths('a')[0], (0, 0))
+	os.utime(cache.getPaths('b')[0], (1, 1))
+	# loading 'a' marks it as most recently used so 'b' is evicted next
+	assert cache.load('a') is not None
+	cache.store('c', counts, startTime, 100.)
+	assert cache.load('b') is None
+	assert cache.load('a') is not None and cache.load('c') is not None
+	assert cache.getSize() <= 35000
+
+def test_batch(eventMiniseedDir, tmp_path, caplog):
+	"""assert that batch conversion writes stats and summary of each event and skips events already done"""
+	import json
+	from convert_acc import batch
+	outputDir = str(tmp_path / 'output')
+	args = ['--events-dir', str(eventMiniseedDir.parent), '--output', outputDir, '--workers', '1']
+	assert batch.main(args) == 0
+	assert [r.getMessage() for r in caplog.records if r.name == 'convert_acc.batch'] == ['2019-09-26T135930: done',
+																						  '1 done, 0 skipped, 0 failed']
+	with open(os.path.join(outputDir, '2019-09-26T135930', 'summary.json')) as f:
+		summary = json.load(f)
+	assert len(summary['channels']) == 24
+	txtResult = convert_acc.convertChannelFiles(['test_data/20190926100000.ALZ.001.B4Fx.txt'], '2019-09-26T135930')
+	assert summary['channels']['B4Fx']['highpassed_displacement_cm']['peak'] == txtResult.dispStats[1]
+	stats = pd.read_csv(os.path.join(outputDir, '2019-09-26T135930', 'stats.csv'))
+	assert list(stats['ID']) == convert_acc.SENSOR_CODES_WITH_CHANNELS
+	assert os.listdir(os.path.join(outputDir, 'cache'))
+	with open(os.path.join(outputDir, 'profile.json')) as f:
+		profile = json.load(f)
+	# all channels hold same data, so only first channel is decoded
+	assert profile['stages']['channel']['count'] == 24 and profile['stages']['decodeMiniseed']['count'] == 1
+	assert profile['counters']['cacheMisses'] == 1 and profile['counters']['cacheHits'] == 23
+	report = batch.processEvents(batch.findEvents(str(eventMiniseedDir.parent)), outputDir, workers=1)
+	assert report == {'done': [], 'skipped': ['2019-09-26T135930'], 'failed': []}
+	# progress is not shown below given level
+	caplog.clear()
+	assert batch.main(args + ['--log-level', 'WARNING']) == 0
+	assert not [r for r in caplog.records if r.name == 'convert_acc.batch']
+
+def test_batch_figures(eventMiniseedDir, tmp_path, monkeypatch):
+	"""assert that figures of events are rendered by the pool shared with conversion (no pool of their own)"""
+	from convert_acc import batch, render
+	def noPool(*args, **kwargs):
+		raise AssertionError('figures must be rendered by shared pool')
+	monkeypatch.setattr(render, 'ProcessPoolExecutor', noPool)
+	outputDir = str(tmp_path / 'output')
+	report = batch.processEvents(batch.findEvents(str(eventMiniseedDir.parent)), outputDir, workers=2, figures=True)
+	assert report['done'] == ['2019-09-26T135930']
+	assert {'results.pdf', 'nx.png', 'ny.png', 'sx.png', 'sy.png'} <= set(os.listdir(os.path.join(outputDir, '2019-09-26T135930')))
+
+def test_writeEvent(tmp_path):
+	"""assert that synthetic event is split at hour boundary and converted pulse peaks at event time on every channel"""
+	from convert_acc import synthetic, batch
+	eventDir = str(tmp_path / '2019-09-26T135930')
+	channelFiles = synthetic.writeEvent(eventDir, '2019-09-26T135930', amplitude=0.01)
+	# window of event (10:58:30 - 11:05:10 UTC) crosses hour boundary
+	assert len(os.listdir(eventDir)) == 48
+	assert [os.path.basename(f) for f in channelFiles[-1]] == ['20190926100000.ALZ.008.FFZ.m', '20190926110000.ALZ.008.FFZ.m']
+	assert batch.getChannelFiles(eventDir) == channelFiles
+	results = convert_acc.convertChannels(channelFiles[18:19] + channelFiles[:1], '2019-09-26T135930', workers=1)
+	for r in results:
+		stats = r.getPeakStats('bandpassed_g')
+		assert stats.value == pytest.approx(0.01 * synthetic.getAmplification(r.sensorCodeWithChannel), rel=0.1)
+		assert abs(np.datetime64(stats.time) - np.datetime64('2019-09-26T10:59:30')) < np.timedelta64(1, 's')
+
+def test_writeChannels_tspair(tmp_path):
+	"""assert that TSPAIR files split at hour boundary hold same counts as generated"""
+	from convert_acc import synthetic
+	startTime = np.datetime64('2019-09-26T10:59:50', 'us')
+	txtFiles = synthetic.writeChannels(str(tmp_path), startTime, 20, channels=['B4Fx'], formats=('tspair',))[0]
+	assert [os.path.basename(f) for f in txtFiles] == ['20190926100000.ALZ.007.B4Fx.txt', '20190926110000.ALZ.007.B4Fx.txt']
+	parts = [convert_acc.readTspair(f) for f in txtFiles]
+	assert parts[0][1] == startTime and parts[1][1] == np.datetime64('2019-09-26T11:00:00', 'us')
+	np.testing.assert_array_equal(np.concatenate([p[0] for p in parts]),
+								  synthetic.getSyntheticCounts('B4Fx', startTime, 2000))
+
+
+def test_miniseedIndex(tmp_path):
+	"""assert that index finds files of event in archive tree and is updated incrementally"""
+	import json
+	from convert_acc import synthetic, batch
+	from convert_acc.index import MiniseedIndex
+	archiveDir = tmp_path / 'archive'
+	for hour in [10, 11, 12]:
+		synthetic.writeChannels(str(archiveDir / 'hour{0}'.format(hour)), '2019-09-26T{0}:00:00'.format(hour), 3600)
+	index = MiniseedIndex(str(tmp_path / 'index.sqlite'))
+	assert index.scan(str(archiveDir)) == {'added': 72, 'updated': 0, 'removed': 0, 'unchanged': 0, 'failed': 0}
+	# window of event is 10:58:30 - 11:05:10 UTC
+	channelFiles = index.getEventChannelFiles('2019-09-26T135930')
+	assert [len(files) for files in channelFiles] == [2] * 24
+	assert channelFiles[0] == [str(archiveDir / 'hour10' / '20190926100000.ALZ.001.N39x.m'),
+							   str(archiveDir / 'hour11' / '20190926110000.ALZ.001.N39x.m')]
+	assert [row.channel for row in index.findFiles('2019-09-26T12:30:00', '2019-09-26T12:31:00')] == sorted(convert_acc.SENSOR_CODES_WITH_CHANNELS)
+	for path in channelFiles[0]:
+		os.remove(path)
+	assert index.scan(str(archiveDir)) == {'added': 0, 'updated': 0, 'removed': 2, 'unchanged': 70, 'failed': 0}
+	with pytest.raises(ValueError):
+		index.getEventChannelFiles('2019-09-26T135930')
+	for hour in [10, 11]:
+		synthetic.writeChannels(str(archiveDir / 'hour{0}'.format(hour)), '2019-09-26T{0}:00:00'.format(hour), 3600,
+								channels=['N39x'])
+	outputDir = str(tmp_path / 'output')
+	assert batch.main(['--archive', str(archiveDir), '--events', '2019-09-26T135930', '--output', outputDir,
+					   '--index-db', str(tmp_path / 'index.sqlite'), '--workers', '1']) == 0
+	with open(os.path.join(outputDir, '2019-09-26T135930', 'summary.json')) as f:
+		assert len(json.load(f)['channels']) == 24
+
+def test_miniseedIndex_siblings(tmp_path):
+	"""assert that scan of one archive root leaves files of sibling roots matching it as LIKE pattern in index"""
+	from convert_acc import synthetic
+	from convert_acc.index import MiniseedIndex
+	for name in ['a_b', 'axb']:
+		synthetic.writeChannels(str(tmp_path / name), '2019-09-26T10:00:00', 60, fs=1., channels=['B4Fx'])
+	index = MiniseedIndex(None)
+	assert index.scan(str(tmp_path / 'axb'))['added'] == 1
+	assert index.scan(str(tmp_path / 'a_b')) == {'added': 1, 'updated': 0, 'removed': 0, 'unchanged': 0, 'failed': 0}
+	assert index.scan(str(tmp_path / 'a_b')) == {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 1, 'failed': 0}
+	assert len(index.findFiles('2019-09-26T10:00:00', '2019-09-26T10:01:00')) == 2
+
+def test_miniseedIndex_durations(tmp_path):
+	"""assert that files longer than an hour are found by range query of index held in memory"""
+	from convert_acc import synthetic
+	from convert_acc.index import MiniseedIndex
+	longFile = synthetic.writeChannels(str(tmp_path), '2019-09-26T08:00:00', 3 * 3600, fs=1., channels=['B4Fx'],
+									   splitHours=False)[0][0]
+	shortFile = synthetic.writeChannels(str(tmp_path), '2019-09-26T10:30:00', 60, fs=1., channels=['B4Fy'],
+										splitHours=False)[0][0]
+	index = MiniseedIndex(None)
+	assert index.scan(str(tmp_path))['added'] == 2
+	assert [row.path for row in index.findFiles('2019-09-26T10:30:30', '2019-09-26T10:40:00')] == [longFile, shortFile]
+	assert [row.path for row in index.findFiles('2019-09-26T10:31:00', '2019-09-26T10:40:00')] == [longFile]
+	assert index.findFiles('2019-09-26T11:00:00', '2019-09-26T12:00:00') == []
+
+
+def test_stitchSegments():
+	"""assert that segments are placed by start time, gaps are zero-filled and overlapping samples dropped"""
+	startTime = np.datetime64('2019-09-26T10:59:59', 'us')
+	segments = [(np.arange(100, 200), startTime + np.timedelta64(1, 's'), 100),
+				(np.arange(0, 100), startTime, 100),
+				(np.arange(250, 300), startTime + np.timedelta64(2500, 'ms'), 100),
+				(np.arange(280, 320), startTime + np.timedelta64(2800, 'ms'), 100)]
+	counts, firstSampleTime, fs, issues = convert_acc.stitchSegments(segments, 'B4Fx')
+	assert firstSampleTime == startTime and fs == 100. and counts.dtype == np.int32
+	expected = np.concatenate([np.arange(0, 200), np.zeros(50), np.arange(250, 320)])
+	np.testing.assert_array_equal(counts, expected)
+	assert issues == [convert_acc.SegmentIssue('gap', startTime + np.timedelta64(2, 's'), 50),
+					  convert_acc.SegmentIssue('overlap', startTime + np.timedelta64(2800, 'ms'), 20)]
+	with pytest.raises(ValueError):
+		convert_acc.stitchSegments(segments + [(np.arange(10), startTime, 50)])
+
+def test_readMiniseedCounts_hours(tmp_path):
+	"""assert that three hourly files with a gap are stitched into one array covering all hours"""
+	from obspy import read
+	from convert_acc import synthetic
+	startTime = np.datetime64('2019-09-26T10:59:00', 'us')
+	mseedFiles = synthetic.writeChannels(str(tmp_path), startTime, 3720, channels=['B4Fx'])[0]
+	assert len(mseedFiles) == 3
+	expected = synthetic.getSyntheticCounts('B4Fx', startTime, 372000)
+	# drop samples of second hour between 11:10:00 and 11:10:30 (exclusive)
+	stream = read(mseedFiles[1])
+	stream.cutout(stream[0].stats.starttime + 600, stream[0].stats.starttime + 630)
+	stream.write(mseedFiles[1], format='MSEED')
+	expected[6000 + 60001:6000 + 63000] = 0
+	counts, firstSampleTime, fs = convert_acc.readMiniseedCounts(list(reversed(mseedFiles)))
+	assert convert_acc.getDatetime64(firstSampleTime) == startTime
+	np.testing.assert_array_equal(counts, expected)
+
+def test_convert_hours(tmp_path, caplog):
+	"""assert that conversion of three stitched hourly text files keeps whole record after filter warm-up"""
+	from convert_acc import synthetic
+	startTime = np.datetime64('2019-09-26T10:59:00', 'us')
+	txtFiles = synthetic.writeChannels(str(tmp_path), startTime, 3720, channels=['B4Fx'], formats=('tspair',))[0]
+	assert len(txtFiles) == 3
+	c = convert_acc.getConversionObjectFromTxtFiles(txtFiles, '2019-09-26T135930')
+	assert c.sampleCount == 372000
+	assert c.getResult().getLength() == 372000 - c.getFirstIndex()
+	assert c.getResult().getTimeLabels()[-1] == '12:00:59.990'
+	# samples dropped by a given maxSamples are reported
+	c = convert_acc.Conversion(None, 'B4F', 'B4Fx', '2019-09-26T135930')
+	c.maxSamples = 40000
+	c.convert(synthetic.getSyntheticCounts('B4Fx', startTime, 372000), startTime)
+	assert c.getResult().getLength() == 40001 - c.getFirstIndex()
+	assert '331999 of 372000 samples after index 40000 are dropped' in caplog.text
+
+
+def countPdfPages(path):
+	"""return number of page objects of pdf file (written by matplotlib, so not compressed into object streams)"""
+	import re
+	with open(path, 'rb') as f:
+		return len(re.findall(rb'/Type /Page\b', f.read()))
+
+def test_renderEventFigures(cObject, tmp_path):
+	"""assert that figures rendered by worker processes are assembled into results pdf and comparison pngs"""
+	from convert_acc import render
+	result = cObject.getResult()
+	channelResults = []
+	for sensorCodeWithChannel in convert_acc.SENSOR_CODES_WITH_CHANNELS:
+		channelResult = result.getSubset(convert_acc.Conversion.resultColumns)
+		channelResult.sensorCodeWithChannel = sensorCodeWithChannel
+		channelResult.floor = convert_acc.getFloor(convert_acc.getSensorCode(sensorCodeWithChannel))
+		channelResults.append(channelResult)
+	assert [r.sensorCodeWithChannel for r in render.getComparisonChannels(channelResults, 'N', 'x')] == ['N39x', 'N24x', 'N12x', 'B4Fx']
+	paths = render.renderEventFigures(channelResults, str(tmp_path), workers=2)
+	assert sorted(os.listdir(str(tmp_path))) == ['nx.png', 'ny.png', 'results.pdf', 'sx.png', 'sy.png']
+	assert paths == [str(tmp_path / name) for name in ['results.pdf', 'nx.png', 'ny.png', 'sx.png', 'sy.png']]
+	assert countPdfPages(paths[0]) == 4
+
+def test_renderEventImages(cObject):
+	"""assert that images of figures rendered by worker processes are returned and shown at their own size"""
+	from convert_acc import render
+	result = cObject.getResult()
+	channelResults = []
+	for sensorCodeWithChannel in convert_acc.SENSOR_CODES_WITH_CHANNELS:
+		channelResult = result.getSubset(convert_acc.Conversion.resultColumns)
+		channelResult.sensorCodeWithChannel = sensorCodeWithChannel
+		channelResult.floor = convert_acc.getFloor(convert_acc.getSensorCode(sensorCodeWithChannel))
+		channelResults.append(channelResult)
+	resultsImages, comparisonImages = render.renderEventImages(channelResults, workers=2)
+	assert [image.shape for image in resultsImages] == [(2000, 1400, 3)] * 4
+	assert [image.shape for image in comparisonImages] == [(700, 400, 3)] * 4
+	assert resultsImages[0].dtype == np.uint8 and resultsImages[0].min() < 255
+	figure = render.getImageFigure(comparisonImages[0], 'N. Corner X-Dir (cm)')
+	assert tuple(figure.get_size_inches()) == (4, 7)
+	np.testing.assert_array_equal(render.rasterizeFigure(figure), comparisonImages[0])
+	resultsArgs = render.getFigureArgs(channelResults)[0]
+	ax = render.buildResultsFigure(*resultsArgs[0]).axes[0]
+	assert ax.xaxis.get_major_formatter()(0) == result.getTimeLabels()[0]
+
+def test_reportWriter(cObject, tmp_path):
+	"""assert that all report pages are written to a single pdf without intermediate files"""
+	from matplotlib.figure import Figure
+	from convert_acc.report import ReportWriter, StatsTable
+	result = cObject.getResult()
+	statsTable = StatsTable('2019-09-26 13:59:30')
+	statsTable.updateStatsDf('B4Fx', 'Disp (cm)', result.dispStats[2])
+	assert list(statsTable.getTableDf('acceleration').columns) == ['Ch', 'ID', 'Floor', 'Axis', 'Acc (g)']
+	reportPath = str(tmp_path / 'report.pdf')
+	with ReportWriter(reportPath, '2019-09-26 13:59:30') as report:
+		report.addComparisonPage([result], 0.25)
+		for _ in range(3):
+			report.addFigure(Figure())
+		report.addImage(np.full((2000, 1400, 3), 255, dtype=np.uint8))
+		report.addTablePage(statsTable)
+		report.addTablePage(statsTable, 'acceleration')
+	assert os.listdir(str(tmp_path)) == ['report.pdf']
+	assert statsTable.tableToHtml(str(tmp_path), 'acceleration') == str(tmp_path / 'stats_table_acc.html')
+	assert statsTable.tableToPdf(str(tmp_path)) == str(tmp_path / 'stats_table_all.pdf')
+	assert countPdfPages(reportPath) == 7
+
+def test_drawTable():
+	"""assert that stats table is drawn with header and alternating row colours of html export"""
+	import matplotlib.colors
+	from matplotlib.figure import Figure
+	from convert_acc.report import StatsTable
+	statsTable = StatsTable('2019-09-26 13:59:30')
+	table = statsTable.drawTable(Figure().add_subplot(1, 1, 1), 'acceleration')
+	cells = table.get_celld()
+	assert len(cells) == 25 * 5
+	assert cells[(0, 4)].get_text().get_text() == 'Acc (g)'
+	colors = [cells[(row, 0)].get_facecolor() for row in range(3)]
+	assert [matplotlib.colors.to_hex(c) for c in colors] == ['#d3d3d3', '#b8d1f3', '#dae5f4']
+
+def test_import_core_only():
+	"""assert that importing convert_acc loads neither GUI, plotting, miniseed, pdf libraries nor pandas"""
+	import subprocess
+	import sys
+	heavyModules = ['PyQt5', 'matplotlib', 'obspy', 'pandas', 'scipy', 'fpdf', 'PyPDF2', 'pdfkit']
+	code = 'import sys, convert_acc; print([m for m in {0} if m in sys.modules])'.format(heavyModules)
+	output = subprocess.check_output([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)))
+	assert output.decode().strip() == '[]'
+
+def test_getArchivedCounts(tmp_path, mseedStream, mseedFile):
+	"""assert that window taken from archive matches window trimmed from miniseed file"""
+	startTime = mseedStream[0].stats.starttime + 10.004
+	endTime = startTime + 30
+	counts, firstSampleTime, fs = convert_acc.readMiniseedCounts([mseedFile], startTime, endTime)
+	archiveDir = str(tmp_path / 'archive')
+	archivedCounts, archivedStartTime, archivedFs = convert_acc.getArchivedCounts([mseedFile], startTime, endTime, archiveDir)
+	assert isinstance(archivedCounts, np.memmap)
+	np.testing.assert_array_equal(archivedCounts, counts)
+	assert archivedStartTime == convert_acc.getDatetime64(firstSampleTime)
+	assert archivedFs == fs
+
+def test_archiveStore_window(tmp_path):
+	"""assert that windows spanning midnight and windows beyond archived data are handled"""
+	from convert_acc.archive import ArchiveStore
+	archiveDir = str(tmp_path)
+	archive = ArchiveStore(archiveDir)
+	counts = np.arange(1000, dtype=np.int32)
+	archive.addCounts('FFW', counts, np.datetime64('2019-09-26T23:59:55'), 100.)
+	assert sorted(os.listdir(os.path.join(archiveDir, 'FFW'))) == ['20190926.json', '20190926.npy', '20190927.json', '20190927.npy', 'channel.json']
+	window, startTime, fs = archive.getWindow('FFW', np.datetime64('2019-09-26T23:59:59'), np.datetime64('2019-09-27T00:00:30'))
+	np.testing.assert_array_equal(window, counts[400:])
+	assert startTime == np.datetime64('2019-09-26T23:59:59')
+	assert archive.getWindow('FFW', np.datetime64('2019-09-27T01:00'), np.datetime64('2019-09-27T02:00')) is None
+
+
 '''
 def test_isEventTimestampValid(iObject):
 	"""may not be necessary as mostly checking PyQt5 objects and methods"""